@@ -0,0 +1,86 @@
+"""Сценарии Core Service: DatabaseManager, пользователи, торговля, курсы."""
+import itertools
+import os
+
+from benchmarks import datagen
+from benchmarks.common import BenchContext, benchmark
+from valutatrade_hub.core.aum import aum_report, snapshot_prices
+from valutatrade_hub.core.currencies import CURRENCY_REGISTRY
+from valutatrade_hub.core.matrix import RateMatrix
+from valutatrade_hub.core.usecases import PortfolioUseCase, RateUseCase, UserUseCase
+from valutatrade_hub.infra.database import DatabaseManager
+
+
+@benchmark("db.load_data")
+def bench_load_data(ctx: BenchContext):
+    datagen.write_users(ctx.data_path, ctx.scale)
+    db = DatabaseManager()
+    return lambda: db.load_data('users.json')
+
+
+@benchmark("db.find_one")
+def bench_find_one(ctx: BenchContext):
+    datagen.write_users(ctx.data_path, ctx.scale)
+    db = DatabaseManager()
+    # Первая запись: чтение файла прекращается сразу после неё
+    return lambda: db.find_one('users.json', lambda user: user['username'] == "user1")
+
+
+@benchmark("db.save_data")
+def bench_save_data(ctx: BenchContext):
+    users = datagen.make_users(ctx.scale)
+    db = DatabaseManager()
+    return lambda: db.save_data(users, 'users.json')
+
+
+@benchmark("users.register_user")
+def bench_register_user(ctx: BenchContext):
+    datagen.write_users(ctx.data_path, ctx.scale)
+    datagen.write_portfolios(ctx.data_path, ctx.scale)
+    counter = itertools.count()
+    return lambda: UserUseCase.register_user(f"bench{next(counter)}", "password")
+
+
+@benchmark("users.login_user")
+def bench_login_user(ctx: BenchContext):
+    datagen.write_users(ctx.data_path, ctx.scale)
+    # Последний пользователь — худший случай для линейного поиска
+    username = f"user{ctx.scale}"
+    return lambda: UserUseCase.login_user(username, datagen.DEFAULT_PASSWORD)
+
+
+@benchmark("trading.buy_currency")
+def bench_buy_currency(ctx: BenchContext):
+    datagen.write_portfolios(ctx.data_path, ctx.scale)
+    return lambda: PortfolioUseCase.buy_currency(ctx.scale, "BTC", 0.01)
+
+
+@benchmark("trading.sell_currency")
+def bench_sell_currency(ctx: BenchContext):
+    datagen.write_portfolios(ctx.data_path, ctx.scale)
+    PortfolioUseCase.buy_currency(ctx.scale, "BTC", 1_000_000)
+    return lambda: PortfolioUseCase.sell_currency(ctx.scale, "BTC", 0.01)
+
+
+@benchmark("rates.get_rate")
+def bench_get_rate(ctx: BenchContext):
+    # rates.json масштабируется как scale / 100 пар
+    datagen.write_rates(os.path.join(ctx.data_path, 'rates.json'), max(10, ctx.scale // 100))
+    return lambda: RateUseCase.get_rate("BTC", "USD")
+
+
+@benchmark("portfolio.get_valuation")
+def bench_get_valuation(ctx: BenchContext):
+    datagen.write_portfolios(ctx.data_path, ctx.scale, wallets_per_user=5)
+    datagen.write_rates(os.path.join(ctx.data_path, 'rates.json'), max(10, ctx.scale // 100))
+    # Первый пользователь: замеряется материализованная оценка, а не поиск портфеля
+    return lambda: PortfolioUseCase.get_valuation(1, "USD")
+
+
+@benchmark("aum.report")
+def bench_aum_report(ctx: BenchContext):
+    datagen.write_portfolios(ctx.data_path, ctx.scale)
+    matrix = RateMatrix.from_cache(datagen.make_rates(0))
+    prices = snapshot_prices(matrix, CURRENCY_REGISTRY, "USD")
+    path = os.path.join(ctx.data_path, 'portfolios.json')
+    return lambda: aum_report(path, prices)
@@ -0,0 +1,72 @@
+"""Накладные расходы log_action на одну операцию.
+
+Сравниваются три режима: логирование выключено, синхронная запись в файл
+и запись через очередь (QueueHandler/QueueListener).
+
+    python -m benchmarks.bench_logging --iterations 20000
+"""
+import argparse
+import logging
+import tempfile
+import time
+
+from valutatrade_hub import logging_config
+from valutatrade_hub.decorators import log_action
+from valutatrade_hub.infra.settings import SettingsLoader
+
+
+@log_action("BUY")
+def _noop_trade(user_id: int, currency_code: str, amount: float) -> None:
+    return None
+
+
+def _measure(iterations: int) -> float:
+    """Среднее время одного вызова в микросекундах"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        _noop_trade(1, 'BTC', 0.5)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def run(iterations: int) -> dict:
+    settings = SettingsLoader()
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.set('log_path', tmp)
+
+        logging.disable(logging.CRITICAL)
+        results['off'] = _measure(iterations)
+        logging.disable(logging.NOTSET)
+
+        for mode, enabled in (('sync', False), ('queued', True)):
+            settings.set('log_queue', {
+                'enabled': enabled, 'max_size': iterations + 1, 'policy': 'block'
+            })
+            logging_config.setup_logging()
+            results[mode] = _measure(iterations)
+
+            start = time.perf_counter()
+            logging_config.shutdown_logging()
+            results[f'{mode}_flush_ms'] = (time.perf_counter() - start) * 1e3
+
+    settings.reload()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    print(f"Операций: {args.iterations}")
+    for mode in ('off', 'sync', 'queued'):
+        line = f"- {mode:<7} {results[mode]:8.2f} мкс/операция"
+        if f'{mode}_flush_ms' in results:
+            line += f"  (сброс при выходе: {results[f'{mode}_flush_ms']:.1f} мс)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
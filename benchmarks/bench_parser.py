@@ -0,0 +1,82 @@
+"""Сценарии Parser Service: история курсов и полный цикл обновления."""
+import datetime
+
+from benchmarks import datagen
+from benchmarks.common import BenchContext, StubClient, benchmark
+from benchmarks.simulator import PROFILES, ProviderSimulator
+from valutatrade_hub.parser_service.hedging import build_clients
+from valutatrade_hub.parser_service.storage import RatesStorage
+from valutatrade_hub.parser_service.updater import RatesUpdater
+
+
+def _history_record():
+    return datagen.make_history(1, start=datetime.datetime(2027, 1, 1))[0]
+
+
+@benchmark("storage.save_history_record")
+def bench_save_history_record(ctx: BenchContext):
+    datagen.write_history(ctx.config.HISTORY_FILE_PATH, ctx.scale)
+    storage = RatesStorage(ctx.config)
+    record = _history_record()
+    return lambda: storage.save_history_record(record)
+
+
+@benchmark("storage.get_history")
+def bench_get_history(ctx: BenchContext):
+    datagen.write_history(ctx.config.HISTORY_FILE_PATH, ctx.scale)
+    storage = RatesStorage(ctx.config)
+    storage.migrate_legacy_history()
+    return storage.get_history
+
+
+@benchmark("updater.run_update")
+def bench_run_update(ctx: BenchContext):
+    datagen.write_history(ctx.config.HISTORY_FILE_PATH, ctx.scale)
+    rates = {pair: datagen.START_RATES[pair.split('_')[0]] for pair in datagen.pair_sources()}
+    crypto = {p: r for p, r in rates.items() if p.split('_')[0] in ctx.config.CRYPTO_CURRENCIES}
+    fiat = {p: r for p, r in rates.items() if p not in crypto}
+    clients = {
+        'CoinGecko': StubClient(ctx.config, crypto),
+        'ExchangeRate-API': StubClient(ctx.config, fiat),
+    }
+    updater = RatesUpdater(ctx.config, clients, RatesStorage(ctx.config))
+    return updater.run_update
+
+
+def _simulated_run_update(profile: str, hedged: bool = False):
+    def scenario(ctx: BenchContext):
+        """run_update с настоящими клиентами против имитатора провайдеров"""
+        datagen.write_history(ctx.config.HISTORY_FILE_PATH, ctx.scale)
+        simulator = ProviderSimulator(PROFILES[profile]).start()
+        ctx.cleanups.append(simulator.stop)
+        simulator.configure(ctx.config)
+        if hedged:
+            # Задержка хеджа по p95 появляется уже за время прогрева сценария
+            ctx.config.HEDGE_MIN_SAMPLES = 5
+        else:
+            ctx.config.PROVIDER_PRIORITY = {
+                group: names[:1] for group, names in ctx.config.PROVIDER_PRIORITY.items()
+            }
+        updater = RatesUpdater(ctx.config, build_clients(ctx.config), RatesStorage(ctx.config))
+        return updater.run_update
+    return scenario
+
+
+for _profile in PROFILES:
+    benchmark(f"updater.run_update.sim.{_profile}")(_simulated_run_update(_profile))
+# Резервный провайдер криптовалют с хеджем после p95 основного
+for _profile in ("tail", "timeouts"):
+    benchmark(f"updater.run_update.sim.{_profile}.hedged")(
+        _simulated_run_update(_profile, hedged=True)
+    )
+
+
+@benchmark("rates.select_top")
+def bench_select_top(ctx: BenchContext):
+    datagen.write_rates(ctx.config.RATES_FILE_PATH, ctx.scale)
+    storage = RatesStorage(ctx.config)
+
+    def select_top():
+        index = storage.load_index()
+        return index.top(10, index.select(currency='USD'))
+    return select_top
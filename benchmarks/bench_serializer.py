@@ -0,0 +1,62 @@
+"""Сравнение бэкендов сериализации: время dump/parse и размер на диске.
+
+    python -m benchmarks.bench_serializer --records 100000
+"""
+import argparse
+import importlib.util
+import time
+
+from benchmarks import datagen
+from valutatrade_hub.infra.serializer import BACKENDS, JsonSerializer
+
+
+def _best_of(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def run(records: int, repeat: int) -> list:
+    datasets = {
+        "exchange_rates.json": datagen.make_history(records),
+        "users.json": datagen.make_users(max(1, records // 10)),
+    }
+    backends = [
+        b for b in BACKENDS if b == 'json' or importlib.util.find_spec(b) is not None
+    ]
+
+    rows = []
+    for name, data in datasets.items():
+        for backend in backends:
+            for pretty in (True, False):
+                serializer = JsonSerializer(backend, pretty)
+                payload = serializer.dumps(data)
+                rows.append({
+                    "file": name,
+                    "backend": backend,
+                    "format": "pretty" if pretty else "compact",
+                    "dump_ms": _best_of(lambda s=serializer, d=data: s.dumps(d), repeat),
+                    "parse_ms": _best_of(lambda s=serializer, p=payload: s.loads(p), repeat),
+                    "bytes": len(payload),
+                })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'файл':<20} {'бэкенд':<8} {'формат':<8} {'dump, мс':>10} "
+          f"{'parse, мс':>10} {'размер, КиБ':>12}")
+    for row in run(args.records, args.repeat):
+        print(f"{row['file']:<20} {row['backend']:<8} {row['format']:<8} "
+              f"{row['dump_ms']:>10.1f} {row['parse_ms']:>10.1f} {row['bytes'] / 1024:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
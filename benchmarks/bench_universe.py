@@ -0,0 +1,94 @@
+"""Время CoinGeckoClient.fetch_rates в зависимости от размера списка монет.
+
+Запросы уходят на локальный HTTP-сервер, имитирующий /simple/price с
+задержкой ответа; сравнивается последовательная загрузка групп
+идентификаторов (1 поток) и параллельная.
+
+    python -m benchmarks.bench_universe --sizes 10 50 100 250 500 --latency 0.2
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from valutatrade_hub.parser_service.api_clients import CoinGeckoClient
+from valutatrade_hub.parser_service.config import ParserConfig
+
+
+def _make_handler(latency: float):
+    class SimplePriceHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            ids = query.get('ids', [''])[0].split(',')
+            vs = query.get('vs_currencies', ['usd'])[0]
+            time.sleep(latency)
+            body = json.dumps({gecko_id: {vs: 1.0} for gecko_id in ids if gecko_id}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return SimplePriceHandler
+
+
+def _config(url: str, size: int, workers: int) -> ParserConfig:
+    ids = {f"C{i:04d}": f"synthetic-coin-{i:04d}" for i in range(size)}
+    return ParserConfig(
+        COINGECKO_URL=url,
+        COINGECKO_MAX_WORKERS=workers,
+        CRYPTO_CURRENCIES=tuple(ids),
+        CRYPTO_ID_MAP=ids,
+        # Локальный сервер: лимиты бесплатного тарифа не нужны
+        PROVIDER_RATE_LIMITS={},
+    )
+
+
+def run(sizes, latency: float, workers: int, repeat: int) -> list:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _make_handler(latency))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}/simple/price"
+
+    results = []
+    try:
+        for size in sizes:
+            row = {'size': size}
+            for label, count in (('serial', 1), ('parallel', workers)):
+                client = CoinGeckoClient(_config(url, size, count))
+                best = float('inf')
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    rates = client.fetch_rates()
+                    best = min(best, (time.perf_counter() - start) * 1e3)
+                assert len(rates) == size
+                row[label] = best
+            results.append(row)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 100, 250, 500])
+    parser.add_argument('--latency', type=float, default=0.2,
+                        help='Задержка ответа сервера в секундах')
+    parser.add_argument('--workers', type=int, default=ParserConfig.COINGECKO_MAX_WORKERS)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Задержка ответа: {args.latency * 1e3:.0f} мс, потоков: {args.workers}")
+    print(f"{'монет':>6} {'1 поток, мс':>12} {'параллельно, мс':>16}")
+    for row in run(args.sizes, args.latency, args.workers, args.repeat):
+        print(f"{row['size']:>6} {row['serial']:>12.1f} {row['parallel']:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
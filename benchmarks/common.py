@@ -0,0 +1,95 @@
+"""Инфраструктура бенчмарков: реестр сценариев, песочница данных, замеры."""
+import os
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+from valutatrade_hub.infra.settings import SettingsLoader
+from valutatrade_hub.parser_service.api_clients import BaseApiClient
+from valutatrade_hub.parser_service.config import ParserConfig
+
+SCALES: Dict[str, int] = {
+    "1k": 1_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+# Сколько раз повторять замер на каждом масштабе
+DEFAULT_REPEAT: Dict[str, int] = {
+    "1k": 20,
+    "100k": 5,
+    "1m": 3,
+}
+
+
+@dataclass
+class BenchContext:
+    """Изолированный каталог данных и конфигурация для одного сценария"""
+    scale: int
+    data_path: str
+    config: ParserConfig = field(init=False)
+    # Вызываются после замеров (остановка серверов и т. п.)
+    cleanups: List[Callable[[], object]] = field(init=False, default_factory=list)
+
+    def __post_init__(self):
+        self.config = ParserConfig(
+            RATES_FILE_PATH=os.path.join(self.data_path, 'rates.json'),
+            HISTORY_FILE_PATH=os.path.join(self.data_path, 'exchange_rates.json'),
+        )
+
+
+# Сценарий получает контекст, готовит данные и возвращает замеряемую функцию
+Scenario = Callable[[BenchContext], Callable[[], object]]
+BENCHMARKS: Dict[str, Scenario] = {}
+
+
+def benchmark(name: str) -> Callable[[Scenario], Scenario]:
+    """Регистрирует сценарий бенчмарка под именем name"""
+    def decorator(func: Scenario) -> Scenario:
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+class StubClient(BaseApiClient):
+    """Офлайн-клиент, возвращающий фиксированные курсы"""
+
+    def __init__(self, config: ParserConfig, rates: Dict[str, float]):
+        super().__init__(config)
+        self.rates = rates
+
+    def fetch_rates(self) -> Dict[str, float]:
+        return dict(self.rates)
+
+
+def run_scenario(name: str, scale: int, repeat: int) -> Dict[str, float]:
+    """Готовит песочницу, выполняет прогрев и repeat замеров, возвращает статистику в мс"""
+    settings = SettingsLoader()
+    original_data_path = settings.data_path
+
+    with tempfile.TemporaryDirectory(prefix='valutatrade-bench-') as data_path:
+        settings.set('data_path', data_path)
+        ctx = BenchContext(scale=scale, data_path=data_path)
+        try:
+            func = BENCHMARKS[name](ctx)
+            func()
+
+            timings: List[float] = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - start) * 1e3)
+        finally:
+            for cleanup in reversed(ctx.cleanups):
+                cleanup()
+            settings.set('data_path', original_data_path)
+
+    return {
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "max_ms": max(timings),
+        "mean_ms": statistics.fmean(timings),
+        "repeat": repeat,
+    }
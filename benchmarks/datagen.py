@@ -0,0 +1,176 @@
+"""Генерация синтетических данных в форматах DatabaseManager и RatesStorage.
+
+    python -m benchmarks.datagen --data-path /tmp/vt --users 100000 --wallets 5 \
+        --history 1000000
+
+Создаёт users.json, portfolios.json, rates.json и exchange_rates.json. Пароль
+всех пользователей — DEFAULT_PASSWORD, имена — user1..userN.
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import random
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from valutatrade_hub.core.currencies import CURRENCY_REGISTRY, CryptoCurrency
+
+DEFAULT_PASSWORD = "password"
+
+# Примерные курсы к USD для случайного блуждания
+START_RATES: Dict[str, float] = {
+    "EUR": 1.08, "GBP": 1.27, "RUB": 0.011, "JPY": 0.0067,
+    "BTC": 67000.0, "ETH": 2000.0, "SOL": 85.0, "ADA": 0.45, "DOT": 6.5,
+}
+
+
+def _dump(data: Any, path: str) -> None:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def make_users(count: int, password: str = DEFAULT_PASSWORD) -> List[Dict[str, Any]]:
+    """Пользователи user1..userN с одинаковым паролем"""
+    registered = datetime.datetime(2026, 1, 1).isoformat()
+    users = []
+    for user_id in range(1, count + 1):
+        salt = os.urandom(16).hex()
+        users.append({
+            "user_id": user_id,
+            "username": f"user{user_id}",
+            "registration_date": registered,
+            "hashed_password": hashlib.sha256((password + salt).encode()).hexdigest(),
+            "salt": salt,
+        })
+    return users
+
+
+def make_portfolios(count: int, wallets_per_user: int = 3,
+                    seed: int = 0) -> List[Dict[str, Any]]:
+    """Портфели с wallets_per_user случайными кошельками у каждого пользователя"""
+    rng = random.Random(seed)
+    codes = sorted(CURRENCY_REGISTRY)
+    wallets_per_user = min(wallets_per_user, len(codes))
+    return [
+        {
+            "user_id": user_id,
+            "wallets": {
+                code: round(rng.uniform(1, 10000), 4)
+                for code in rng.sample(codes, wallets_per_user)
+            },
+        }
+        for user_id in range(1, count + 1)
+    ]
+
+
+def pair_sources(codes: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """Пары к USD и их источник"""
+    codes = codes or list(START_RATES)
+    return {
+        f"{code}_USD": (
+            "CoinGecko" if isinstance(CURRENCY_REGISTRY.get(code), CryptoCurrency)
+            else "ExchangeRate-API"
+        )
+        for code in codes
+    }
+
+
+def make_history(records: int, pairs: Optional[Sequence[str]] = None,
+                 step_seconds: int = 60, start: Optional[datetime.datetime] = None,
+                 seed: int = 0) -> List[Dict[str, Any]]:
+    """История курсов: случайное блуждание по каждой паре, по тику на шаг"""
+    rng = random.Random(seed)
+    sources = pair_sources()
+    pairs = list(pairs or sources)
+    start = start or datetime.datetime(2026, 1, 1)
+    rates = {pair: START_RATES.get(pair.split('_')[0], 1.0) for pair in pairs}
+
+    history = []
+    tick = 0
+    while len(history) < records:
+        timestamp = (start + datetime.timedelta(seconds=tick * step_seconds)).isoformat()
+        timestamp += "Z"
+        for pair in pairs:
+            if len(history) >= records:
+                break
+            rates[pair] *= 1 + rng.gauss(0, 0.002)
+            from_code, to_code = pair.split('_')
+            history.append({
+                "id": f"{pair}_{timestamp.replace(':', '-')}",
+                "from_currency": from_code,
+                "to_currency": to_code,
+                "rate": round(rates[pair], 8),
+                "timestamp": timestamp,
+                "source": sources.get(pair, "ExchangeRate-API"),
+            })
+        tick += 1
+    return history
+
+
+def make_rates(pairs: int) -> Dict[str, Any]:
+    """Содержимое rates.json: реальные пары плюс синтетические до нужного количества"""
+    updated_at = datetime.datetime(2026, 1, 1).isoformat() + "Z"
+    sources = pair_sources()
+    cache = {
+        pair: {"rate": START_RATES[pair.split('_')[0]], "updated_at": updated_at,
+               "source": source}
+        for pair, source in sources.items()
+    }
+    for index in range(max(0, pairs - len(cache))):
+        cache[f"X{index:05d}_USD"] = {
+            "rate": 1.0 + index, "updated_at": updated_at, "source": "ExchangeRate-API"
+        }
+    return {"pairs": cache, "last_refresh": updated_at}
+
+
+def write_users(data_path: str, count: int) -> None:
+    _dump(make_users(count), os.path.join(data_path, 'users.json'))
+
+
+def write_portfolios(data_path: str, count: int, wallets_per_user: int = 3) -> None:
+    _dump(make_portfolios(count, wallets_per_user),
+          os.path.join(data_path, 'portfolios.json'))
+
+
+def write_history(path: str, records: int, **kwargs) -> None:
+    _dump(make_history(records, **kwargs), path)
+
+
+def write_rates(path: str, pairs: int) -> None:
+    _dump(make_rates(pairs), path)
+
+
+def generate(data_path: str, users: int, wallets: int, history: int,
+             rate_pairs: int = 0, step_seconds: int = 60) -> None:
+    """Полный набор файлов данных в каталоге data_path"""
+    write_users(data_path, users)
+    write_portfolios(data_path, users, wallets)
+    write_rates(os.path.join(data_path, 'rates.json'), rate_pairs)
+    write_history(os.path.join(data_path, 'exchange_rates.json'), history,
+                  step_seconds=step_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генератор синтетических данных")
+    parser.add_argument('--data-path', required=True, help='Каталог для файлов данных')
+    parser.add_argument('--users', type=int, default=1000, help='Количество пользователей')
+    parser.add_argument('--wallets', type=int, default=3,
+                        help='Кошельков у каждого пользователя')
+    parser.add_argument('--history', type=int, default=10000,
+                        help='Записей в истории курсов')
+    parser.add_argument('--rate-pairs', type=int, default=0,
+                        help='Дополнить rates.json синтетическими парами до N')
+    parser.add_argument('--step-seconds', type=int, default=60,
+                        help='Интервал между тиками истории')
+    args = parser.parse_args()
+
+    generate(args.data_path, args.users, args.wallets, args.history,
+             args.rate_pairs, args.step_seconds)
+    print(f"Данные записаны в {args.data_path}: пользователей {args.users}, "
+          f"кошельков {args.wallets} на пользователя, записей истории {args.history}")
+
+
+if __name__ == "__main__":
+    main()
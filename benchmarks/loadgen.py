@@ -0,0 +1,203 @@
+"""Многопроцессная нагрузка: смесь login/buy/sell/get-rate на общем каталоге данных.
+
+    python -m benchmarks.datagen --data-path /tmp/vt --users 1000 --history 1000
+    python -m benchmarks.loadgen --data-path /tmp/vt --processes 8 --duration 30
+
+Отчёт: пропускная способность, перцентили задержек по операциям, ошибки и
+расхождения балансов — итоговый портфель сравнивается с начальным плюс суммой
+успешно выполненных покупок и продаж.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.datagen import DEFAULT_PASSWORD
+from valutatrade_hub.core.currencies import CURRENCY_REGISTRY
+from valutatrade_hub.core.exceptions import ApiRequestError, InsufficientFundsError
+from valutatrade_hub.core.usecases import PortfolioUseCase, RateUseCase, UserUseCase
+from valutatrade_hub.infra.database import DatabaseManager
+from valutatrade_hub.infra.settings import SettingsLoader
+
+DEFAULT_MIX = "login=1,buy=3,sell=2,get-rate=4"
+BALANCE_TOLERANCE = 1e-6
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(','):
+        op, weight = part.split('=')
+        if op not in ('login', 'buy', 'sell', 'get-rate'):
+            raise argparse.ArgumentTypeError(f"Неизвестная операция '{op}'")
+        mix[op] = float(weight)
+    return mix
+
+
+def _worker(task: Tuple[str, int, float, Dict[str, float], int, bool]) -> Dict[str, Any]:
+    """Цикл случайных операций одного процесса до истечения duration секунд"""
+    data_path, seed, duration, mix, users, with_logging = task
+    SettingsLoader().set('data_path', data_path)
+    if not with_logging:
+        logging.disable(logging.CRITICAL)
+
+    rng = random.Random(seed)
+    codes = sorted(CURRENCY_REGISTRY)
+    ops, weights = list(mix), list(mix.values())
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Counter = Counter()
+    deltas: Dict[Tuple[int, str], float] = defaultdict(float)
+
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        op = rng.choices(ops, weights)[0]
+        user_id = rng.randint(1, users)
+        code = rng.choice(codes)
+        amount = round(rng.uniform(0.01, 1.0), 4)
+
+        start = time.perf_counter()
+        try:
+            if op == 'login':
+                UserUseCase.login_user(f"user{user_id}", DEFAULT_PASSWORD)
+            elif op == 'buy':
+                PortfolioUseCase.buy_currency(user_id, code, amount)
+                deltas[(user_id, code)] += amount
+            elif op == 'sell':
+                PortfolioUseCase.sell_currency(user_id, code, amount)
+                deltas[(user_id, code)] -= amount
+            else:
+                RateUseCase.get_rate(code, 'USD')
+        except InsufficientFundsError:
+            errors[f"{op}:InsufficientFunds"] += 1
+        except Exception as e:
+            errors[f"{op}:{type(e).__name__}"] += 1
+        latencies[op].append(time.perf_counter() - start)
+
+    return {
+        "latencies": dict(latencies),
+        "errors": dict(errors),
+        "deltas": [(uid, code, delta) for (uid, code), delta in deltas.items()],
+    }
+
+
+def _balances() -> Dict[Tuple[int, str], float]:
+    portfolios = DatabaseManager().load_data('portfolios.json')
+    return {
+        (p['user_id'], code): balance
+        for p in portfolios
+        for code, balance in p['wallets'].items()
+    }
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method='inclusive')[int(q * 100) - 1]
+
+
+def run(data_path: str, processes: int, duration: float, mix: Dict[str, float],
+        users: int = 0, with_logging: bool = False) -> Dict[str, Any]:
+    SettingsLoader().set('data_path', data_path)
+    initial = _balances()
+    users = users or len(DatabaseManager().load_data('users.json'))
+
+    tasks = [
+        (data_path, seed, duration, mix, users, with_logging)
+        for seed in range(processes)
+    ]
+    started = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(_worker, tasks)
+    elapsed = time.perf_counter() - started
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Counter = Counter()
+    expected = dict(initial)
+    for result in results:
+        for op, values in result['latencies'].items():
+            latencies[op].extend(values)
+        errors.update(result['errors'])
+        for user_id, code, delta in result['deltas']:
+            expected[(user_id, code)] = expected.get((user_id, code), 0.0) + delta
+
+    try:
+        final = _balances()
+        data_corrupted = False
+    except ApiRequestError:
+        # Параллельные записи могут оставить файл в неразбираемом состоянии
+        final = {}
+        data_corrupted = True
+
+    inconsistencies = []
+    for key in [] if data_corrupted else sorted(set(expected) | set(final)):
+        want, got = expected.get(key, 0.0), final.get(key, 0.0)
+        if abs(want - got) > BALANCE_TOLERANCE:
+            inconsistencies.append(
+                {"user_id": key[0], "currency": key[1], "expected": want, "actual": got}
+            )
+
+    total_ops = sum(len(values) for values in latencies.values())
+    return {
+        "processes": processes,
+        "duration_s": elapsed,
+        "total_ops": total_ops,
+        "throughput_ops_s": total_ops / elapsed if elapsed else 0.0,
+        "operations": {
+            op: {
+                "count": len(values),
+                "p50_ms": _percentile(values, 0.50) * 1e3,
+                "p95_ms": _percentile(values, 0.95) * 1e3,
+                "p99_ms": _percentile(values, 0.99) * 1e3,
+            }
+            for op, values in sorted(latencies.items())
+        },
+        "errors": dict(errors),
+        "data_corrupted": data_corrupted,
+        "balance_inconsistencies": len(inconsistencies),
+        "inconsistency_samples": inconsistencies[:10],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Многопроцессная нагрузка на ValutaTrade Hub")
+    parser.add_argument('--data-path', required=True)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0, help='Секунд на процесс')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'Веса операций (по умолчанию {DEFAULT_MIX})')
+    parser.add_argument('--users', type=int, default=0,
+                        help='Работать только с первыми N пользователями (больше конкуренции)')
+    parser.add_argument('--with-logging', action='store_true',
+                        help='Не отключать логирование в рабочих процессах')
+    parser.add_argument('--output', help='Записать отчёт в JSON')
+    args = parser.parse_args()
+
+    report = run(args.data_path, args.processes, args.duration, args.mix,
+                 args.users, args.with_logging)
+
+    print(f"Процессов: {report['processes']}, операций: {report['total_ops']}, "
+          f"{report['throughput_ops_s']:.1f} оп/с")
+    for op, stats in report['operations'].items():
+        print(f"- {op:<9} {stats['count']:>7}  p50 {stats['p50_ms']:8.2f} мс  "
+              f"p95 {stats['p95_ms']:8.2f} мс  p99 {stats['p99_ms']:8.2f} мс")
+    if report['errors']:
+        print("Ошибки:")
+        for name, count in sorted(report['errors'].items()):
+            print(f"- {name}: {count}")
+    if report['data_corrupted']:
+        print("portfolios.json повреждён после нагрузки и не разбирается, "
+              "сверка балансов невозможна")
+    else:
+        print(f"Расхождений балансов: {report['balance_inconsistencies']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Запуск набора бенчмарков и сравнение с сохранённым эталоном.
+
+    python -m benchmarks.run --scale 1k
+    python -m benchmarks.run --scale 100k --only db. trading. --output out.json
+    python -m benchmarks.run --scale 1k --update-baseline
+
+Код возврата 1, если медиана какого-либо сценария хуже эталона больше чем на
+--threshold (доля, по умолчанию 0.25).
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+from typing import Any, Dict, List
+
+from benchmarks import bench_core, bench_parser  # noqa: F401  регистрация сценариев
+from benchmarks.common import BENCHMARKS, DEFAULT_REPEAT, SCALES, run_scenario
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def _select(only: List[str]) -> List[str]:
+    names = sorted(BENCHMARKS)
+    if not only:
+        return names
+    return [name for name in names if any(name.startswith(prefix) for prefix in only)]
+
+
+def run_suite(scale: str, names: List[str], repeat: int) -> Dict[str, Any]:
+    results = {}
+    for name in names:
+        print(f"- {name} ...", end=' ', flush=True)
+        results[name] = run_scenario(name, SCALES[scale], repeat)
+        print(f"{results[name]['median_ms']:.3f} мс")
+
+    return {
+        "meta": {
+            "scale": scale,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.datetime.now().isoformat(),
+        },
+        "results": results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float) -> List[str]:
+    """Список регрессий относительно эталона того же масштаба"""
+    reference = baseline.get(report['meta']['scale'], {})
+    regressions = []
+    for name, result in report['results'].items():
+        if name not in reference:
+            continue
+        ratio = result['median_ms'] / reference[name] if reference[name] else 1.0
+        marker = "РЕГРЕССИЯ" if ratio > 1 + threshold else "ок"
+        print(f"  {name:<32} {reference[name]:10.3f} → {result['median_ms']:10.3f} мс "
+              f"(x{ratio:.2f}) {marker}")
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def _load_json(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_json(data: Dict[str, Any], path: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки ValutaTrade Hub")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='1k')
+    parser.add_argument('--repeat', type=int,
+                        help='Количество замеров (по умолчанию зависит от масштаба)')
+    parser.add_argument('--only', nargs='*', default=[],
+                        help='Префиксы имён сценариев, например db. trading.')
+    parser.add_argument('--output', help='Куда записать результаты (JSON)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--threshold', type=float, default=0.25)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Сохранить результаты как эталон для этого масштаба')
+    parser.add_argument('--list', action='store_true', help='Показать сценарии')
+    args = parser.parse_args()
+
+    if args.list:
+        print('\n'.join(sorted(BENCHMARKS)))
+        return 0
+
+    names = _select(args.only)
+    repeat = args.repeat or DEFAULT_REPEAT[args.scale]
+    print(f"Масштаб {args.scale} ({SCALES[args.scale]} записей), замеров: {repeat}")
+    report = run_suite(args.scale, names, repeat)
+
+    if args.output:
+        _save_json(report, args.output)
+        print(f"Результаты записаны в {args.output}")
+
+    baseline = _load_json(args.baseline)
+    if args.update_baseline:
+        scale_baseline = baseline.setdefault(args.scale, {})
+        scale_baseline.update({
+            name: result['median_ms'] for name, result in report['results'].items()
+        })
+        _save_json(baseline, args.baseline)
+        print(f"Эталон обновлён: {args.baseline}")
+        return 0
+
+    if not baseline.get(args.scale):
+        print(f"Эталон для масштаба {args.scale} не найден ({args.baseline}); "
+              f"создайте его флагом --update-baseline")
+        return 0
+
+    print(f"Сравнение с эталоном (порог +{args.threshold:.0%}):")
+    regressions = compare(report, baseline, args.threshold)
+    if regressions:
+        print(f"Обнаружены регрессии: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
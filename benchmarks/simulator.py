@@ -0,0 +1,375 @@
+"""Офлайн-имитатор провайдеров курсов: CoinGecko, CryptoCompare и ExchangeRate-API.
+
+Локальный HTTP-сервер отвечает на те же запросы, что и настоящие API
+(/simple/price, /coins/markets, /pricemulti, /{key}/latest/{base} и открытый
+/latest/{base}), и подставляется в клиенты через URL в ParserConfig. Курсы
+берутся из записанных ответов (benchmarks/fixtures) или генерируются
+случайным блужданием; профиль задаёт распределение задержки и долю
+зависаний, ответов 429 и испорченных ответов.
+
+    python -m benchmarks.simulator --profile slow --port 8765
+    python -m benchmarks.simulator --record benchmarks/fixtures
+"""
+import argparse
+import json
+import math
+import os
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from benchmarks.datagen import START_RATES
+from valutatrade_hub.core.currencies import CURRENCY_REGISTRY, CryptoCurrency
+from valutatrade_hub.parser_service.config import ParserConfig
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+FIXTURE_FILES = {
+    'simple_price': 'coingecko_simple_price.json',
+    'markets': 'coingecko_markets.json',
+    'latest': 'exchangerate_latest.json',
+}
+API_KEY = "simulator"
+
+
+@dataclass
+class Profile:
+    """Поведение имитатора: задержка ответа и доли сбоев (0..1 на запрос).
+
+    latency — ("fixed", секунды), ("uniform", от, до) или ("lognormal",
+    медиана, sigma). Зависший запрос отвечает через hang_seconds, что больше
+    тайм-аута клиента (client_timeout).
+    """
+    latency: Tuple[Any, ...] = ("fixed", 0.0)
+    timeout_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    malformed_rate: float = 0.0
+    hang_seconds: float = 1.5
+    client_timeout: float = 1.0
+    retry_after: int = 1
+
+
+PROFILES: Dict[str, Profile] = {
+    "ideal": Profile(),
+    "typical": Profile(latency=("lognormal", 0.08, 0.5)),
+    "slow": Profile(latency=("lognormal", 0.3, 1.0)),
+    "rate-limited": Profile(latency=("lognormal", 0.08, 0.5), rate_limit_rate=0.3),
+    "malformed": Profile(latency=("lognormal", 0.08, 0.5), malformed_rate=0.2),
+    "timeouts": Profile(latency=("lognormal", 0.08, 0.5), timeout_rate=0.2),
+    # Редкие зависания: хвост задержки, который срезают дублирующие запросы
+    "tail": Profile(latency=("lognormal", 0.05, 0.4), timeout_rate=0.03),
+}
+
+
+def sample_latency(rng: random.Random, latency: Tuple[Any, ...]) -> float:
+    kind, *params = latency
+    if kind == "fixed":
+        return params[0]
+    if kind == "uniform":
+        return rng.uniform(*params)
+    if kind == "lognormal":
+        median, sigma = params
+        return median * math.exp(rng.gauss(0.0, sigma)) if median else 0.0
+    raise ValueError(f"Неизвестное распределение задержки: {kind}")
+
+
+class RandomWalk:
+    """Цены в USD, которые при каждом запросе сдвигаются на случайный шаг"""
+
+    def __init__(self, seed: int = 0, volatility: float = 0.002):
+        self.rng = random.Random(seed)
+        self.volatility = volatility
+        self.prices: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def _start(self, key: str) -> float:
+        code = key.upper()
+        if code in START_RATES:
+            return START_RATES[code]
+        for currency in CURRENCY_REGISTRY.values():
+            if getattr(currency, 'coingecko_id', None) == key and currency.code in START_RATES:
+                return START_RATES[currency.code]
+        # Неизвестная монета: стабильная стартовая цена от 0.01 до 1000
+        return 10 ** (zlib.crc32(key.encode()) % 5000 / 1000 - 2)
+
+    def step(self, keys: List[str]) -> Dict[str, float]:
+        with self.lock:
+            for key in keys:
+                price = self.prices.get(key) or self._start(key)
+                self.prices[key] = price * math.exp(self.rng.gauss(0.0, self.volatility))
+            return {key: self.prices[key] for key in keys}
+
+
+def _fiat_codes() -> List[str]:
+    codes = {code for code, currency in CURRENCY_REGISTRY.items()
+             if not isinstance(currency, CryptoCurrency)}
+    codes.update(code for code in START_RATES if code not in CURRENCY_REGISTRY
+                 or not isinstance(CURRENCY_REGISTRY[code], CryptoCurrency))
+    return sorted(codes | {"USD"})
+
+
+def _load_fixtures(directory: str) -> Dict[str, Any]:
+    fixtures = {}
+    for name, filename in FIXTURE_FILES.items():
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                fixtures[name] = json.load(f)
+    return fixtures
+
+
+class ProviderSimulator:
+    """HTTP-сервер на 127.0.0.1, имитирующий оба провайдера по профилю.
+
+    fixtures — каталог с записанными ответами (см. FIXTURE_FILES) или None
+    для случайного блуждания. stats считает исходы запросов: ok, timeout,
+    rate_limited, malformed.
+    """
+
+    def __init__(self, profile: Profile, fixtures: Optional[str] = None,
+                 seed: int = 0, port: int = 0):
+        self.profile = profile
+        self.fixtures = _load_fixtures(fixtures) if fixtures else None
+        self.walk = RandomWalk(seed)
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.stats: Counter = Counter()
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), _Handler)
+        self.server.daemon_threads = True
+        self.server.simulator = self
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self) -> 'ProviderSimulator':
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> 'ProviderSimulator':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def configure(self, config: ParserConfig) -> ParserConfig:
+        """Направляет клиенты config на имитатор (изменяет config на месте)"""
+        config.COINGECKO_URL = f"{self.url}/coingecko/simple/price"
+        config.COINGECKO_MARKETS_URL = f"{self.url}/coingecko/coins/markets"
+        config.CRYPTOCOMPARE_URL = f"{self.url}/cryptocompare/data/pricemulti"
+        config.EXCHANGERATE_API_URL = f"{self.url}/exchangerate"
+        config.OPEN_EXCHANGERATE_URL = f"{self.url}/open-er"
+        config.EXCHANGERATE_API_KEY = API_KEY
+        config.REQUEST_TIMEOUT = self.profile.client_timeout
+        # Ответы 429 имитатора по-прежнему приостанавливают провайдера на Retry-After
+        config.PROVIDER_RATE_LIMITS = {}
+        return config
+
+    def outcome(self) -> Tuple[str, float]:
+        """Исход очередного запроса и задержка ответа"""
+        profile = self.profile
+        with self.rng_lock:
+            delay = sample_latency(self.rng, profile.latency)
+            roll = self.rng.random()
+        for name, share in (("timeout", profile.timeout_rate),
+                            ("rate_limited", profile.rate_limit_rate),
+                            ("malformed", profile.malformed_rate)):
+            if roll < share:
+                if name == "timeout":
+                    delay = profile.hang_seconds
+                self.stats[name] += 1
+                return name, delay
+            roll -= share
+        self.stats["ok"] += 1
+        return "ok", delay
+
+    def simple_price(self, ids: List[str], vs: str) -> Dict[str, Any]:
+        if self.fixtures is not None:
+            recorded = self.fixtures.get('simple_price', {})
+            return {gecko_id: recorded[gecko_id] for gecko_id in ids if gecko_id in recorded}
+        prices = self.walk.step(ids)
+        return {gecko_id: {vs: price} for gecko_id, price in prices.items()}
+
+    def pricemulti(self, symbols: List[str], tsym: str) -> Dict[str, Any]:
+        # Те же ряды цен, что и у CoinGecko: монета реестра — по её id CoinGecko
+        ids = {code: getattr(CURRENCY_REGISTRY.get(code), 'coingecko_id', None) or code.lower()
+               for code in symbols}
+        prices = self.simple_price(list(ids.values()), tsym.lower())
+        return {code: {tsym: prices[gecko_id][tsym.lower()]}
+                for code, gecko_id in ids.items() if gecko_id in prices}
+
+    def markets(self, per_page: int, page: int) -> List[Dict[str, Any]]:
+        if self.fixtures is not None:
+            coins = self.fixtures.get('markets', [])
+        else:
+            ids = {currency.coingecko_id: code for code, currency in CURRENCY_REGISTRY.items()
+                   if getattr(currency, 'coingecko_id', None)}
+            prices = self.walk.step(list(ids))
+            coins = [
+                {"id": gecko_id, "symbol": code.lower(), "name": gecko_id.title(),
+                 "current_price": prices[gecko_id], "market_cap": prices[gecko_id] * 1e7}
+                for gecko_id, code in ids.items()
+            ]
+            coins.sort(key=lambda coin: coin['market_cap'], reverse=True)
+        return coins[(page - 1) * per_page:page * per_page]
+
+    def latest(self, base: str) -> Dict[str, Any]:
+        if self.fixtures is not None:
+            return self.fixtures.get('latest', {"result": "error", "error-type": "no-fixture"})
+        codes = _fiat_codes()
+        prices = self.walk.step(codes)
+        prices["USD"] = 1.0
+        if base not in prices:
+            return {"result": "error", "error-type": "unsupported-code"}
+        # Единицы code за 1 base
+        rates = {code: prices[base] / price for code, price in prices.items()}
+        return {"result": "success", "base_code": base, "rates": rates}
+
+
+# Варианты испорченного ответа со статусом 200
+_MALFORMED = (
+    b'{"bitcoin": {"usd": 6701',
+    b'<html><body>Service temporarily unavailable</body></html>',
+    b'{"bitcoin": "n/a", "result": "error", "error-type": "malformed-request"}',
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def _send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self) -> Optional[Any]:
+        simulator = self.server.simulator
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = url.path.strip('/').split('/')
+
+        if parts[:3] == ['coingecko', 'simple', 'price']:
+            ids = [i for i in query.get('ids', [''])[0].split(',') if i]
+            return simulator.simple_price(ids, query.get('vs_currencies', ['usd'])[0])
+        if parts[:3] == ['coingecko', 'coins', 'markets']:
+            return simulator.markets(int(query.get('per_page', ['100'])[0]),
+                                     int(query.get('page', ['1'])[0]))
+        if parts[:3] == ['cryptocompare', 'data', 'pricemulti']:
+            symbols = [s for s in query.get('fsyms', [''])[0].split(',') if s]
+            return simulator.pricemulti(symbols, query.get('tsyms', ['USD'])[0])
+        if len(parts) == 4 and parts[0] == 'exchangerate' and parts[2] == 'latest':
+            if parts[1] != API_KEY:
+                return {"result": "error", "error-type": "invalid-key"}
+            return simulator.latest(parts[3].upper())
+        if len(parts) == 3 and parts[:2] == ['open-er', 'latest']:
+            return simulator.latest(parts[2].upper())
+        return None
+
+    def do_GET(self):
+        simulator = self.server.simulator
+        outcome, delay = simulator.outcome()
+        if delay:
+            time.sleep(delay)
+
+        try:
+            if outcome == "rate_limited":
+                body = b'{"status": {"error_code": 429, "error_message": "Rate limit exceeded"}}'
+                self._send(429, body, {'Retry-After': str(simulator.profile.retry_after)})
+                return
+            if outcome == "malformed":
+                with simulator.rng_lock:
+                    body = simulator.rng.choice(_MALFORMED)
+                self._send(200, body)
+                return
+
+            payload = self._route()
+            if payload is None:
+                self._send(404, b'{"error": "not found"}')
+            else:
+                self._send(200, json.dumps(payload).encode())
+        except (BrokenPipeError, ConnectionResetError):
+            # Клиент не дождался ответа (тайм-аут)
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def record_fixtures(config: ParserConfig, directory: str) -> List[str]:
+    """Сохраняет ответы настоящих провайдеров в directory как записанные ответы"""
+    os.makedirs(directory, exist_ok=True)
+    base = config.BASE_CURRENCY
+    requests_by_name = {
+        'simple_price': (config.COINGECKO_URL, {
+            "ids": ",".join(sorted(set(config.CRYPTO_ID_MAP.values()))),
+            "vs_currencies": base.lower(),
+        }),
+        'markets': (config.COINGECKO_MARKETS_URL, {
+            "vs_currency": base.lower(), "order": "market_cap_desc", "per_page": 250, "page": 1,
+        }),
+    }
+    if config.EXCHANGERATE_API_KEY:
+        requests_by_name['latest'] = (
+            f"{config.EXCHANGERATE_API_URL}/{config.EXCHANGERATE_API_KEY}/latest/{base}", {}
+        )
+
+    saved = []
+    for name, (url, params) in requests_by_name.items():
+        response = requests.get(url, params=params, timeout=config.REQUEST_TIMEOUT)
+        response.raise_for_status()
+        path = os.path.join(directory, FIXTURE_FILES[name])
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(response.json(), f, ensure_ascii=False, indent=2)
+        saved.append(path)
+    return saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='typical')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fixtures', nargs='?', const=FIXTURES_DIR, default=None,
+                        help='Отдавать записанные ответы (по умолчанию — случайное блуждание)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--record', metavar='DIR',
+                        help='Записать ответы настоящих провайдеров в DIR и выйти')
+    args = parser.parse_args()
+
+    if args.record:
+        for path in record_fixtures(ParserConfig(), args.record):
+            print(f"Сохранено: {path}")
+        return
+
+    simulator = ProviderSimulator(PROFILES[args.profile], args.fixtures, args.seed, args.port)
+    print(f"Профиль: {args.profile}, адрес: {simulator.url}")
+    print(f"  COINGECKO_URL={simulator.url}/coingecko/simple/price")
+    print(f"  COINGECKO_MARKETS_URL={simulator.url}/coingecko/coins/markets")
+    print(f"  CRYPTOCOMPARE_URL={simulator.url}/cryptocompare/data/pricemulti")
+    print(f"  EXCHANGERATE_API_URL={simulator.url}/exchangerate  (ключ: {API_KEY})")
+    print(f"  OPEN_EXCHANGERATE_URL={simulator.url}/open-er")
+    try:
+        simulator.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Исходы запросов: {dict(simulator.stats)}")
+        simulator.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,63 @@
+import functools
+import os
 import sys
 
 from valutatrade_hub.cli.interface import main as cli_main
-from valutatrade_hub.parser_service.api_clients import (
-    CoinGeckoClient,
-    ExchangeRateApiClient,
-)
+from valutatrade_hub.core.usecases import PortfolioUseCase
+from valutatrade_hub.infra.settings import SettingsLoader
+from valutatrade_hub.logging_config import setup_logging
+from valutatrade_hub.metrics import MetricsRegistry
 from valutatrade_hub.parser_service.config import ParserConfig
+from valutatrade_hub.parser_service.hedging import build_clients
 from valutatrade_hub.parser_service.scheduler import Scheduler
 from valutatrade_hub.parser_service.storage import RatesStorage
 from valutatrade_hub.parser_service.updater import RatesUpdater
+from valutatrade_hub.profiling import PROFILE_ENV_VAR, Profiler
 
 
 def run_scheduler():
+    setup_logging()
     print("Запуск планировщика обновления курсов")
     print("Нажмите Ctrl+C для остановки")
 
+    profiler = None
     try:
         config = ParserConfig()
-        coingecko_client = CoinGeckoClient(config)
-        exchangerate_client = ExchangeRateApiClient(config)
         storage = RatesStorage(config)
-        clients = {
-            'CoinGecko': coingecko_client,
-            'ExchangeRate-API': exchangerate_client
-        }
-        updater = RatesUpdater(config, clients, storage)
+        updater = RatesUpdater(config, build_clients(config), storage)
         scheduler = Scheduler(config)
-        scheduler.schedule_updates(updater.run_update, interval_minutes=60)
-        scheduler.run_scheduler()
+
+        update_function = updater.run_update
+        profile_mode = os.getenv(PROFILE_ENV_VAR)
+        if profile_mode:
+            profiler = Profiler(profile_mode, 'scheduler-run_update')
+            update_function = profiler.wrap(updater.run_update)
+            print(f"Профилирование циклов обновления: {profile_mode}")
+
+        settings = SettingsLoader()
+        after_update = None
+        if settings.valuation['prewarm']:
+            active_seconds = settings.valuation['active_days'] * 86400
+            after_update = functools.partial(PortfolioUseCase.prewarm_valuations, active_seconds)
+
+        scheduler.schedule_updates(update_function, interval_minutes=60,
+                                   after_update=after_update)
+        scheduler.schedule_history_compaction(storage, interval_minutes=60)
+        scheduler.schedule_universe_refresh(interval_hours=24)
+
+        registry = MetricsRegistry()
+        if registry.enabled:
+            registry.persist_on_exit()
+            scheduler.schedule_metrics_export(
+                os.path.join(settings.log_path, settings.metrics['prometheus_file']),
+                settings.metrics['export_interval_seconds']
+            )
+
+        try:
+            scheduler.run_scheduler()
+        finally:
+            if profiler is not None:
+                profiler.print_summary()
 
     except KeyboardInterrupt:
         print("\nПланировщик остановлен пользователем")
@@ -0,0 +1,26 @@
+import pytest
+
+from valutatrade_hub.infra.database import DatabaseManager
+from valutatrade_hub.parser_service.config import ParserConfig
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Пустой каталог data/ во временной рабочей директории"""
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "data"
+    path.mkdir()
+    db = DatabaseManager()
+    db.invalidate_cache()
+    yield path
+    db.invalidate_cache()
+    db._cache_enabled = False
+
+
+@pytest.fixture
+def parser_config(tmp_path):
+    """ParserConfig, у которого кэш, история, правила и лимиты лежат в tmp_path"""
+    return ParserConfig(
+        RATES_FILE_PATH=str(tmp_path / "rates.json"),
+        HISTORY_FILE_PATH=str(tmp_path / "exchange_rates.json"),
+    )
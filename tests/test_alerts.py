@@ -0,0 +1,78 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import pytest
+
+from valutatrade_hub.parser_service.alerts import AlertEngine, AlertStore
+from valutatrade_hub.parser_service.retention import parse_timestamp, utc_now
+from valutatrade_hub.parser_service.storage import RatesStorage
+
+TIMESTAMP = "2026-01-01T00:00:00Z"
+
+
+@pytest.fixture
+def engine(parser_config):
+    store = AlertStore(parser_config)
+    for rule_type in ('above', 'below', 'cross'):
+        store.add_rule("BTC_USD", rule_type, 100.0)
+    return AlertEngine(parser_config, RatesStorage(parser_config), store)
+
+
+def _fired(engine, old, new):
+    notifications = engine.evaluate({"BTC_USD": old}, {"BTC_USD": new}, TIMESTAMP)
+    return sorted(n['type'] for n in notifications)
+
+
+@pytest.mark.parametrize("old, new, expected", [
+    (99.0, 100.0, ['above', 'cross']),
+    (100.0, 101.0, []),
+    (101.0, 100.0, ['below', 'cross']),
+    (100.0, 99.0, []),
+    (99.0, 101.0, ['above', 'cross']),
+    (101.0, 99.0, ['below', 'cross']),
+    (100.0, 100.0, []),
+])
+def test_threshold_fires_when_reached_from_either_side(engine, old, new, expected):
+    assert _fired(engine, old, new) == expected
+
+
+def test_rule_created_at_is_naive_utc(engine):
+    created = parse_timestamp(engine.store.load_rules()[0]['created_at'])
+    assert created.tzinfo is None
+    assert abs(utc_now() - created) < timedelta(minutes=1)
+
+
+def test_change_alert_keeps_rules_edited_concurrently(engine, parser_config, monkeypatch):
+    other = AlertStore(parser_config)
+    change = engine.store.add_rule("BTC_USD", 'change', 5.0, window_seconds=3600)
+    engine.evaluate({}, {"BTC_USD": 100.0}, TIMESTAMP)
+
+    # Правки другого процесса между чтением правил и записью срабатывания
+    append = engine.store.append_notifications
+
+    def append_and_edit(notifications):
+        append(notifications)
+        other.remove_rule(1)
+        other.add_rule("ETH_USD", 'above', 10.0)
+
+    monkeypatch.setattr(engine.store, "append_notifications", append_and_edit)
+    later = "2026-01-01T00:01:00Z"
+    assert [n['rule_id'] for n in engine.evaluate({}, {"BTC_USD": 120.0}, later)] == [change['id']]
+
+    rules = {rule['id']: rule for rule in other.load_rules()}
+    assert sorted(rules) == [2, 3, change['id'], change['id'] + 1]
+    assert rules[change['id']]['last_fired_at'] == later
+    assert rules[change['id'] + 1]['pair'] == "ETH_USD"
+
+
+def _add_rules(config) -> None:
+    store = AlertStore(config)
+    for value in range(5):
+        store.add_rule("BTC_USD", 'above', float(value))
+
+
+def test_concurrent_add_rule_keeps_every_rule(parser_config):
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_add_rules, [parser_config] * 4))
+
+    assert sorted(r['id'] for r in AlertStore(parser_config).load_rules()) == list(range(1, 21))
@@ -0,0 +1,73 @@
+import json
+import math
+
+import pytest
+
+from valutatrade_hub.core import aum
+from valutatrade_hub.core.aum import aum_report
+
+PRICES = {"USD": 1.0, "BTC": 60000.0, "ETH": 3000.0, "EUR": 1.1, "XYZ": math.nan}
+
+
+def _write_portfolios(tmp_path, count):
+    codes = ["USD", "BTC", "ETH", "EUR", "XYZ", "DOGE"]
+    portfolios = [
+        {"user_id": user_id,
+         "wallets": {code: round((user_id * (i + 3)) % 97 * 1e-3 + (i == 0) * user_id, 6)
+                     for i, code in enumerate(codes) if (user_id + i) % 3}}
+        for user_id in range(1, count + 1)
+    ]
+    path = tmp_path / "portfolios.json"
+    path.write_text(json.dumps(portfolios), encoding='utf-8')
+    return str(path), portfolios
+
+
+def _expected(portfolios, top):
+    values = {}
+    for portfolio in portfolios:
+        values[portfolio['user_id']] = sum(
+            amount * PRICES[code] for code, amount in portfolio['wallets'].items()
+            if code in PRICES and not math.isnan(PRICES[code])
+        )
+    return sorted(((value, user_id) for user_id, value in values.items()), reverse=True)[:top]
+
+
+def _normalized(report):
+    return (
+        report['portfolios'],
+        round(report['total'], 4),
+        [(row['currency'], round(row['amount'], 6), round(row['value'], 4), row['holders'],
+          row['priced']) for row in report['currencies']],
+        [(row['user_id'], round(row['value'], 4)) for row in report['top_holders']],
+    )
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        monkeypatch.setattr(aum, "np", pytest.importorskip("numpy"))
+    else:
+        monkeypatch.setattr(aum, "np", None)
+    monkeypatch.setattr(aum, "BATCH_SIZE", 100)
+    return request.param
+
+
+def test_report_matches_direct_sum(tmp_path, backend):
+    path, portfolios = _write_portfolios(tmp_path, 500)
+    report = aum_report(path, PRICES, top=5)
+
+    assert report['portfolios'] == 500
+    assert [(row['user_id'], pytest.approx(row['value'])) for row in report['top_holders']] \
+        == [(user_id, pytest.approx(value)) for value, user_id in _expected(portfolios, 5)]
+    unpriced = {row['currency']: row['priced'] for row in report['currencies']}
+    assert unpriced["XYZ"] is False and unpriced["DOGE"] is False
+
+
+def test_backends_agree(tmp_path, monkeypatch):
+    path, _ = _write_portfolios(tmp_path, 3000)
+    monkeypatch.setattr(aum, "BATCH_SIZE", 100)
+    monkeypatch.setattr(aum, "np", None)
+    python = _normalized(aum_report(path, PRICES, top=7))
+
+    monkeypatch.setattr(aum, "np", pytest.importorskip("numpy"))
+    assert _normalized(aum_report(path, PRICES, top=7)) == python
@@ -0,0 +1,15 @@
+from valutatrade_hub.cli.interface import CLIInterface
+from valutatrade_hub.core.currencies import CURRENCY_REGISTRY, CryptoCurrency
+from valutatrade_hub.core.exceptions import CurrencyNotFoundError
+
+
+def test_unknown_currency_lists_registry(data_dir, monkeypatch, capsys):
+    monkeypatch.setitem(CURRENCY_REGISTRY, "AVAX",
+                        CryptoCurrency("Avalanche", "AVAX", "Snowman", 1.2e10, "avalanche-2"))
+
+    CLIInterface()._handle_exception(CurrencyNotFoundError("XYZ"))
+
+    supported = next(line for line in capsys.readouterr().out.splitlines()
+                     if line.startswith("Поддерживаемые валюты:"))
+    assert supported.split(": ")[1].split(", ") == sorted(CURRENCY_REGISTRY)
+    assert "AVAX" in supported
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from valutatrade_hub.core.exceptions import ApiRequestError
+from valutatrade_hub.infra.database import DatabaseManager
+from valutatrade_hub.infra.jsonstream import CHUNK_SIZE
+
+
+def _portfolios(count):
+    # Мелкие балансы Python записывает с экспонентой (1e-05), литералы — рядом с ними
+    return [
+        {"user_id": i, "wallets": {"BTC": {"balance": 10 ** -(5 + i % 7)},
+                                   "USD": {"balance": i * 1.5}},
+         "archived": i % 3 == 0, "note": None}
+        for i in range(1, count + 1)
+    ]
+
+
+def test_find_one_over_several_chunks(data_dir):
+    portfolios = _portfolios(20000)
+    (data_dir / "portfolios.json").write_text(json.dumps(portfolios), encoding='utf-8')
+    assert (data_dir / "portfolios.json").stat().st_size > 2 * CHUNK_SIZE
+
+    db = DatabaseManager()
+    for user_id in (1, 4999, 12345, 19999, 20000):
+        record = db.find_one('portfolios.json', lambda p, uid=user_id: p['user_id'] == uid)
+        assert record == portfolios[user_id - 1]
+    assert db.find_one('portfolios.json', lambda p: p['user_id'] == 0) is None
+    assert list(db.iter_data('portfolios.json')) == db.load_data('portfolios.json')
+
+
+def test_find_one_missing_file(data_dir):
+    assert DatabaseManager().find_one('users.json', lambda u: True) is None
+
+
+def test_find_one_invalid_file(data_dir):
+    (data_dir / "users.json").write_text('[{"username": "a"}, {"username": tru}]',
+                                        encoding='utf-8')
+    with pytest.raises(ApiRequestError):
+        DatabaseManager().find_one('users.json', lambda u: u['username'] == 'b')
+
+
+def test_cache_returns_copies(data_dir):
+    db = DatabaseManager()
+    db.enable_cache()
+    db.save_data([{"user_id": 1, "wallets": {"USD": {"balance": 10.0}}}], 'portfolios.json')
+
+    portfolios = db.load_data('portfolios.json')
+    portfolios[0]['wallets']['USD']['balance'] = 0.0
+    portfolios.append({"user_id": 2, "wallets": {}})
+
+    assert db.load_data('portfolios.json') == [
+        {"user_id": 1, "wallets": {"USD": {"balance": 10.0}}}
+    ]
+    assert db.find_one('portfolios.json', lambda p: p['user_id'] == 1)['wallets'] == {
+        "USD": {"balance": 10.0}
+    }
+
+
+def test_cache_not_shared_with_saved_object(data_dir):
+    db = DatabaseManager()
+    db.enable_cache()
+    users = [{"user_id": 1, "username": "alice"}]
+    db.save_data(users, 'users.json')
+    users[0]['username'] = 'mallory'
+
+    assert db.load_data('users.json')[0]['username'] == 'alice'
@@ -0,0 +1,114 @@
+import logging
+
+import pytest
+
+from valutatrade_hub.decorators import log_action
+
+LOGGER = 'valutatrade.actions'
+
+
+class Trading:
+    @staticmethod
+    @log_action("BUY", sample_rate=1.0)
+    def buy(user_id: int, currency_code: str, amount: float) -> float:
+        return amount
+
+    @staticmethod
+    @log_action("SELL", sample_rate=1.0)
+    def sell(user_id: int, currency: str, amount: float) -> float:
+        if amount <= 0:
+            raise ValueError("amount должен быть положительным")
+        return amount
+
+
+def _records(caplog):
+    return [record for record in caplog.records if record.name == LOGGER]
+
+
+@pytest.fixture
+def actions(caplog):
+    caplog.set_level(logging.INFO, logger=LOGGER)
+    return caplog
+
+
+def test_fields_from_staticmethod_positional_args(actions):
+    assert Trading.buy(7, "BTC", 0.5) == 0.5
+
+    [record] = _records(actions)
+    assert (record.action, record.result) == ("BUY", "OK")
+    assert (record.user_id, record.currency_code, record.amount) == (7, "BTC", 0.5)
+
+
+def test_fields_from_kwargs(actions):
+    Trading.buy(user_id=3, amount=2.0, currency_code="ETH")
+
+    [record] = _records(actions)
+    assert (record.user_id, record.currency_code, record.amount) == (3, "ETH", 2.0)
+
+
+def test_field_alias_and_mixed_args(actions):
+    Trading.sell(5, currency="EUR", amount=1.0)
+
+    [record] = _records(actions)
+    assert (record.user_id, record.currency_code, record.amount) == (5, "EUR", 1.0)
+
+
+def test_missing_fields_are_omitted(actions):
+    @log_action("PING", sample_rate=1.0)
+    def ping(username: str, verbose: bool = False) -> str:
+        return username
+
+    ping("alice")
+    [record] = _records(actions)
+    assert record.username == "alice"
+    for field in ("user_id", "currency_code", "amount", "rate", "base"):
+        assert not hasattr(record, field)
+
+
+def test_custom_fields(actions):
+    @log_action("TRANSFER", fields={"user_id": ("sender", "user_id"), "amount": "sum"},
+                sample_rate=1.0)
+    def transfer(sender: int, receiver: int, sum: float) -> None:
+        pass
+
+    transfer(1, 2, sum=9.5)
+    [record] = _records(actions)
+    assert (record.user_id, record.amount) == (1, 9.5)
+
+
+def test_sample_rate_zero_skips_success_but_logs_errors(actions):
+    @log_action("QUOTE", sample_rate=0.0)
+    def quote(user_id: int, amount: float) -> float:
+        if amount < 0:
+            raise ValueError("отрицательная сумма")
+        return amount
+
+    for _ in range(50):
+        quote(1, 1.0)
+    assert _records(actions) == []
+
+    with pytest.raises(ValueError):
+        quote(1, -1.0)
+    [record] = _records(actions)
+    assert record.levelno == logging.ERROR
+    assert (record.result, record.error_type, record.user_id) == ("ERROR", "ValueError", 1)
+    assert record.error_message == "отрицательная сумма"
+
+
+def test_sample_rate_one_logs_every_call(actions):
+    @log_action("QUOTE", sample_rate=1.0)
+    def quote(user_id: int) -> int:
+        return user_id
+
+    for user_id in range(20):
+        quote(user_id)
+    assert [record.user_id for record in _records(actions)] == list(range(20))
+
+
+def test_disabled_returns_original_function(actions):
+    def quote(user_id: int) -> int:
+        return user_id
+
+    assert log_action("QUOTE", enabled=False)(quote) is quote
+    quote(1)
+    assert _records(actions) == []
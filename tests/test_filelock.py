@@ -0,0 +1,87 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from valutatrade_hub.infra.filelock import FileLock
+
+ROUNDS = 50
+
+
+def _increment(args) -> None:
+    lock_path, counter_path = args
+    for _ in range(ROUNDS):
+        with FileLock(lock_path, poll_interval=0.001):
+            with open(counter_path, 'r+', encoding='utf-8') as f:
+                value = int(f.read() or 0)
+                f.seek(0)
+                f.write(str(value + 1))
+                f.truncate()
+
+
+def _hold(lock_path: str, seconds: float, release: bool) -> None:
+    lock = FileLock(lock_path)
+    lock.acquire(timeout=None)
+    time.sleep(seconds)
+    if release:
+        lock.release()
+
+
+def test_excludes_other_instances(tmp_path):
+    path = str(tmp_path / "a.lock")
+    first, second = FileLock(path), FileLock(path)
+    assert first.acquire() and first.locked()
+    assert second.locked()
+    assert not second.acquire(timeout=0.05)
+    first.release()
+    assert not second.locked()
+    assert second.acquire()
+    second.release()
+
+
+def test_processes_and_threads_never_overlap(tmp_path):
+    lock_path = str(tmp_path / "counter.lock")
+    counter_path = tmp_path / "counter"
+    counter_path.write_text("0", encoding='utf-8')
+    args = (lock_path, str(counter_path))
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=3, mp_context=context) as pool:
+        futures = [pool.submit(_increment, args) for _ in range(3)]
+        threads = [threading.Thread(target=_increment, args=(args,)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for future in futures:
+            future.result()
+
+    assert int(counter_path.read_text(encoding='utf-8')) == 5 * ROUNDS
+
+
+def test_slow_holder_keeps_lock(tmp_path):
+    path = str(tmp_path / "slow.lock")
+    context = multiprocessing.get_context('spawn')
+    holder = context.Process(target=_hold, args=(path, 1.0, True))
+    holder.start()
+    lock = FileLock(path)
+    try:
+        while not lock.locked():
+            time.sleep(0.01)
+        # Держатель жив, сколько бы ни длилось ожидание: блокировку не отнять
+        assert not lock.acquire(timeout=0.3)
+    finally:
+        holder.join()
+    assert lock.acquire()
+    lock.release()
+
+
+def test_dead_holder_releases_lock(tmp_path):
+    path = str(tmp_path / "dead.lock")
+    context = multiprocessing.get_context('spawn')
+    holder = context.Process(target=_hold, args=(path, 0.0, False))
+    holder.start()
+    holder.join()
+    lock = FileLock(path)
+    assert lock.acquire()
+    lock.release()
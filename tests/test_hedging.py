@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+from valutatrade_hub.metrics import MetricsRegistry
+from valutatrade_hub.parser_service.api_clients import ApiRequestError, BaseApiClient
+from valutatrade_hub.parser_service.hedging import HedgedClient
+
+
+class StubClient(BaseApiClient):
+    """Отвечает rates через delay секунд или падает с ошибкой"""
+
+    def __init__(self, config, delay, rates=None, error=None):
+        super().__init__(config)
+        self.delay = delay
+        self.rates = rates
+        self.error = error
+        self.called = threading.Event()
+
+    def fetch_rates(self):
+        self.called.set()
+        time.sleep(self.delay)
+        if self.error:
+            raise ApiRequestError(self.error)
+        return self.rates
+
+
+@pytest.fixture
+def config(parser_config):
+    parser_config.HEDGE_DELAY_SECONDS = 0.05
+    return parser_config
+
+
+COUNTERS = {
+    'requests': ('valutatrade_hedge_requests_total', "B"),
+    'wins': ('valutatrade_hedge_wins_total', "B"),
+    'primary_wins': ('valutatrade_hedge_wins_total', "P"),
+}
+
+
+def _counts(group):
+    registry = MetricsRegistry()
+    return {key: registry.counter(name, group=group, provider=provider).value
+            for key, (name, provider) in COUNTERS.items()}
+
+
+def _run(config, group, primary, backup):
+    """Курсы, ответивший провайдер и приращения счётчиков хеджа группы"""
+    client = HedgedClient(config, group, [("P", primary), ("B", backup)])
+    before = _counts(group)
+    rates = client.fetch_rates()
+    after = _counts(group)
+    return rates, client.last_source, {key: after[key] - before[key] for key in after}
+
+
+def test_primary_fast_sends_no_hedge(config):
+    primary = StubClient(config, 0.0, {"X": 1.0})
+    backup = StubClient(config, 0.0, {"X": 2.0})
+    rates, source, counts = _run(config, "fast", primary, backup)
+    assert (rates, source) == ({"X": 1.0}, "P")
+    assert counts == {'requests': 0, 'wins': 0, 'primary_wins': 0}
+    assert not backup.called.is_set()
+
+
+def test_primary_slow_backup_wins(config):
+    primary = StubClient(config, 1.0, {"X": 1.0})
+    backup = StubClient(config, 0.0, {"X": 2.0})
+    rates, source, counts = _run(config, "backup-wins", primary, backup)
+    assert (rates, source) == ({"X": 2.0}, "B")
+    assert counts == {'requests': 1, 'wins': 1, 'primary_wins': 0}
+
+
+def test_primary_slow_but_still_wins(config):
+    primary = StubClient(config, 0.1, {"X": 1.0})
+    backup = StubClient(config, 1.0, {"X": 2.0})
+    rates, source, counts = _run(config, "primary-wins", primary, backup)
+    assert (rates, source) == ({"X": 1.0}, "P")
+    # Хедж отправлен, но не выигран
+    assert counts == {'requests': 1, 'wins': 0, 'primary_wins': 0}
+
+
+def test_primary_error_falls_back(config):
+    primary = StubClient(config, 0.0, error="500")
+    backup = StubClient(config, 0.0, {"X": 2.0})
+    rates, source, counts = _run(config, "primary-error", primary, backup)
+    assert (rates, source) == ({"X": 2.0}, "B")
+    assert counts == {'requests': 1, 'wins': 1, 'primary_wins': 0}
+
+
+def test_all_providers_fail(config):
+    client = HedgedClient(config, "all-fail", [
+        ("P", StubClient(config, 0.0, error="timeout")),
+        ("B", StubClient(config, 0.1, error="429")),
+    ])
+    with pytest.raises(ApiRequestError) as excinfo:
+        client.fetch_rates()
+    assert "P: timeout" in str(excinfo.value) and "B: 429" in str(excinfo.value)
+    assert client.last_source is None
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from valutatrade_hub.infra.jsonstream import iter_records
+from valutatrade_hub.infra.serializer import SerializationError
+
+# Токены, которые граница куска может разрезать посередине: экспонента, литералы
+RECORDS = [
+    {"user_id": 1, "wallets": {"BTC": {"balance": 1e-05}, "ETH": {"balance": 2.5e+20}},
+     "active": True, "blocked": False, "note": None},
+    {"user_id": 2, "wallets": {"USD": {"balance": -1.5e-300}}, "active": False,
+     "note": "ё{\"}\\", "tags": [True, False, None, 0, -0.0, 1E9]},
+    {"user_id": 3, "wallets": {}, "active": True, "blocked": None},
+] * 5
+
+
+def _write(tmp_path, records, **dump_args):
+    path = tmp_path / "portfolios.json"
+    path.write_text(json.dumps(records, ensure_ascii=False, **dump_args), encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_chunk_boundary_inside_token(tmp_path, indent):
+    path = _write(tmp_path, RECORDS, indent=indent)
+    for chunk_size in range(1, 300):
+        assert list(iter_records(path, chunk_size=chunk_size)) == RECORDS, chunk_size
+
+
+def test_reported_repro(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text('[{"a": 1e-09, "b": 2}, {"a": 1}]', encoding='utf-8')
+    for chunk_size in (1, 2, 5, 10):
+        assert list(iter_records(str(path), chunk_size=chunk_size)) == [
+            {"a": 1e-09, "b": 2}, {"a": 1}
+        ]
+
+
+def test_shards_cover_file(tmp_path):
+    path = _write(tmp_path, RECORDS)
+    size = len(open(path, 'rb').read())
+
+    def is_record(value):
+        return isinstance(value, dict) and "user_id" in value
+
+    for chunk_size in (3, 17, 64):
+        for shards in (2, 3, 7):
+            bounds = [size * i // shards for i in range(shards + 1)]
+            records = [
+                record
+                for start, end in zip(bounds[:-1], bounds[1:], strict=True)
+                for record in iter_records(path, start, end, is_record, chunk_size)
+            ]
+            assert records == RECORDS, (chunk_size, shards)
+
+
+@pytest.mark.parametrize("text", ['[{"a": 1e-}]', '[{"a": tru}]', '[{"a": 1} {"a": 2}]',
+                                  '[{"a": 1}, '])
+def test_invalid_json_raises_at_eof(tmp_path, text):
+    path = tmp_path / "bad.json"
+    path.write_text(text, encoding='utf-8')
+    for chunk_size in (1, 4, 1 << 20):
+        with pytest.raises(SerializationError):
+            list(iter_records(str(path), chunk_size=chunk_size))
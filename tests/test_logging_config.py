@@ -0,0 +1,66 @@
+import logging
+import queue
+import threading
+
+from valutatrade_hub.logging_config import (
+    BatchingFileHandler,
+    BatchingQueueListener,
+    BoundedQueueHandler,
+)
+
+
+def _record(message: str) -> logging.LogRecord:
+    return logging.makeLogRecord({"msg": message, "levelno": logging.INFO,
+                                  "levelname": "INFO"})
+
+
+def test_drop_policy_counts_records_over_the_limit():
+    log_queue: queue.Queue = queue.Queue(maxsize=2)
+    handler = BoundedQueueHandler(log_queue, 'drop')
+
+    for index in range(5):
+        handler.emit(_record(f"record {index}"))
+
+    assert handler.dropped == 3
+    assert [log_queue.get_nowait().getMessage() for _ in range(2)] == ["record 0", "record 1"]
+
+
+def test_block_policy_waits_for_free_slot():
+    log_queue: queue.Queue = queue.Queue(maxsize=1)
+    handler = BoundedQueueHandler(log_queue, 'block')
+    handler.emit(_record("first"))
+
+    writer = threading.Thread(target=handler.emit, args=(_record("second"),))
+    writer.start()
+    writer.join(timeout=0.1)
+    assert writer.is_alive()
+
+    assert log_queue.get().getMessage() == "first"
+    writer.join(timeout=1)
+    assert not writer.is_alive()
+    assert handler.dropped == 0
+    assert log_queue.get_nowait().getMessage() == "second"
+
+
+def test_listener_writes_batches_with_one_flush_each(tmp_path, monkeypatch):
+    flushes = []
+    original = logging.StreamHandler.flush
+    monkeypatch.setattr(logging.StreamHandler, "flush",
+                        lambda handler: flushes.append(1) or original(handler))
+
+    log_queue: queue.Queue = queue.Queue()
+    handler = BoundedQueueHandler(log_queue)
+    for index in range(10):
+        handler.emit(_record(f"record {index}"))
+
+    path = tmp_path / "actions.log"
+    file_handler = BatchingFileHandler(str(path), encoding='utf-8')
+    listener = BatchingQueueListener(log_queue, file_handler, batch_size=4)
+    listener.start()
+    listener.stop()
+    file_handler.close()
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert lines == [f"record {index}" for index in range(10)]
+    # Записи уже в очереди: пачки 4, 4 и 2 вместе с сигналом остановки
+    assert len(flushes) <= 4
@@ -0,0 +1,27 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from valutatrade_hub.metrics import MetricsRegistry
+
+ROUNDS = 25
+
+
+def _persist_rounds(path: str) -> None:
+    registry = MetricsRegistry()
+    registry.file_path = path
+    for _ in range(ROUNDS):
+        registry.counter('valutatrade_test_total', worker='any').inc()
+        registry.persist()
+
+
+def test_concurrent_persist_keeps_every_increment(tmp_path):
+    path = str(tmp_path / "metrics.json")
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=4, mp_context=context) as pool:
+        list(pool.map(_persist_rounds, [path] * 4))
+
+    registry = MetricsRegistry()
+    registry.file_path = path
+    counters = registry.load_persisted()['counters']
+    [value] = [value for key, value in counters.items() if 'valutatrade_test_total' in key]
+    assert value == 4 * ROUNDS
@@ -0,0 +1,50 @@
+import pytest
+
+from valutatrade_hub.parser_service.pairs import CRYPTO, FIAT, PairIndex, parse_pair
+
+RATES = {
+    "BTC_USD": {"rate": 60000.0, "from_currency": "BTC", "to_currency": "USD",
+                "kind": CRYPTO, "source": "CoinGecko"},
+    "ETH_USD": {"rate": 3000.0, "from_currency": "ETH", "to_currency": "USD",
+                "kind": CRYPTO, "source": "CoinGecko"},
+    "SOL_USD": {"rate": 150.0, "from_currency": "SOL", "to_currency": "USD",
+                "kind": CRYPTO, "source": "CoinGecko"},
+    # Старый кэш без разобранных полей
+    "GBP_USD": {"rate": 1.27, "source": "ExchangeRate-API"},
+    "EUR_USD": {"rate": 1.08, "source": "ExchangeRate-API"},
+}
+
+
+@pytest.fixture
+def index():
+    return PairIndex(RATES)
+
+
+@pytest.mark.parametrize("n, expected", [
+    (1, ["BTC_USD"]),
+    (3, ["BTC_USD", "ETH_USD", "SOL_USD"]),
+    (10, ["BTC_USD", "ETH_USD", "SOL_USD", "GBP_USD", "EUR_USD"]),
+    (0, []),
+])
+def test_top_orders_by_rate(index, n, expected):
+    assert index.top(n) == expected
+
+
+def test_top_within_selection(index):
+    assert index.top(2, index.select(kind=FIAT)) == ["GBP_USD", "EUR_USD"]
+    assert index.top(5, index.select(currency="sol")) == ["SOL_USD"]
+    assert index.top(3, []) == []
+
+
+def test_top_matches_full_sort():
+    rates = {f"C{i:03d}_USD": {"rate": float((i * 7919) % 1000)} for i in range(300)}
+    expected = sorted(rates, key=lambda pair: rates[pair]['rate'], reverse=True)[:10]
+
+    assert PairIndex(rates).top(10) == expected
+
+
+def test_select_by_currency_and_kind(index):
+    assert index.select(currency="USD", kind=CRYPTO) == ["BTC_USD", "ETH_USD", "SOL_USD"]
+    assert index.select(currency="EUR") == ["EUR_USD"]
+    assert index.select(currency="XYZ") == []
+    assert parse_pair("EUR_USD", RATES["EUR_USD"]).kind == FIAT
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from valutatrade_hub.profiling import Profiler
+
+
+def _busy_work() -> int:
+    return sum(index * index for index in range(20000))
+
+
+def _profiler(mode: str, tmp_path) -> Profiler:
+    profiler = Profiler(mode, "test", top_n=5)
+    profiler.log_path = str(tmp_path)
+    return profiler
+
+
+def test_cpu_reports_are_saved_and_summarised(tmp_path):
+    profiler = _profiler('cpu', tmp_path)
+    for _ in range(2):
+        with profiler.session():
+            _busy_work()
+
+    assert len(profiler.reports) == 2
+    assert all(os.path.basename(path).startswith("profile-test-") and path.endswith(".prof")
+               for path in profiler.reports)
+    assert sorted(os.listdir(tmp_path)) == sorted(map(os.path.basename, profiler.reports))
+
+    summary = profiler.summary()
+    assert summary.startswith("Профиль 'test' (cpu), отчётов: 2")
+    assert "_busy_work" in summary
+
+
+def test_mem_report_lists_allocation_sites(tmp_path):
+    profiler = _profiler('mem', tmp_path)
+    with profiler.session():
+        blocks = [bytearray(1024) for _ in range(256)]
+
+    [path] = profiler.reports
+    assert path.endswith("-mem.txt")
+    with open(path, encoding='utf-8') as f:
+        report = f.read()
+    lines = report.splitlines()
+    assert lines[0].startswith("Всего выделено:")
+    assert 1 < len(lines) <= 6
+    assert "test_profiling.py" in report
+    assert report in profiler.summary()
+    assert len(blocks) == 256
+
+
+def test_wrap_profiles_every_call(tmp_path):
+    profiler = _profiler('cpu', tmp_path)
+    busy = profiler.wrap(_busy_work)
+
+    assert busy() == _busy_work()
+    busy()
+    assert len(profiler.reports) == 2
+
+
+def test_empty_profile_and_unknown_mode(tmp_path):
+    assert _profiler('cpu', tmp_path).summary().startswith("Профиль пуст")
+    with pytest.raises(ValueError):
+        Profiler('io', "test")
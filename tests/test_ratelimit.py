@@ -0,0 +1,129 @@
+import calendar
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from valutatrade_hub.parser_service import ratelimit
+from valutatrade_hub.parser_service.ratelimit import RateLimiter, RateLimitExceeded
+
+
+class FakeClock:
+    """Замена модуля time в ratelimit: время идёт только через sleep и advance"""
+
+    strftime = staticmethod(time.strftime)
+    gmtime = staticmethod(time.gmtime)
+
+    def __init__(self, now: float):
+        self.now = now
+        self.slept = []
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock(calendar.timegm((2026, 1, 31, 23, 0, 0)))
+    monkeypatch.setattr(ratelimit, 'time', fake)
+    return fake
+
+
+def _limiter(config, **limits) -> RateLimiter:
+    config.PROVIDER_RATE_LIMITS = {"P": limits}
+    return RateLimiter(config)
+
+
+def test_per_minute_waits_for_next_token(parser_config, clock):
+    parser_config.RATE_LIMIT_MAX_WAIT_SECONDS = 30.0
+    limiter = _limiter(parser_config, per_minute=3)
+    for _ in range(3):
+        limiter.acquire("P")
+    assert clock.slept == []
+
+    limiter.acquire("P")
+    assert clock.slept == [pytest.approx(20.0)]
+
+
+def test_per_minute_rejects_wait_longer_than_max(parser_config, clock):
+    parser_config.RATE_LIMIT_MAX_WAIT_SECONDS = 5.0
+    limiter = _limiter(parser_config, per_minute=3)
+    for _ in range(3):
+        limiter.acquire("P")
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire("P")
+
+    clock.advance(20.0)
+    limiter.acquire("P")
+    assert clock.slept == []
+
+
+def test_per_month_resets_in_next_month(parser_config, clock):
+    limiter = _limiter(parser_config, per_month=2)
+    limiter.acquire("P")
+    limiter.acquire("P")
+    with pytest.raises(RateLimitExceeded, match="месячный"):
+        limiter.acquire("P")
+
+    clock.advance(3600)  # 1 февраля UTC
+    limiter.acquire("P")
+
+
+@pytest.mark.parametrize("limits", [{"per_minute": 30}, {}])
+def test_block_after_429(parser_config, clock, limits):
+    limiter = _limiter(parser_config, **limits)
+    limiter.block("P", retry_after=30)
+    with pytest.raises(RateLimitExceeded, match="429|частоту"):
+        limiter.acquire("P")
+
+    clock.advance(31)
+    limiter.acquire("P")
+
+
+def test_block_without_retry_after_uses_default(parser_config, clock):
+    limiter = _limiter(parser_config, per_minute=30)
+    limiter.block("P")
+    clock.advance(ratelimit.DEFAULT_RETRY_AFTER_SECONDS - 1)
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire("P")
+    clock.advance(2)
+    limiter.acquire("P")
+
+
+def test_state_persists_between_instances(parser_config, clock):
+    _limiter(parser_config, per_month=3).acquire("P")
+    _limiter(parser_config, per_month=3).acquire("P")
+    limiter = _limiter(parser_config, per_month=3)
+    limiter.acquire("P")
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire("P")
+
+
+def _spend(config) -> int:
+    limiter = RateLimiter(config)
+    allowed = 0
+    for _ in range(10):
+        try:
+            limiter.acquire("P")
+            allowed += 1
+        except RateLimitExceeded:
+            pass
+    return allowed
+
+
+def test_processes_share_monthly_budget(parser_config):
+    parser_config.PROVIDER_RATE_LIMITS = {"P": {"per_month": 15}}
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=4, mp_context=context) as pool:
+        assert sum(pool.map(_spend, [parser_config] * 4)) == 15
@@ -0,0 +1,61 @@
+import time
+
+from valutatrade_hub.parser_service.alerts import AlertStore
+from valutatrade_hub.parser_service.replay import Replayer, group_ticks, replay_config
+from valutatrade_hub.parser_service.storage import RatesStorage
+
+
+def _history(ticks: int):
+    records = []
+    for minute in range(ticks):
+        timestamp = f"2026-01-01T00:{minute:02d}:00Z"
+        records += [
+            {"id": f"BTC_USD_{minute}", "from_currency": "BTC", "to_currency": "USD",
+             "rate": 60000.0 + 100 * minute, "timestamp": timestamp, "source": "CoinGecko"},
+            {"id": f"EUR_USD_{minute}", "from_currency": "EUR", "to_currency": "USD",
+             "rate": 1.08, "timestamp": timestamp, "source": "ExchangeRate-API"},
+        ]
+    return records
+
+
+def test_group_ticks_by_moment_and_source():
+    ticks = group_ticks(reversed(_history(2)))
+
+    assert [moment.minute for moment, _ in ticks] == [0, 1]
+    assert ticks[1][1] == {"CoinGecko": {"BTC_USD": 60100.0},
+                           "ExchangeRate-API": {"EUR_USD": 1.08}}
+
+
+def test_replay_reports_throughput_and_writes_history(parser_config, tmp_path):
+    AlertStore(parser_config).add_rule("BTC_USD", 'above', 60550.0)
+    config = replay_config(str(tmp_path / "replay"), parser_config)
+
+    report = Replayer(config, group_ticks(_history(20))).run()
+
+    assert (report["ticks"], report["records"], report["alerts"]) == (20, 40, 1)
+    assert report["span_seconds"] == 19 * 60
+    assert report["ticks_per_second"] == report["ticks"] / report["elapsed_seconds"]
+    assert report["records_per_second"] == 2 * report["ticks_per_second"]
+    if report["metrics_enabled"]:
+        assert report["stages"]["total"]["count"] == 20
+        assert report["stages"]["fetch"]["count"] == 40
+
+    storage = RatesStorage(config)
+    history = storage.get_history()
+    assert len(history) == 40
+    assert max(record['timestamp'] for record in history) == "2026-01-01T00:19:00Z"
+    assert storage.load_rates()["BTC_USD"]["rate"] == 61900.0
+    # Оповещения и кэш живой конфигурации не затронуты
+    assert not AlertStore(parser_config).recent_notifications()
+
+
+def test_replay_speed_paces_ticks(parser_config, tmp_path):
+    config = replay_config(str(tmp_path / "replay"), parser_config)
+    # 3 минуты истории в 900 раз быстрее — не меньше 0.2 с
+    replayer = Replayer(config, group_ticks(_history(4)), speed=900)
+
+    started = time.perf_counter()
+    report = replayer.run()
+
+    assert report["ticks"] == 4
+    assert time.perf_counter() - started >= 180 / 900
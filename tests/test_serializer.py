@@ -0,0 +1,29 @@
+import threading
+
+import pytest
+
+from valutatrade_hub.infra.serializer import JsonSerializer
+
+
+@pytest.mark.parametrize("name", ["rates.json", "segment.json.gz"])
+def test_concurrent_dump_file_from_threads(tmp_path, name):
+    serializer = JsonSerializer('json', pretty=False)
+    path = str(tmp_path / name)
+    errors = []
+
+    def write(worker: int) -> None:
+        try:
+            for step in range(50):
+                serializer.dump_file({"worker": worker, "step": step}, path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert serializer.load_file(path)["step"] == 49
+    assert [p.name for p in tmp_path.iterdir()] == [name]
@@ -0,0 +1,44 @@
+import threading
+
+import pytest
+
+from valutatrade_hub.infra.session import SECRET_ENV_VAR, SessionStore
+
+
+@pytest.fixture
+def store(data_dir, monkeypatch):
+    monkeypatch.delenv(SECRET_ENV_VAR, raising=False)
+    return SessionStore(str(data_dir / "session.json"))
+
+
+def test_loser_of_create_race_uses_winner_secret(store, data_dir, monkeypatch):
+    read_secret = SessionStore._read_secret
+    checked = []
+
+    def racing_read(self):
+        # Файла ещё нет при первой проверке, но другой процесс создаёт его раньше нас
+        if not checked:
+            checked.append(True)
+            (data_dir / ".session_secret").write_text("winner", encoding='utf-8')
+            return None
+        return read_secret(self)
+
+    monkeypatch.setattr(SessionStore, '_read_secret', racing_read)
+    assert store._get_secret() == b"winner"
+
+
+def test_waits_for_secret_being_written(store, data_dir):
+    path = data_dir / ".session_secret"
+    path.write_text("", encoding='utf-8')
+    timer = threading.Timer(0.05, path.write_text, ("abc123",), {"encoding": "utf-8"})
+    timer.start()
+    try:
+        assert store._get_secret() == b"abc123"
+    finally:
+        timer.join()
+
+
+def test_secret_created_once(store, data_dir):
+    secret = store._get_secret()
+    assert (data_dir / ".session_secret").read_text(encoding='utf-8').encode() == secret
+    assert SessionStore(str(data_dir / "session.json"))._get_secret() == secret
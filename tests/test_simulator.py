@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from benchmarks.simulator import FIXTURES_DIR, Profile, ProviderSimulator, sample_latency
+from valutatrade_hub.parser_service.api_clients import (
+    ApiRequestError,
+    CoinGeckoClient,
+    ExchangeRateApiClient,
+)
+
+
+@pytest.mark.parametrize("latency, low, high", [
+    (("fixed", 0.25), 0.25, 0.25),
+    (("uniform", 0.1, 0.2), 0.1, 0.2),
+    (("lognormal", 0.0, 1.0), 0.0, 0.0),
+])
+def test_sample_latency_bounds(latency, low, high):
+    rng = random.Random(1)
+    assert all(low <= sample_latency(rng, latency) <= high for _ in range(100))
+
+
+def test_sample_latency_lognormal_median():
+    rng = random.Random(1)
+    samples = sorted(sample_latency(rng, ("lognormal", 0.1, 0.5)) for _ in range(2001))
+    assert samples[1000] == pytest.approx(0.1, rel=0.1)
+    with pytest.raises(ValueError):
+        sample_latency(rng, ("pareto", 1.0))
+
+
+def test_outcome_shares_follow_profile():
+    profile = Profile(timeout_rate=0.1, rate_limit_rate=0.2, malformed_rate=0.3,
+                      hang_seconds=2.5)
+    with ProviderSimulator(profile, seed=7) as simulator:
+        outcomes = [simulator.outcome() for _ in range(5000)]
+
+    shares = {name: count / 5000 for name, count in simulator.stats.items()}
+    assert shares == pytest.approx(
+        {"timeout": 0.1, "rate_limited": 0.2, "malformed": 0.3, "ok": 0.4}, abs=0.03
+    )
+    assert all(delay == 2.5 for name, delay in outcomes if name == "timeout")
+
+
+def _simulated(profile: Profile, config, fixtures=None) -> ProviderSimulator:
+    simulator = ProviderSimulator(profile, fixtures).start()
+    simulator.configure(config)
+    return simulator
+
+
+def test_fixture_responses_reach_clients(parser_config):
+    with _simulated(Profile(), parser_config, FIXTURES_DIR) as simulator:
+        crypto = CoinGeckoClient(parser_config).fetch_rates()
+        fiat = ExchangeRateApiClient(parser_config).fetch_rates()
+
+    assert crypto["BTC_USD"] == 67012.0
+    # Фиатная пара хранит цену EUR в USD, а API отдаёт EUR за 1 USD
+    assert fiat["EUR_USD"] == pytest.approx(1 / 0.9259)
+    assert simulator.stats == {"ok": simulator.stats["ok"]}
+
+
+@pytest.mark.parametrize("profile", [
+    Profile(rate_limit_rate=1.0),
+    Profile(malformed_rate=1.0),
+    Profile(timeout_rate=1.0, hang_seconds=0.5, client_timeout=0.1),
+], ids=["rate-limited", "malformed", "timeouts"])
+def test_fault_profiles_surface_as_request_errors(parser_config, profile):
+    with _simulated(profile, parser_config, FIXTURES_DIR) as simulator:
+        client = ExchangeRateApiClient(parser_config)
+        with pytest.raises(ApiRequestError):
+            client.fetch_rates()
+
+    assert simulator.stats["ok"] == 0
+    assert sum(simulator.stats.values()) >= 1
+
+
+def test_rate_limited_response_blocks_provider(parser_config):
+    profile = Profile(rate_limit_rate=1.0, retry_after=30)
+    with _simulated(profile, parser_config) as simulator:
+        client = ExchangeRateApiClient(parser_config)
+        with pytest.raises(ApiRequestError):
+            client.fetch_rates()
+        # Повторный запрос не уходит к имитатору, пока не истёк Retry-After
+        with pytest.raises(ApiRequestError, match="повтор через"):
+            client.fetch_rates()
+
+    assert simulator.stats == {"rate_limited": 1}
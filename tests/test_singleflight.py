@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from valutatrade_hub.infra.filelock import FileLock
+from valutatrade_hub.infra.singleflight import SingleFlight
+from valutatrade_hub.parser_service.api_clients import BaseApiClient
+from valutatrade_hub.parser_service.storage import RatesStorage
+from valutatrade_hub.parser_service.updater import RatesUpdater
+
+
+def _flight(tmp_path, timeout=5.0) -> SingleFlight:
+    return SingleFlight("test", str(tmp_path / "call.lock"), str(tmp_path / "call.json"),
+                        timeout)
+
+
+def _concurrently(*targets):
+    """Запускает targets в потоках одновременно и возвращает их результаты"""
+    barrier = threading.Barrier(len(targets))
+    results = [None] * len(targets)
+
+    def run(i, target):
+        barrier.wait()
+        results[i] = target()
+
+    threads = [threading.Thread(target=run, args=(i, t)) for i, t in enumerate(targets)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class SlowCall:
+    def __init__(self, seconds=0.3, fail=False):
+        self.seconds = seconds
+        self.fail = fail
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.seconds)
+        if self.fail and self.calls == 1:
+            raise RuntimeError("провайдер недоступен")
+        return {"call": self.calls}
+
+
+def test_concurrent_callers_share_one_call(tmp_path):
+    call = SlowCall()
+    results = _concurrently(*[lambda: _flight(tmp_path).run(["a"], call)] * 4)
+
+    assert call.calls == 1
+    assert [result for result, _ in results] == [{"call": 1}] * 4
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+
+
+def test_wider_key_is_not_covered(tmp_path):
+    call = SlowCall()
+
+    def follower():
+        time.sleep(0.05)
+        return _flight(tmp_path).run(["a", "b"], call)
+
+    results = _concurrently(lambda: _flight(tmp_path).run(["a"], call), follower)
+    assert call.calls == 2
+    assert [shared for _, shared in results] == [False, False]
+
+
+def test_follower_runs_itself_after_leader_failure(tmp_path):
+    call = SlowCall(fail=True)
+
+    def leader():
+        with pytest.raises(RuntimeError):
+            _flight(tmp_path).run(["a"], call)
+
+    def follower():
+        time.sleep(0.05)
+        return _flight(tmp_path).run(["a"], call)
+
+    _, result = _concurrently(leader, follower)
+    assert result == ({"call": 2}, False)
+
+
+def test_wait_timeout(tmp_path):
+    with FileLock(str(tmp_path / "call.lock")):
+        with pytest.raises(TimeoutError):
+            _flight(tmp_path, timeout=0.1).run(["a"], SlowCall())
+
+
+class CountingClient(BaseApiClient):
+    def __init__(self, config):
+        super().__init__(config)
+        self.calls = 0
+
+    def fetch_rates(self):
+        self.calls += 1
+        time.sleep(0.3)
+        return {"BTC_USD": 60000.0}
+
+
+def test_concurrent_run_update_fetches_once(parser_config):
+    client = CountingClient(parser_config)
+
+    def update():
+        return RatesUpdater(parser_config, {"CoinGecko": client},
+                            RatesStorage(parser_config)).run_update()
+
+    results = _concurrently(*[update] * 3)
+    assert client.calls == 1
+    assert {result['timestamp'] for result in results} == {results[0]['timestamp']}
+    assert sorted(result['shared'] for result in results) == [False, True, True]
+    assert all(result['rates_count'] == 1 for result in results)
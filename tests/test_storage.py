@@ -0,0 +1,231 @@
+import json
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from valutatrade_hub.core.valuation import value_series
+from valutatrade_hub.parser_service.storage import RatesStorage
+
+LEGACY = [
+    {"id": f"BTC_USD_{hour}", "from_currency": "BTC", "to_currency": "USD",
+     "rate": 60000.0 + hour, "timestamp": f"2026-01-01T{hour:02d}:00:00Z", "source": "CoinGecko"}
+    for hour in range(24)
+]
+
+
+def _write_legacy(config) -> None:
+    with open(config.HISTORY_FILE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(LEGACY, f)
+
+
+def test_read_does_not_migrate(parser_config, tmp_path):
+    _write_legacy(parser_config)
+    storage = RatesStorage(parser_config)
+
+    assert storage.get_history() == LEGACY
+    assert (tmp_path / "exchange_rates.json").exists()
+    assert not (tmp_path / "exchange_rates_segments").exists()
+
+
+def test_migration_runs_once_and_keeps_file(parser_config, tmp_path):
+    _write_legacy(parser_config)
+
+    assert RatesStorage(parser_config).migrate_legacy_history()
+    assert not RatesStorage(parser_config).migrate_legacy_history()
+    assert (tmp_path / "exchange_rates.json").exists()
+    assert RatesStorage(parser_config).get_history() == LEGACY
+
+
+def test_write_migrates_before_append(parser_config):
+    _write_legacy(parser_config)
+    storage = RatesStorage(parser_config)
+    tick = dict(LEGACY[-1], id="BTC_USD_next", timestamp="2026-01-02T00:00:00Z")
+
+    storage.save_history_records([tick])
+    assert storage.get_history() == LEGACY + [tick]
+
+
+def _migrate(config) -> bool:
+    return RatesStorage(config).migrate_legacy_history()
+
+
+def test_concurrent_migration_does_not_duplicate(parser_config):
+    _write_legacy(parser_config)
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(_migrate, [parser_config] * 8))
+
+    assert results.count(True) == 1
+    assert RatesStorage(parser_config).get_history() == LEGACY
+
+
+def _tick(pair: str, day: int, hour: int, rate: float):
+    code, _, quote = pair.partition("_")
+    return {"id": f"{pair}_{day}_{hour}", "from_currency": code, "to_currency": quote,
+            "rate": rate, "timestamp": f"2026-03-{day:02d}T{hour:02d}:00:00Z",
+            "source": "CoinGecko"}
+
+
+def _daily_history(config):
+    storage = RatesStorage(config)
+    # BTC тикает каждый день, ETH — только в первые два дня
+    for day in range(1, 11):
+        ticks = [_tick("BTC_USD", day, hour, 1000.0 * day + hour) for hour in (0, 12)]
+        if day <= 2:
+            ticks.append(_tick("ETH_USD", day, 6, 100.0 * day))
+        storage.save_history_records(ticks)
+    return storage
+
+
+def test_latest_before_reads_only_recent_segments(parser_config, monkeypatch):
+    storage = _daily_history(parser_config)
+    loaded = []
+    original = storage.segments._load_segment
+    monkeypatch.setattr(storage.segments, "_load_segment",
+                        lambda entry: loaded.append(entry['file']) or original(entry))
+
+    seeds = storage.latest_before(datetime(2026, 3, 9, 12), ["BTC_USD"])
+    assert [(r['timestamp'], r['rate']) for r in seeds] == [("2026-03-09T00:00:00Z", 9000.0)]
+    assert len(loaded) == 1
+
+    seeds = storage.latest_before(datetime(2026, 3, 9), ["BTC_USD", "ETH_USD", "SOL_USD"])
+    assert sorted((r['id'], r['rate']) for r in seeds) == [
+        ("BTC_USD_8_12", 8012.0), ("ETH_USD_2_6", 200.0)
+    ]
+
+
+def test_seeded_window_matches_full_history(parser_config):
+    storage = _daily_history(parser_config)
+    wallets = {"BTC": 0.5, "ETH": 2.0, "USD": 10.0}
+    pairs = {"BTC_USD", "ETH_USD"}
+    start, end = datetime(2026, 3, 5, 6), datetime(2026, 3, 8)
+
+    full = value_series(wallets, storage.get_history(end=end, pairs=pairs),
+                        "USD", "USD", start, end, 3600)
+    seeded = value_series(
+        wallets,
+        storage.latest_before(start, pairs) + storage.get_history(start=start, end=end,
+                                                                   pairs=pairs),
+        "USD", "USD", start, end, 3600
+    )
+    assert seeded == full
+
+
+def _append_ticks(args) -> None:
+    config, worker = args
+    storage = RatesStorage(config)
+    for hour in range(12):
+        # Каждый процесс пишет в два дня, чтобы задевать и закрытие сегментов
+        storage.save_history_records([_tick("BTC_USD", 1 + hour % 2, hour, worker * 100.0 + hour)])
+
+
+def _compact(config) -> None:
+    storage = RatesStorage(config)
+    for _ in range(12):
+        storage.compact_history(now=datetime(2026, 3, 2, 12))
+
+
+def test_concurrent_writers_keep_every_manifest_entry(parser_config):
+    with ProcessPoolExecutor(max_workers=5) as pool:
+        compaction = pool.submit(_compact, parser_config)
+        list(pool.map(_append_ticks, [(parser_config, worker) for worker in range(4)]))
+        compaction.result()
+
+    storage = RatesStorage(parser_config)
+    assert storage.segments.count() == 48
+    assert len(storage.get_history()) == 48
+
+
+def _fiat_tick(rate: float, timestamp: str = "2026-03-01T00:00:00Z"):
+    return {"id": f"EUR_USD_{timestamp}", "from_currency": "EUR", "to_currency": "USD",
+            "rate": rate, "timestamp": timestamp, "source": "ExchangeRate-API"}
+
+
+def _old_fiat_store(config) -> None:
+    """Тики, свеча и кэш в старом направлении: единиц EUR за 1 USD"""
+    RatesStorage(config).segments.extend([_fiat_tick(0.8), _tick("BTC_USD", 1, 0, 60000.0)])
+    candle = dict(_fiat_tick(0.85, "2026-02-01T00:00:00Z"), resolution="1h",
+                  open=0.8, high=0.9, low=0.75, close=0.85, count=4)
+    with open(config.HISTORY_HOURLY_FILE_PATH, 'w', encoding='utf-8') as f:
+        json.dump([candle], f)
+    with open(config.RATES_FILE_PATH, 'w', encoding='utf-8') as f:
+        json.dump({
+            "pairs": {
+                "EUR_USD": {"rate": 0.8, "source": "ExchangeRate-API"},
+                "BTC_USD": {"rate": 60000.0, "source": "CoinGecko"},
+            },
+            "version": 3,
+        }, f)
+
+
+def test_fiat_migration_inverts_stored_quotes_once(parser_config):
+    _old_fiat_store(parser_config)
+    storage = RatesStorage(parser_config)
+
+    assert storage.migrate_fiat_direction()
+    assert not storage.migrate_fiat_direction()
+
+    rates = {(r['id'], r['rate']) for r in storage.segments.read()}
+    assert rates == {("EUR_USD_2026-03-01T00:00:00Z", 1.25), ("BTC_USD_1_0", 60000.0)}
+    [candle] = storage.get_history(end=datetime(2026, 2, 2))
+    assert (candle['open'], candle['high'], candle['low'], candle['close']) == (
+        1.25, 1 / 0.75, 1 / 0.9, 1 / 0.85
+    )
+    assert candle['rate'] == 1 / 0.85
+    assert storage.load_rates()["EUR_USD"]["rate"] == 1.25
+    assert storage.load_rates()["BTC_USD"]["rate"] == 60000.0
+    assert storage.rates_version() == 4
+
+
+def test_writes_after_fiat_migration_are_kept_as_is(parser_config):
+    _old_fiat_store(parser_config)
+    storage = RatesStorage(parser_config)
+
+    storage.save_history_records([_fiat_tick(1.1, "2026-03-01T01:00:00Z")])
+    storage.save_rates({"EUR_USD": {"rate": 1.1, "source": "ExchangeRate-API"}})
+
+    assert [r['rate'] for r in storage.segments.read(pairs={"EUR_USD"})] == [1.25, 1.1]
+    assert storage.load_rates()["EUR_USD"]["rate"] == 1.1
+    assert not storage.migrate_fiat_direction()
+
+
+def _migrate_fiat(config) -> bool:
+    return RatesStorage(config).migrate_fiat_direction()
+
+
+def test_concurrent_fiat_migration_inverts_once(parser_config):
+    _old_fiat_store(parser_config)
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(_migrate_fiat, [parser_config] * 8))
+
+    assert results.count(True) == 1
+    storage = RatesStorage(parser_config)
+    assert [r['rate'] for r in storage.segments.read(pairs={"EUR_USD"})] == [1.25]
+    assert storage.load_rates()["EUR_USD"]["rate"] == 1.25
+
+
+def test_save_rates_keeps_vectors_of_skipped_providers(parser_config, tmp_path):
+    storage = RatesStorage(parser_config)
+    usd = {"base": "USD", "codes": ["EUR", "JPY"], "rates": [0.9, 150.0]}
+    eur = {"base": "EUR", "codes": ["USD"], "rates": [1.1]}
+
+    storage.save_rates({}, {"USD": usd})
+    # Обновление только CoinGecko векторов не возвращает
+    storage.save_rates({"BTC_USD": {"rate": 60000.0, "source": "CoinGecko"}})
+    assert json.loads((tmp_path / "rates.json").read_text())["matrices"] == {"USD": usd}
+
+    storage.save_rates({}, {"EUR": eur})
+    data = json.loads((tmp_path / "rates.json").read_text())
+    assert data["matrices"] == {"USD": usd, "EUR": eur}
+    assert data["version"] == 3
+
+
+def _save_snapshots(config) -> None:
+    storage = RatesStorage(config)
+    for _ in range(10):
+        storage.save_rates({"BTC_USD": {"rate": 60000.0, "source": "CoinGecko"}})
+
+
+def test_concurrent_saves_bump_version_once_each(parser_config):
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_save_snapshots, [parser_config] * 4))
+
+    assert RatesStorage(parser_config).rates_version() == 40
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from valutatrade_hub.core.currencies import CurrencyNotFoundError
+from valutatrade_hub.core.usecases import PortfolioUseCase, RateUseCase
+
+
+class FakeRevalidator:
+    """Записывает вызовы; обновление с ожиданием сохраняет rates"""
+
+    def __init__(self, path, rates):
+        self.path = path
+        self.rates = rates
+        self.calls = []
+
+    def refresh_blocking(self):
+        self.calls.append('blocking')
+        self.path.write_text(json.dumps(self.rates), encoding='utf-8')
+
+    def refresh_in_background(self):
+        self.calls.append('background')
+
+
+@pytest.fixture
+def revalidator(data_dir, monkeypatch):
+    rates = {"pairs": {"BTC_USD": {"rate": 70000.0, "updated_at": "2026-01-01T00:00:00Z"}}}
+    fake = FakeRevalidator(data_dir / "rates.json", rates)
+    monkeypatch.setattr(RateUseCase, 'revalidator', fake)
+    return fake
+
+
+def test_unknown_currency_does_not_refresh(revalidator):
+    with pytest.raises(CurrencyNotFoundError):
+        RateUseCase.get_rate('NOPE', 'USD')
+    with pytest.raises(CurrencyNotFoundError):
+        RateUseCase.get_rate('USD', 'NOPE')
+    assert revalidator.calls == []
+
+
+def test_rates_reloaded_after_blocking_refresh(revalidator):
+    result = RateUseCase.get_rate('BTC', 'USD')
+    assert revalidator.calls == ['blocking']
+    assert result['rate'] == 70000.0
+    assert result['stale'] is False
+
+
+def _write_rates(data_dir, rate, version):
+    rates = {"pairs": {"BTC_USD": {"rate": rate, "updated_at": "2026-01-01T00:00:00Z"}},
+             "version": version}
+    (data_dir / "rates.json").write_text(json.dumps(rates), encoding='utf-8')
+
+
+@pytest.fixture
+def portfolio(data_dir):
+    _write_rates(data_dir, 100.0, 1)
+    portfolios = [{"user_id": 1, "wallets": {"BTC": 2.0}}, {"user_id": 2, "wallets": {}}]
+    (data_dir / "portfolios.json").write_text(json.dumps(portfolios), encoding='utf-8')
+    return data_dir / "portfolios.json"
+
+
+def _stored(path):
+    return json.loads(path.read_text(encoding='utf-8'))[0].get('valuations')
+
+
+def test_valuation_stored_on_portfolio_and_read_without_writes(portfolio, data_dir):
+    first = PortfolioUseCase.get_valuation(1, 'USD')
+    assert (first['total'], first['cached']) == (200.0, False)
+    assert _stored(portfolio)['bases']['USD']['total'] == 200.0
+    assert not (data_dir / "valuations").exists()
+
+    stat = portfolio.stat()
+    content = portfolio.read_bytes()
+    for _ in range(3):
+        again = PortfolioUseCase.get_valuation(1, 'USD')
+        assert (again['total'], again['cached']) == (200.0, True)
+    assert portfolio.read_bytes() == content
+    assert portfolio.stat().st_mtime_ns == stat.st_mtime_ns
+
+
+def test_trade_revalues_stored_valuation(portfolio):
+    PortfolioUseCase.get_valuation(1, 'USD')
+    PortfolioUseCase.buy_currency(1, 'BTC', 1.0)
+    assert _stored(portfolio)['bases']['USD']['total'] == 300.0
+
+    valuation = PortfolioUseCase.get_valuation(1, 'USD')
+    assert (valuation['total'], valuation['cached']) == (300.0, True)
+
+
+def test_prewarm_after_rates_update(portfolio, data_dir):
+    PortfolioUseCase.get_valuation(1, 'USD')
+    _write_rates(data_dir, 150.0, 2)
+
+    assert PortfolioUseCase.prewarm_valuations(3600) == 1
+    assert PortfolioUseCase.prewarm_valuations(3600) == 0
+    valuation = PortfolioUseCase.get_valuation(1, 'USD')
+    assert (valuation['total'], valuation['cached']) == (300.0, True)
+
+
+def test_prewarm_skips_inactive_users(portfolio, data_dir):
+    PortfolioUseCase.get_valuation(1, 'USD')
+    _write_rates(data_dir, 150.0, 2)
+    assert PortfolioUseCase.prewarm_valuations(-1) == 0
@@ -0,0 +1,56 @@
+import threading
+import time
+
+import pytest
+
+from valutatrade_hub.infra import watcher as watcher_module
+from valutatrade_hub.infra.watcher import FileWatcher, file_stamp
+
+
+@pytest.fixture
+def polling(monkeypatch):
+    """FileWatcher без inotify — опрос mtime, как без inotify_simple"""
+    monkeypatch.setattr(watcher_module, "inotify_simple", None)
+
+
+def _write_later(path, text: str, delay: float = 0.05) -> threading.Thread:
+    def write():
+        time.sleep(delay)
+        path.write_text(text, encoding='utf-8')
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    return thread
+
+
+def test_polling_wait_returns_on_change(polling, tmp_path):
+    path = tmp_path / "rates.json"
+    path.write_text("{}", encoding='utf-8')
+
+    with FileWatcher(str(path), poll_interval=0.01) as watcher:
+        assert watcher.backend == 'poll'
+        writer = _write_later(path, '{"pairs": {}}')
+        stamp = watcher.wait()
+        writer.join()
+
+    assert stamp == file_stamp(str(path))
+
+
+def test_polling_sees_file_created_after_start(polling, tmp_path):
+    path = tmp_path / "rates.json"
+
+    with FileWatcher(str(path), poll_interval=0.01) as watcher:
+        assert watcher.stamp is None
+        writer = _write_later(path, "{}")
+        assert watcher.wait() is not None
+        writer.join()
+
+
+def test_change_before_first_wait_is_not_lost(polling, tmp_path):
+    path = tmp_path / "rates.json"
+    path.write_text("{}", encoding='utf-8')
+
+    with FileWatcher(str(path), poll_interval=0.01) as watcher:
+        # Запись между созданием наблюдателя и первым wait()
+        path.write_text('{"pairs": {}}', encoding='utf-8')
+        assert watcher.wait() == file_stamp(str(path))
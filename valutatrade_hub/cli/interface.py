@@ -1,38 +1,71 @@
 import argparse
+import datetime
+import math
 from typing import Optional
 import os
-import json
+import shlex
+import sys
 
+from prettytable import PrettyTable
+
+from valutatrade_hub.core.aum import aum_report, snapshot_prices
+from valutatrade_hub.core.currencies import CURRENCY_REGISTRY, get_currency
 from valutatrade_hub.core.exceptions import (
     ApiRequestError,
     CurrencyNotFoundError,
     InsufficientFundsError,
 )
+from valutatrade_hub.core.matrix import RateMatrix
 from valutatrade_hub.core.models import User
 from valutatrade_hub.core.usecases import PortfolioUseCase, RateUseCase, UserUseCase
+from valutatrade_hub.core.valuation import parse_interval, value_series
 from valutatrade_hub.infra.database import DatabaseManager
-from valutatrade_hub.parser_service.api_clients import (
-    ApiRequestError as ParserApiRequestError,
+from valutatrade_hub.infra.session import SessionStore
+from valutatrade_hub.infra.settings import SettingsLoader
+from valutatrade_hub.infra.watcher import FileWatcher
+from valutatrade_hub.logging_config import setup_logging
+from valutatrade_hub.metrics import (
+    MetricsRegistry,
+    histogram_from_dict,
+    split_key,
+    to_prometheus,
 )
+from valutatrade_hub.parser_service.alerts import AlertStore
 from valutatrade_hub.parser_service.api_clients import (
-    CoinGeckoClient,
-    ExchangeRateApiClient,
+    ApiRequestError as ParserApiRequestError,
 )
 from valutatrade_hub.parser_service.config import ParserConfig
+from valutatrade_hub.parser_service.hedging import build_clients
+from valutatrade_hub.parser_service.pairs import CRYPTO, PairIndex
+from valutatrade_hub.parser_service.revalidate import RatesRevalidator
+from valutatrade_hub.parser_service.replay import Replayer, group_ticks, replay_config
 from valutatrade_hub.parser_service.storage import RatesStorage
+from valutatrade_hub.parser_service.universe import refresh_currency_universe
 from valutatrade_hub.parser_service.updater import RatesUpdater
+from valutatrade_hub.profiling import PROFILE_MODES, Profiler
+
+
+# Ограничение на число точек в portfolio-history
+MAX_HISTORY_POINTS = 10000
 
 
 class CLIInterface:
     def __init__(self):
         self.current_user: Optional[User] = None
         self.session_file = "data/session.json"
+        self._session_store = SessionStore(self.session_file)
+        self._session_stamp = None
+        self._in_shell = False
+        self._storage: Optional[RatesStorage] = None
         self._load_session()
         self.parser = argparse.ArgumentParser(
             prog='ValutaTrade Hub',
             description=('Платформа для управления виртуальным '
                          'портфелем фиатных и криптовалют')
         )
+        self.parser.add_argument('--profile', choices=PROFILE_MODES,
+            help=('Профилировать команду: --profile[=cpu|mem], '
+                  'cProfile или tracemalloc; отчёты пишутся в log_path'))
         self.subparsers = self.parser.add_subparsers(
             dest='command',
             help='Доступные команды'
@@ -42,60 +75,46 @@ class CLIInterface:
         так как консольное приложение завершалось
         после каждой команды'''
     def _load_session(self):
-        """Загружает текущую сессию из файла."""
-        if os.path.exists(self.session_file):
-            try:
-                with open(self.session_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-
-                user_id = data.get("user_id")
-
-                if user_id:
-                    db = DatabaseManager()
-                    users = db.load_data("users.json")
-
-                    user_data = next(
-                        (u for u in users if u["user_id"] == user_id),
-                        None
-                    )
-
-                    if user_data:
-                        from valutatrade_hub.core.models import User
+        """Загружает текущую сессию из подписанного файла без чтения users.json."""
+        self._session_stamp = self._file_stamp(self.session_file)
+        try:
+            record = self._session_store.load()
+        except Exception:
+            record = None
 
-                        self.current_user = User(
-                            user_data["user_id"],
-                            user_data["username"],
-                            "",
-                            user_data["registration_date"]
-                        )
+        if record:
+            self.current_user = User.from_record(record)
 
-                        self.current_user._salt = user_data["salt"]
-                        self.current_user._hashed_password = user_data["hashed_password"]
-            except Exception:
-                pass
-            
     def _save_session(self):
         """Сохраняет текущую сессию."""
         if not self.current_user:
             return
 
         try:
-            os.makedirs("data", exist_ok=True)
-
-            with open(self.session_file, "w", encoding="utf-8") as f:
-                json.dump(
-                    {"user_id": self.current_user.user_id},
-                    f,
-                    indent=2
-                )
-
+            self._session_store.save(self.current_user)
+            self._session_stamp = self._file_stamp(self.session_file)
         except Exception:
             pass
 
     def _clear_session(self):
         """Удаляет файл сессии."""
-        if os.path.exists(self.session_file):
-            os.remove(self.session_file)
+        self._session_store.clear()
+        self._session_stamp = None
+
+    def _refresh_session(self):
+        """Перечитывает сессию, если файл изменён другим процессом."""
+        if self._file_stamp(self.session_file) != self._session_stamp:
+            self.current_user = None
+            self._load_session()
+
+    @staticmethod
+    def _file_stamp(path: str):
+        """Отпечаток файла (mtime и размер) или None, если файла нет."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
 
     def _setup_commands(self):
         register_parser = self.subparsers.add_parser('register',
@@ -117,6 +136,26 @@ class CLIInterface:
         portfolio_parser.add_argument('--base', default='USD',
             help='Базовая валюта (по умолчанию USD)')
 
+        portfolio_history_parser = self.subparsers.add_parser('portfolio-history',
+            help='Стоимость портфеля во времени по истории курсов')
+        portfolio_history_parser.add_argument('--base', default='USD',
+            help='Базовая валюта (по умолчанию USD)')
+        portfolio_history_parser.add_argument('--from', dest='date_from',
+            help='Начало периода, ISO-дата UTC (по умолчанию 30 дней назад)')
+        portfolio_history_parser.add_argument('--to', dest='date_to',
+            help='Конец периода, ISO-дата UTC (по умолчанию сейчас)')
+        portfolio_history_parser.add_argument('--interval', default='1d',
+            help='Шаг ряда: 15m, 1h, 1d, 1w (по умолчанию 1d)')
+
+        aum_parser = self.subparsers.add_parser('aum-report',
+            help='Активы под управлением по всем портфелям (для администратора)')
+        aum_parser.add_argument('--base', default='USD',
+            help='Валюта оценки (по умолчанию USD)')
+        aum_parser.add_argument('--top', type=int, default=10,
+            help='Сколько крупнейших держателей показать (по умолчанию 10)')
+        aum_parser.add_argument('--workers', type=int, default=1,
+            help='Процессов для разбора portfolios.json (по умолчанию 1)')
+
         buy_parser = self.subparsers.add_parser('buy',
             help='Купить валюту')
         buy_parser.add_argument('--currency', required=True,
@@ -144,6 +183,23 @@ class CLIInterface:
             choices=['coingecko', 'exchangerate'],
             help='Источник данных')
 
+        currencies_parser = self.subparsers.add_parser('update-currencies',
+            help='Загрузить список криптовалют из CoinGecko в файл валют')
+        currencies_parser.add_argument('--limit', type=int,
+            help='Сколько монет по капитализации загрузить (по умолчанию 250)')
+
+        replay_parser = self.subparsers.add_parser('replay',
+            help='Прогнать историю курсов через конвейер обновления (бэктест)')
+        replay_parser.add_argument('--from', dest='date_from',
+            help='Начало периода, ISO-дата UTC (по умолчанию вся история)')
+        replay_parser.add_argument('--to', dest='date_to',
+            help='Конец периода, ISO-дата UTC')
+        replay_parser.add_argument('--speed', type=float,
+            help='Во сколько раз быстрее реального времени (по умолчанию без пауз)')
+        replay_parser.add_argument('--output',
+            help='Каталог для кэша, истории и журнала оповещений воспроизведения '
+                 '(по умолчанию data/replay-<время>)')
+
         show_rates_parser = self.subparsers.add_parser('show-rates',
             help='Показать актуальные курсы')
         show_rates_parser.add_argument('--currency',
@@ -152,13 +208,54 @@ class CLIInterface:
             help='Показать N самых дорогих криптовалют')
         show_rates_parser.add_argument('--base', default='USD',
             help='Базовая валюта (по умолчанию USD)')
+        show_rates_parser.add_argument('--watch', action='store_true',
+            help='Следить за изменениями курсов и выводить только изменившиеся пары')
+        show_rates_parser.add_argument('--interval', type=float, default=1.0,
+            help='Период опроса файла в секундах, если inotify недоступен')
+        alert_add_parser = self.subparsers.add_parser('alert-add',
+            help='Добавить оповещение о курсе')
+        alert_add_parser.add_argument('--pair', required=True,
+            help='Пара, например BTC_USD')
+        alert_condition = alert_add_parser.add_mutually_exclusive_group(required=True)
+        alert_condition.add_argument('--above', type=float,
+            help='Курс поднялся до порога или выше')
+        alert_condition.add_argument('--below', type=float,
+            help='Курс опустился до порога или ниже')
+        alert_condition.add_argument('--cross', type=float,
+            help='Курс пересёк порог в любую сторону')
+        alert_condition.add_argument('--change', type=float,
+            help='Курс изменился больше чем на N%% за окно --window')
+        alert_add_parser.add_argument('--window', default='1h',
+            help='Окно для --change: 15m, 1h, 1d (по умолчанию 1h)')
+
+        alert_remove_parser = self.subparsers.add_parser('alert-remove',
+            help='Удалить оповещение')
+        alert_remove_parser.add_argument('--id', type=int, required=True,
+            help='Номер правила')
+
+        alerts_parser = self.subparsers.add_parser('alerts',
+            help='Показать правила и последние сработавшие оповещения')
+        alerts_parser.add_argument('--limit', type=int, default=20,
+            help='Сколько последних оповещений показать (по умолчанию 20)')
+
         self.subparsers.add_parser(
             "logout",
             help="Выйти из системы"
         )
+        stats_parser = self.subparsers.add_parser('stats',
+            help='Показать метрики производительности')
+        stats_parser.add_argument('--prometheus', action='store_true',
+            help='Вывести метрики в текстовом формате Prometheus')
+        self.subparsers.add_parser(
+            "shell",
+            help="Интерактивный режим (кэши и сессия сохраняются между командами)"
+        )
 
     def run(self, args=None):
         """Запуск CLI"""
+        args = sys.argv[1:] if args is None else list(args)
+        # "--profile" без значения означает профилирование CPU
+        args = ['--profile=cpu' if arg == '--profile' else arg for arg in args]
         parsed_args = self.parser.parse_args(args)
 
         if not parsed_args.command:
@@ -175,6 +272,17 @@ class CLIInterface:
                 parsed_args.password
             ),
             'show-portfolio': lambda: self._show_portfolio(parsed_args.base),
+            'portfolio-history': lambda: self._portfolio_history(
+                parsed_args.base,
+                parsed_args.date_from,
+                parsed_args.date_to,
+                parsed_args.interval
+            ),
+            'aum-report': lambda: self._aum_report(
+                parsed_args.base,
+                parsed_args.top,
+                parsed_args.workers
+            ),
             'buy': lambda: self._buy(parsed_args.currency, parsed_args.amount),
             'sell': lambda: self._sell(parsed_args.currency, parsed_args.amount),
             'get-rate': lambda: self._get_rate(
@@ -182,19 +290,47 @@ class CLIInterface:
                 parsed_args.to_currency
             ),
             'update-rates': lambda: self._update_rates(parsed_args.source),
+            'update-currencies': lambda: self._update_currencies(parsed_args.limit),
+            'replay': lambda: self._replay(
+                parsed_args.date_from,
+                parsed_args.date_to,
+                parsed_args.speed,
+                parsed_args.output
+            ),
             'show-rates': lambda: self._show_rates(
                 parsed_args.currency,
                 parsed_args.top,
-                parsed_args.base
+                parsed_args.base,
+                parsed_args.watch,
+                parsed_args.interval
             ),
+            'alert-add': lambda: self._alert_add(parsed_args),
+            'alert-remove': lambda: self._alert_remove(parsed_args.id),
+            'alerts': lambda: self._alerts(parsed_args.limit),
             "logout": lambda: self._logout(),
+            'stats': lambda: self._stats(parsed_args.prometheus),
+            "shell": lambda: self._shell(),
         }
 
+        handler = command_handlers.get(parsed_args.command)
+        if handler is None:
+            return
+
+        profiler = None
+        if parsed_args.profile:
+            profiler = Profiler(parsed_args.profile, parsed_args.command)
+
         try:
-            if parsed_args.command in command_handlers:
-                command_handlers[parsed_args.command]()
+            if profiler is None:
+                handler()
+            else:
+                with profiler.session():
+                    handler()
         except Exception as e:
             self._handle_exception(e)
+        finally:
+            if profiler is not None:
+                profiler.print_summary()
 
     def _handle_exception(self, e: Exception) -> None:
         """Обработка ошибок CLI"""
@@ -202,8 +338,7 @@ class CLIInterface:
             print(f"Ошибка: {e}")
         elif isinstance(e, CurrencyNotFoundError):
             print(f"Ошибка: {e}")
-            print("Поддерживаемые валюты: USD, EUR, RUB, JPY, GBP, "
-                  "BTC, ETH, ADA, DOT, SOL")
+            print(f"Поддерживаемые валюты: {', '.join(sorted(CURRENCY_REGISTRY))}")
             print("Используйте команду 'get-rate --from <код> --to <код>' "
                   "для проверки поддерживаемых пар.")
         elif isinstance(e, ApiRequestError):
@@ -244,38 +379,239 @@ class CLIInterface:
                 f"Ошибка при входе пользователя: {str(e)}"
             ) from e
 
+    def _stats(self, prometheus: bool = False):
+        """Метрики: задержки операций и счётчики всех процессов"""
+        registry = MetricsRegistry()
+        if not registry.enabled:
+            print("Сбор метрик отключён в настройках (metrics.enabled)")
+            return
+
+        data = registry.persist()
+        if prometheus:
+            print(to_prometheus(data), end='')
+            return
+
+        if not data['histograms'] and not any(data['counters'].values()):
+            print("Метрики пока не собраны")
+            return
+
+        latency = PrettyTable(
+            ['Метрика', 'Метки', 'Вызовов', 'Среднее, мс', 'p50, мс', 'p95, мс', 'p99, мс']
+        )
+        latency.align['Метрика'] = 'l'
+        latency.align['Метки'] = 'l'
+        for key, hist_data in sorted(data['histograms'].items()):
+            name, labels = split_key(key)
+            hist = histogram_from_dict(hist_data)
+            if not hist.count:
+                continue
+            latency.add_row([
+                name.replace('_duration_seconds', ''),
+                labels,
+                hist.count,
+                f"{hist.sum / hist.count * 1e3:.2f}",
+                f"{hist.percentile(0.5) * 1e3:.2f}",
+                f"{hist.percentile(0.95) * 1e3:.2f}",
+                f"{hist.percentile(0.99) * 1e3:.2f}",
+            ])
+        print("Задержки:")
+        print(latency)
+
+        counters = PrettyTable(['Счётчик', 'Метки', 'Значение'])
+        counters.align['Счётчик'] = 'l'
+        counters.align['Метки'] = 'l'
+        for key, value in sorted(data['counters'].items()):
+            if value:
+                name, labels = split_key(key)
+                counters.add_row([name, labels, f"{value:g}"])
+        print("Счётчики:")
+        print(counters)
+
+    def _logout(self):
+        """Выход из системы"""
+        if not self.current_user:
+            print("Вы не вошли в систему")
+            return
+        username = self.current_user.username
+        self.current_user = None
+        self._clear_session()
+        print(f"Вы вышли из аккаунта '{username}'")
+
+    def _shell(self):
+        """Интерактивный режим: парсер, кэши и пользователь живут между командами"""
+        if self._in_shell:
+            print("Интерактивный режим уже запущен")
+            return
+        self._in_shell = True
+        DatabaseManager().enable_cache()
+        self._setup_completion()
+
+        print("Интерактивный режим ValutaTrade Hub. Для выхода введите 'exit'.")
+        while True:
+            try:
+                line = input("valutatrade> ").strip()
+            except (EOFError, KeyboardInterrupt):
+                print()
+                break
+
+            if not line:
+                continue
+            if line in ('exit', 'quit'):
+                break
+
+            try:
+                args = shlex.split(line)
+            except ValueError as e:
+                print(f"Ошибка: {e}")
+                continue
+
+            self._refresh_session()
+            try:
+                self.run(args)
+            except SystemExit:
+                # argparse завершает процесс при ошибке разбора и --help
+                pass
+        self._in_shell = False
+
+    def _setup_completion(self):
+        """Автодополнение команд, опций и кодов валют через readline"""
+        try:
+            import readline
+        except ImportError:
+            return
+
+        commands = sorted(self.subparsers.choices) + ['exit']
+        options = {
+            name: sorted(
+                option
+                for action in parser._actions
+                for option in action.option_strings
+            )
+            for name, parser in self.subparsers.choices.items()
+        }
+        codes = sorted(CURRENCY_REGISTRY)
+
+        def completer(text: str, state: int) -> Optional[str]:
+            words = readline.get_line_buffer().split()
+            if not words or (len(words) == 1 and text):
+                candidates = commands
+            elif text.startswith('-'):
+                candidates = options.get(words[0], [])
+            else:
+                candidates = codes
+                text = text.upper()
+            matches = [c for c in candidates if c.startswith(text)]
+            return matches[state] if state < len(matches) else None
+
+        readline.set_completer(completer)
+        readline.set_completer_delims(' ')
+        readline.parse_and_bind('tab: complete')
+
     def _show_portfolio(self, base: str):
         """Показать портфель пользователя"""
         if not self.current_user:
             raise ValueError("Сначала выполните login")
 
-        db = DatabaseManager()
-        portfolios = db.load_data('portfolios.json')
-        portfolio = next(
-            (p for p in portfolios if p['user_id'] == self.current_user.user_id),
-            None
-        )
+        valuation = PortfolioUseCase.get_valuation(self.current_user.user_id, base)
 
-        if not portfolio or not portfolio['wallets']:
+        if not valuation or not valuation['wallets']:
             print("У вас пока нет кошельков")
             return
 
         print(f"Портфель пользователя '{self.current_user.username}' (база: {base}):")
 
-        total_value = 0.0
-        for currency, balance in portfolio['wallets'].items():
-            try:
-                rate_data = RateUseCase.get_rate(currency, base)
-                rate = rate_data['rate']
-                value = balance * rate
-
-                print(f"- {currency}: {balance:.4f}  → {value:.2f} {base}")
-                total_value += value
-            except Exception:
-                print(f"- {currency}: {balance:.4f}  → 0.00 {base} (курс недоступен)")
+        for currency, row in valuation['wallets'].items():
+            if row['rate'] is None:
+                print(f"- {currency}: {row['balance']:.4f}  → 0.00 {base} (курс недоступен)")
+            else:
+                print(f"- {currency}: {row['balance']:.4f}  → {row['value']:.2f} {base}")
 
         print("-" * 30)
-        print(f"ИТОГО: {total_value:,.2f} {base}")
+        print(f"ИТОГО: {valuation['total']:,.2f} {base}")
+        if valuation['stale'] and valuation['age_seconds'] is not None:
+            print(f"Внимание: кэш курсов устарел (обновлён "
+                  f"{valuation['age_seconds'] / 60:.0f} мин назад)")
+
+    def _portfolio_history(self, base: str, date_from: Optional[str],
+                           date_to: Optional[str], interval: str):
+        """Стоимость текущих кошельков пользователя по историческим курсам"""
+        if not self.current_user:
+            raise ValueError("Сначала выполните login")
+
+        base = base.upper()
+        get_currency(base)
+        interval_seconds = parse_interval(interval)
+        end = (datetime.datetime.fromisoformat(date_to) if date_to
+               else datetime.datetime.utcnow())
+        start = (datetime.datetime.fromisoformat(date_from) if date_from
+                 else end - datetime.timedelta(days=30))
+        if start > end:
+            raise ValueError("Начало периода позже его конца")
+        if (end - start).total_seconds() / interval_seconds >= MAX_HISTORY_POINTS:
+            raise ValueError(
+                f"Слишком много точек (больше {MAX_HISTORY_POINTS}): "
+                "увеличьте --interval или сократите период"
+            )
+
+        portfolio = PortfolioUseCase.get_portfolio(self.current_user.user_id)
+        if not portfolio or not portfolio['wallets']:
+            print("У вас пока нет кошельков")
+            return
+
+        if self._storage is None:
+            self._storage = RatesStorage(ParserConfig())
+        pivot = self._storage.config.BASE_CURRENCY
+        pairs = {
+            f"{code}_{pivot}" for code in [*portfolio['wallets'], base] if code != pivot
+        }
+        # Курс на первый шаг — последняя запись до start, дальше — только период
+        history = (self._storage.latest_before(start, pairs)
+                   + self._storage.get_history(start=start, end=end, pairs=pairs))
+        points = value_series(portfolio['wallets'], history, base, pivot,
+                              start, end, interval_seconds)
+
+        table = PrettyTable()
+        table.field_names = ["Время (UTC)", f"Стоимость, {base}"]
+        table.align[f"Стоимость, {base}"] = "r"
+        for timestamp, value in points:
+            table.add_row([timestamp, "нет данных" if math.isnan(value) else f"{value:,.2f}"])
+
+        print(f"Портфель пользователя '{self.current_user.username}' "
+              f"с шагом {interval} (текущие балансы по историческим курсам):")
+        print(table)
+
+    def _aum_report(self, base: str, top: int, workers: int):
+        """Сводка активов по валютам и крупнейшие держатели по всем портфелям"""
+        base = base.upper()
+        if top < 0 or workers < 1:
+            raise ValueError("--top не может быть отрицательным, --workers — меньше 1")
+
+        db = DatabaseManager()
+        matrix = RateMatrix.from_cache(db.load_data('rates.json'))
+        if not matrix.knows(base):
+            get_currency(base)
+        path = os.path.join(SettingsLoader().data_path, 'portfolios.json')
+        if not os.path.exists(path):
+            print("Портфелей пока нет")
+            return
+
+        prices = snapshot_prices(matrix, set(CURRENCY_REGISTRY) | set(matrix.codes()), base)
+        report = aum_report(path, prices, top=top, workers=workers)
+
+        print(f"Активы под управлением (база: {base}), портфелей: {report['portfolios']}")
+        table = PrettyTable(['Валюта', 'Сумма', f'Стоимость, {base}', 'Доля, %', 'Держателей'])
+        table.align = 'r'
+        for row in report['currencies']:
+            value = f"{row['value']:,.2f}" if row['priced'] else "нет курса"
+            table.add_row([row['currency'], f"{row['amount']:,.4f}", value,
+                           f"{row['share']:.2f}", row['holders']])
+        print(table)
+        print(f"ИТОГО: {report['total']:,.2f} {base}")
+
+        if report['top_holders']:
+            print(f"Крупнейшие держатели (топ {len(report['top_holders'])}):")
+            for holder in report['top_holders']:
+                print(f"- user_id {holder['user_id']}: {holder['value']:,.2f} {base}")
 
     def _buy(self, currency: str, amount: float):
         """Купить"""
@@ -288,12 +624,7 @@ class CLIInterface:
         try:
             PortfolioUseCase.buy_currency(self.current_user.user_id, currency, amount)
 
-            db = DatabaseManager()
-            portfolios = db.load_data('portfolios.json')
-            portfolio = next(
-                (p for p in portfolios if p['user_id'] == self.current_user.user_id),
-                None
-            )
+            portfolio = PortfolioUseCase.get_portfolio(self.current_user.user_id)
 
             if portfolio and currency in portfolio['wallets']:
                 new_balance = portfolio['wallets'][currency]
@@ -320,12 +651,7 @@ class CLIInterface:
         try:
             PortfolioUseCase.sell_currency(self.current_user.user_id, currency, amount)
 
-            db = DatabaseManager()
-            portfolios = db.load_data('portfolios.json')
-            portfolio = next(
-                (p for p in portfolios if p['user_id'] == self.current_user.user_id),
-                None
-            )
+            portfolio = PortfolioUseCase.get_portfolio(self.current_user.user_id)
 
             if portfolio and currency in portfolio['wallets']:
                 new_balance = portfolio['wallets'][currency]
@@ -359,6 +685,9 @@ class CLIInterface:
             print(f"Курс {from_currency}→{to_currency}: {rate:.8f}")
             print(f"Обратный курс {to_currency}→{from_currency}: {1/rate:.8f}")
             print(f"Обновлено: {updated_at}")
+            if rate_data.get('stale') and rate_data.get('age_seconds') is not None:
+                print(f"Внимание: кэш курсов устарел (обновлён "
+                      f"{rate_data['age_seconds'] / 60:.0f} мин назад)")
         except CurrencyNotFoundError:
             raise
         except Exception as e:
@@ -366,6 +695,56 @@ class CLIInterface:
                 f"Ошибка при получении курса: {str(e)}"
             ) from e
 
+    def _update_currencies(self, limit: Optional[int] = None):
+        """Обновить список отслеживаемых криптовалют"""
+        config = ParserConfig()
+        count = refresh_currency_universe(config, limit)
+        print(f"Загружено монет: {count}. Отслеживается криптовалют: "
+              f"{len(config.CRYPTO_CURRENCIES)}, всего валют: {len(CURRENCY_REGISTRY)}")
+
+    def _replay(self, date_from: Optional[str], date_to: Optional[str],
+                speed: Optional[float], output: Optional[str]):
+        """Воспроизвести историю курсов в отдельном каталоге и вывести пропускную способность"""
+        if speed is not None and speed <= 0:
+            raise ValueError("--speed должен быть положительным числом")
+        start = datetime.datetime.fromisoformat(date_from) if date_from else None
+        end = datetime.datetime.fromisoformat(date_to) if date_to else None
+
+        live = ParserConfig()
+        ticks = group_ticks(RatesStorage(live).get_history(start=start, end=end))
+        if not ticks:
+            print("В истории нет записей за указанный период")
+            return
+
+        output = output or os.path.join(
+            SettingsLoader().data_path,
+            f"replay-{datetime.datetime.utcnow():%Y%m%d-%H%M%S}"
+        )
+        if os.path.isdir(output) and os.listdir(output):
+            raise ValueError(f"Каталог {output} не пуст, укажите другой --output")
+
+        print(f"Воспроизведение {len(ticks)} тиков "
+              f"({ticks[0][0].isoformat()} — {ticks[-1][0].isoformat()}) в {output}")
+        report = Replayer(replay_config(output, live), ticks, speed).run()
+
+        print(f"Тиков: {report['ticks']}, курсов: {report['records']}, "
+              f"оповещений: {report['alerts']}")
+        print(f"Время: {report['elapsed_seconds']:.2f} с, "
+              f"{report['ticks_per_second']:.1f} тиков/с, "
+              f"{report['records_per_second']:.1f} курсов/с")
+        if report['elapsed_seconds']:
+            print(f"Ускорение относительно реального времени: "
+                  f"{report['span_seconds'] / report['elapsed_seconds']:.0f}x")
+
+        if not report['metrics_enabled']:
+            print("Метрики выключены: время этапов недоступно")
+            return
+        table = PrettyTable(['Этап', 'Вызовов', 'Среднее, мс'])
+        table.align = 'r'
+        for stage, data in report['stages'].items():
+            table.add_row([stage, data['count'], f"{data['mean_ms']:.3f}"])
+        print(table)
+
     def _update_rates(self, source: str = None):
         """Обновить курс"""
         print("Начало обновления курса")
@@ -373,25 +752,23 @@ class CLIInterface:
         try:
             config = ParserConfig()
 
-            coingecko_client = CoinGeckoClient(config)
-            exchangerate_client = ExchangeRateApiClient(config)
-
             storage = RatesStorage(config)
 
-            clients = {}
-            if source is None or source == 'coingecko':
-                clients['CoinGecko'] = coingecko_client
-            if source is None or source == 'exchangerate':
-                clients['ExchangeRate-API'] = exchangerate_client
+            groups = {'coingecko': ['CoinGecko'], 'exchangerate': ['ExchangeRate-API']}
+            clients = build_clients(config, groups.get(source))
 
             updater = RatesUpdater(config, clients, storage)
 
             result = updater.run_update()
+            if result['shared']:
+                print("Курсы уже обновлялись другим процессом: использован его результат")
 
             if result['success']:
                 print(f"Обновление завершено успешно. "
                       f"Обновлено {result['rates_count']} курсов.")
                 print(f"Последнее обновление: {result['timestamp']}")
+                for alert in result['alerts']:
+                    print(f"Оповещение #{alert['rule_id']}: {alert['message']}")
             else:
                 print(
                     "Обновление завершено с ошибками. "
@@ -404,41 +781,89 @@ class CLIInterface:
                 f"Неожиданная ошибка при обновлении курсов: {str(e)}"
             )
 
-    def _show_rates(self, currency: str = None, top: int = None, base: str = 'USD'):
+    def _alert_add(self, parsed_args):
+        """Добавить правило оповещения"""
+        for rule_type in ('above', 'below', 'cross', 'change'):
+            value = getattr(parsed_args, rule_type)
+            if value is not None:
+                break
+        window_seconds = parse_interval(parsed_args.window) if rule_type == 'change' else None
+
+        rule = AlertStore(ParserConfig()).add_rule(
+            parsed_args.pair, rule_type, value, window_seconds
+        )
+        print(f"Оповещение #{rule['id']} добавлено: {self._describe_rule(rule)}")
+
+    def _alert_remove(self, rule_id: int):
+        """Удалить правило оповещения"""
+        if not AlertStore(ParserConfig()).remove_rule(rule_id):
+            raise ValueError(f"Оповещение #{rule_id} не найдено")
+        print(f"Оповещение #{rule_id} удалено")
+
+    @staticmethod
+    def _describe_rule(rule: dict) -> str:
+        if rule['type'] == 'change':
+            return (f"{rule['pair']} изменится больше чем на {rule['value']}% "
+                    f"за {rule['window_seconds']} с")
+        condition = {'above': 'поднимется до', 'below': 'опустится до', 'cross': 'пересечёт'}
+        return f"{rule['pair']} {condition[rule['type']]} {rule['value']}"
+
+    def _alerts(self, limit: int = 20):
+        """Правила оповещений и журнал сработавших"""
+        store = AlertStore(ParserConfig())
+        rules = store.load_rules()
+        if not rules:
+            print("Правил оповещений нет. Добавьте: alert-add --pair BTC_USD --above 70000")
+        else:
+            table = PrettyTable()
+            table.field_names = ["#", "Условие", "Последнее срабатывание"]
+            table.align["Условие"] = "l"
+            for rule in rules:
+                table.add_row([rule['id'], self._describe_rule(rule),
+                               rule.get('last_fired_at', '—')])
+            print(table)
+
+        notifications = store.recent_notifications(limit)
+        if notifications:
+            print(f"Последние оповещения ({len(notifications)}):")
+            for notification in notifications:
+                print(f"[{notification['timestamp']}] #{notification['rule_id']} "
+                      f"{notification['message']}")
+
+    @staticmethod
+    def _select_rates(index: PairIndex, currency: str = None, top: int = None) -> dict:
+        """Точный отбор по валюте и N самых дорогих криптовалют"""
+        pairs = index.select(currency=currency, kind=CRYPTO if top else None)
+        if top:
+            pairs = index.top(top, pairs)
+        return {pair: index.rates[pair] for pair in pairs}
+
+    def _show_rates(self, currency: str = None, top: int = None, base: str = 'USD',
+                    watch: bool = False, interval: float = 1.0):
         """Показать актуальный курс"""
         try:
             config = ParserConfig()
 
-            storage = RatesStorage(config)
+            if self._storage is None:
+                self._storage = RatesStorage(config)
 
-            rates = storage.load_rates()
+            if watch:
+                self._watch_rates(config, currency, top, interval)
+                return
+
+            index = self._storage.load_index()
 
-            if not rates:
+            if not index.rates:
                 print(
                     "Локальный кэш курсов пуст. Выполните 'update-rates', "
                     "чтобы загрузить данные."
                 )
                 return
 
-            if currency:
-                filtered_rates = {k: v for k, v in rates.items() if currency in k}
-                if not filtered_rates:
-                    print(f"Курс для '{currency}' не найден в кэше.")
-                    return
-                rates = filtered_rates
-
-            if top:
-                crypto_rates = {
-                    k: v for k, v in rates.items()
-                    if any(crypto in k for crypto in config.CRYPTO_CURRENCIES)
-                }
-                sorted_rates = sorted(
-                    crypto_rates.items(),
-                    key=lambda x: x[1]['rate'],
-                    reverse=True
-                )
-                sorted_rates = sorted_rates[:top]
-                rates = dict(sorted_rates)
+            rates = self._select_rates(index, currency, top)
+            if currency and not rates:
+                print(f"Курс для '{currency}' не найден в кэше.")
+                return
 
             print(
                 f"Курсы из кэша (обновлено "
@@ -450,8 +875,52 @@ class CLIInterface:
         except Exception as e:
             print(f"Ошибка при показе курсов: {str(e)}")
 
+    @staticmethod
+    def _format_rate_change(pair: str, old: Optional[dict], new: Optional[dict]) -> str:
+        if new is None:
+            return f"- {pair}: удалена из кэша"
+        if old is None:
+            return f"- {pair}: {new['rate']:.8f} (новая пара)"
+        delta = new['rate'] - old['rate']
+        arrow = "▲" if delta > 0 else "▼" if delta < 0 else "="
+        percent = f" ({delta / old['rate']:+.2%})" if old['rate'] else ""
+        return f"- {pair}: {new['rate']:.8f} {arrow} {delta:+.8f}{percent}"
+
+    def _watch_rates(self, config: ParserConfig, currency: str = None, top: int = None,
+                     interval: float = 1.0):
+        """Следит за rates.json и печатает только изменившиеся пары"""
+        # Наблюдение начинается до первого чтения: запись между ними не потеряется
+        with FileWatcher(config.RATES_FILE_PATH, poll_interval=interval) as watcher:
+            shown = self._select_rates(self._storage.load_index(), currency, top)
+            print(f"Наблюдение за {config.RATES_FILE_PATH} ({watcher.backend}), "
+                  f"Ctrl+C — выход. Пар: {len(shown)}")
+            for pair, data in shown.items():
+                print(f"- {pair}: {data['rate']:.8f}")
+
+            try:
+                while True:
+                    watcher.wait()
+                    rates = self._select_rates(self._storage.load_index(), currency, top)
+                    changed = sorted(
+                        pair for pair in set(shown) | set(rates)
+                        if shown.get(pair, {}).get('rate') != rates.get(pair, {}).get('rate')
+                    )
+                    if changed:
+                        stamp = datetime.datetime.now().strftime('%H:%M:%S')
+                        print(f"[{stamp}] изменилось пар: {len(changed)}")
+                        for pair in changed:
+                            print(self._format_rate_change(
+                                pair, shown.get(pair), rates.get(pair)
+                            ))
+                    shown = rates
+            except KeyboardInterrupt:
+                print("\nНаблюдение остановлено")
+
 
 def main():
+    setup_logging()
+    MetricsRegistry().persist_on_exit()
+    RateUseCase.revalidator = RatesRevalidator()
     cli = CLIInterface()
     cli.run()
 
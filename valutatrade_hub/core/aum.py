@@ -0,0 +1,206 @@
+import heapq
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from valutatrade_hub.core.matrix import RateMatrix
+from valutatrade_hub.infra.jsonstream import iter_records, split_ranges
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Сколько позиций (валюта, сумма) копится перед векторным сложением
+BATCH_SIZE = 65536
+
+Holder = Tuple[float, int]
+
+
+def is_portfolio(record: Any) -> bool:
+    """Запись portfolios.json: словарь с user_id и wallets"""
+    return isinstance(record, dict) and 'user_id' in record and 'wallets' in record
+
+
+def snapshot_prices(matrix: RateMatrix, codes: Iterable[str], base: str) -> Dict[str, float]:
+    """Цена единицы каждой валюты в base по одному снимку курсов (NaN, если курса нет)"""
+    prices = {}
+    for code in codes:
+        if code == base:
+            prices[code] = 1.0
+        elif f"{code}_{base}" in matrix.pairs:
+            prices[code] = matrix.pairs[f"{code}_{base}"]['rate']
+        else:
+            cross = matrix.rate(code, base)
+            prices[code] = cross['rate'] if cross else math.nan
+    return prices
+
+
+class AumAccumulator:
+    """Суммы по валютам и топ держателей для потока портфелей.
+
+    Позиции копятся пакетами по BATCH_SIZE и складываются через bincount
+    (если установлен NumPy); память не зависит от числа портфелей: суммы по
+    валютам, текущий пакет и куча из top записей.
+    """
+
+    def __init__(self, prices: Dict[str, float], top: int = 10):
+        self.codes = list(prices)
+        self.prices = [prices[code] for code in self.codes]
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.top = top
+        self.amounts = [0.0] * len(self.codes)
+        self.values = [0.0] * len(self.codes)
+        self.holders = [0] * len(self.codes)
+        self.portfolios = 0
+        self.top_holders: List[Holder] = []
+        self._batch_codes: List[int] = []
+        self._batch_amounts: List[float] = []
+        self._batch_slots: List[int] = []
+        self._batch_users: List[int] = []
+
+    def _code_index(self, code: str) -> int:
+        index = self.index.get(code)
+        if index is None:
+            # Валюта без курса в снимке: сумма учитывается, стоимость — нет
+            index = self.index[code] = len(self.codes)
+            self.codes.append(code)
+            self.prices.append(math.nan)
+            self.amounts.append(0.0)
+            self.values.append(0.0)
+            self.holders.append(0)
+        return index
+
+    def add(self, portfolio: Dict[str, Any]) -> None:
+        slot = len(self._batch_users)
+        self._batch_users.append(portfolio['user_id'])
+        index = self.index
+        for code, amount in portfolio['wallets'].items():
+            if amount:
+                code_index = index.get(code)
+                self._batch_codes.append(
+                    self._code_index(code) if code_index is None else code_index
+                )
+                self._batch_amounts.append(amount)
+                self._batch_slots.append(slot)
+        self.portfolios += 1
+        if len(self._batch_codes) >= BATCH_SIZE:
+            self.flush()
+
+    def _push_holder(self, value: float, user_id: int) -> None:
+        if len(self.top_holders) < self.top:
+            heapq.heappush(self.top_holders, (value, user_id))
+        elif value > self.top_holders[0][0]:
+            heapq.heapreplace(self.top_holders, (value, user_id))
+
+    def _flush_numpy(self) -> List[Tuple[float, int]]:
+        size = len(self.codes)
+        codes = np.asarray(self._batch_codes, dtype=np.int64)
+        amounts = np.asarray(self._batch_amounts, dtype=float)
+        values = amounts * np.nan_to_num(np.asarray(self.prices, dtype=float))[codes]
+
+        for name, batch in (('amounts', np.bincount(codes, amounts, size)),
+                            ('values', np.bincount(codes, values, size)),
+                            ('holders', np.bincount(codes, minlength=size))):
+            totals = getattr(self, name)
+            for i in np.flatnonzero(batch):
+                totals[i] += batch[i].item()
+
+        user_values = np.bincount(np.asarray(self._batch_slots, dtype=np.int64), values,
+                                  len(self._batch_users))
+        count = min(self.top, len(user_values))
+        if count == 0:
+            return []
+        best = np.argpartition(user_values, -count)[-count:]
+        return [(user_values[slot].item(), slot) for slot in best]
+
+    def _flush_python(self) -> List[Tuple[float, int]]:
+        user_values = [0.0] * len(self._batch_users)
+        for code, amount, slot in zip(self._batch_codes, self._batch_amounts,
+                                      self._batch_slots, strict=True):
+            price = self.prices[code]
+            value = 0.0 if math.isnan(price) else amount * price
+            self.amounts[code] += amount
+            self.values[code] += value
+            self.holders[code] += 1
+            user_values[slot] += value
+        return heapq.nlargest(self.top, ((value, slot) for slot, value in enumerate(user_values)))
+
+    def flush(self) -> None:
+        """Добавляет накопленный пакет к итогам"""
+        if not self._batch_users:
+            return
+        flush = self._flush_numpy if np is not None else self._flush_python
+        for value, slot in flush():
+            self._push_holder(value, self._batch_users[slot])
+        self._batch_codes, self._batch_amounts = [], []
+        self._batch_slots, self._batch_users = [], []
+
+    def merge(self, other: 'AumAccumulator') -> None:
+        """Добавляет итоги другого аккумулятора (частичный результат шарда)"""
+        other.flush()
+        for code, amount, value, holders in zip(other.codes, other.amounts, other.values,
+                                                other.holders, strict=True):
+            index = self._code_index(code)
+            self.amounts[index] += amount
+            self.values[index] += value
+            self.holders[index] += holders
+        self.portfolios += other.portfolios
+        for value, user_id in other.top_holders:
+            self._push_holder(value, user_id)
+
+    def report(self) -> Dict[str, Any]:
+        self.flush()
+        total = sum(self.values)
+        currencies = [
+            {
+                "currency": code,
+                "amount": self.amounts[i],
+                "value": self.values[i],
+                "share": self.values[i] / total * 100 if total else 0.0,
+                "holders": self.holders[i],
+                "priced": not math.isnan(self.prices[i]),
+            }
+            for i, code in enumerate(self.codes) if self.holders[i]
+        ]
+        currencies.sort(key=lambda row: row['value'], reverse=True)
+        return {
+            "total": total,
+            "portfolios": self.portfolios,
+            "currencies": currencies,
+            "top_holders": [
+                {"user_id": user_id, "value": value}
+                for value, user_id in sorted(self.top_holders, reverse=True)
+            ],
+        }
+
+
+def _scan(path: str, start: int, end: Optional[int], prices: Dict[str, float],
+          top: int) -> AumAccumulator:
+    """Обходит портфели из байтового диапазона [start, end) файла"""
+    accumulator = AumAccumulator(prices, top)
+    for record in iter_records(path, start, end, is_record=is_portfolio):
+        if is_portfolio(record):
+            accumulator.add(record)
+    accumulator.flush()
+    return accumulator
+
+
+def aum_report(path: str, prices: Dict[str, float], top: int = 10,
+               workers: int = 1) -> Dict[str, Any]:
+    """Активы под управлением по валютам и топ держателей по одному снимку цен.
+
+    Файл портфелей читается потоково; при workers > 1 он делится на байтовые
+    диапазоны, которые разбираются в пуле процессов, а частичные итоги
+    складываются.
+    """
+    ranges = split_ranges(path, workers) if workers > 1 else [(0, None)]
+    if len(ranges) == 1:
+        return _scan(path, 0, None, prices, top).report()
+
+    total = AumAccumulator(prices, top)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_scan, path, start, end, prices, top) for start, end in ranges]
+        for future in futures:
+            total.merge(future.result())
+    return total.report()
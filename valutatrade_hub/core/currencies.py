@@ -1,5 +1,12 @@
+import logging
+import os
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Any, Dict, Optional
+
+from valutatrade_hub.infra.serializer import SerializationError, get_serializer
+from valutatrade_hub.infra.settings import SettingsLoader
+
+CURRENCIES_FILE = "currencies.json"
 
 
 class CurrencyNotFoundError(Exception):
@@ -40,10 +47,12 @@ class FiatCurrency(Currency):
 class CryptoCurrency(Currency):
     """Класс для криптовалют"""
 
-    def __init__(self, name: str, code: str, algorithm: str, market_cap: float):
+    def __init__(self, name: str, code: str, algorithm: str, market_cap: float,
+                 coingecko_id: Optional[str] = None):
         super().__init__(name, code)
         self.algorithm = algorithm
         self.market_cap = market_cap
+        self.coingecko_id = coingecko_id
 
     def get_display_info(self) -> str:
         if self.market_cap >= 1e9:
@@ -64,13 +73,16 @@ CURRENCY_REGISTRY: Dict[str, Currency] = {
     "JPY": FiatCurrency("Japanese Yen", "JPY", "Japan"),
     "GBP": FiatCurrency("British Pound", "GBP", "United Kingdom"),
 
-    "BTC": CryptoCurrency("Bitcoin", "BTC", "SHA-256", 1.12e12),
-    "ETH": CryptoCurrency("Ethereum", "ETH", "Ethash", 2.34e11),
-    "ADA": CryptoCurrency("Cardano", "ADA", "Ouroboros", 3.45e10),
-    "DOT": CryptoCurrency("Polkadot", "DOT", "NPoS", 8.91e9),
-    "SOL": CryptoCurrency("Solana", "SOL", "Proof of History", 4.56e10),
+    "BTC": CryptoCurrency("Bitcoin", "BTC", "SHA-256", 1.12e12, "bitcoin"),
+    "ETH": CryptoCurrency("Ethereum", "ETH", "Ethash", 2.34e11, "ethereum"),
+    "ADA": CryptoCurrency("Cardano", "ADA", "Ouroboros", 3.45e10, "cardano"),
+    "DOT": CryptoCurrency("Polkadot", "DOT", "NPoS", 8.91e9, "polkadot"),
+    "SOL": CryptoCurrency("Solana", "SOL", "Proof of History", 4.56e10, "solana"),
 }
 
+# Встроенные валюты остаются в реестре при любой перезагрузке из файла
+_BUILTIN_CURRENCIES: Dict[str, Currency] = dict(CURRENCY_REGISTRY)
+
 
 def get_currency(code: str) -> Currency:
     """Получить валюту по коду"""
@@ -78,3 +90,46 @@ def get_currency(code: str) -> Currency:
     if code in CURRENCY_REGISTRY:
         return CURRENCY_REGISTRY[code]
     raise CurrencyNotFoundError(code)
+
+
+def currency_from_record(record: Dict[str, Any]) -> Currency:
+    """Валюта из записи файла валют (поле kind: fiat или crypto)"""
+    if record.get('kind') == 'fiat':
+        return FiatCurrency(record['name'], record['code'], record.get('issuing_country', ''))
+    return CryptoCurrency(record['name'], record['code'], record.get('algorithm', 'n/a'),
+                          float(record.get('market_cap') or 0.0), record.get('coingecko_id'))
+
+
+def currencies_file_path() -> str:
+    return os.path.join(SettingsLoader().data_path, CURRENCIES_FILE)
+
+
+def reload_currencies(path: Optional[str] = None) -> int:
+    """Перестраивает CURRENCY_REGISTRY на месте: встроенные валюты плюс файл валют.
+
+    Словарь не подменяется, поэтому модули, импортировавшие CURRENCY_REGISTRY,
+    видят обновлённый состав. Возвращает число валют, загруженных из файла.
+    """
+    path = path or currencies_file_path()
+    loaded: Dict[str, Currency] = {}
+    if os.path.exists(path):
+        for record in get_serializer(path).load_file(path).get('currencies', []):
+            try:
+                currency = currency_from_record(record)
+            except (KeyError, ValueError):
+                continue
+            # При совпадении кодов остаётся первая (с большей капитализацией)
+            loaded.setdefault(currency.code, currency)
+
+    CURRENCY_REGISTRY.clear()
+    CURRENCY_REGISTRY.update(_BUILTIN_CURRENCIES)
+    for code, currency in loaded.items():
+        if code not in _BUILTIN_CURRENCIES:
+            CURRENCY_REGISTRY[code] = currency
+    return len(loaded)
+
+
+try:
+    reload_currencies()
+except (OSError, SerializationError) as e:
+    logging.getLogger(__name__).warning(f"Файл валют не загружен: {str(e)}")
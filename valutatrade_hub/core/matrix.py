@@ -0,0 +1,86 @@
+import bisect
+from typing import Any, Dict, List, Optional
+
+
+def encode_vector(base: str, rates: Dict[str, float]) -> Dict[str, Any]:
+    """Вектор курсов от одной базы: отсортированные коды и курсы в том же порядке.
+
+    rates[code] — сколько единиц code стоит одна единица base (формат ответа
+    ExchangeRate-API). Коды и числа хранятся двумя списками, без повторения
+    ключей пар, поэтому полная матрица провайдера занимает пару килобайт.
+    """
+    codes = sorted(code.upper() for code in rates if code.upper() != base.upper())
+    upper = {code.upper(): value for code, value in rates.items()}
+    return {
+        "base": base.upper(),
+        "codes": codes,
+        "rates": [float(upper[code]) for code in codes],
+    }
+
+
+class RateMatrix:
+    """Кросс-курсы из векторов провайдеров и пар кэша без дополнительных запросов"""
+
+    def __init__(self, vectors: Dict[str, Dict[str, Any]],
+                 pairs: Optional[Dict[str, Dict[str, Any]]] = None, version: int = 0):
+        self.vectors = vectors
+        self.pairs = pairs or {}
+        # Версия снимка курсов (увеличивается при каждом RatesStorage.save_rates)
+        self.version = version
+
+    @classmethod
+    def from_cache(cls, data: Any) -> 'RateMatrix':
+        """Матрица из содержимого rates.json (словарь или список из одного словаря)"""
+        if isinstance(data, list):
+            data = data[0] if data else {}
+        return cls(data.get("matrices", {}), data.get("pairs", {}), data.get("version", 0))
+
+    def codes(self) -> List[str]:
+        """Все валюты, встречающиеся в векторах и парах кэша"""
+        codes = set()
+        for base, vector in self.vectors.items():
+            codes.add(base)
+            codes.update(vector["codes"])
+        for data in self.pairs.values():
+            if "from_currency" in data:
+                codes.update((data["from_currency"], data["to_currency"]))
+        for pair in self.pairs:
+            codes.update(pair.split("_", 1))
+        return sorted(codes)
+
+    @staticmethod
+    def _units(vector: Dict[str, Any], code: str) -> Optional[float]:
+        """Сколько единиц code стоит одна единица базы вектора"""
+        if code == vector["base"]:
+            return 1.0
+        codes = vector["codes"]
+        i = bisect.bisect_left(codes, code)
+        if i < len(codes) and codes[i] == code:
+            return vector["rates"][i] or None
+        return None
+
+    def _price(self, vector: Dict[str, Any], code: str) -> Optional[float]:
+        """Цена одной единицы code в базе вектора: из вектора или из пары CODE_BASE"""
+        units = self._units(vector, code)
+        if units is not None:
+            return 1.0 / units
+        pair = self.pairs.get(f"{code}_{vector['base']}")
+        return pair["rate"] if pair else None
+
+    def knows(self, code: str) -> bool:
+        """Есть ли курс code хотя бы в одном векторе"""
+        code = code.upper()
+        return any(self._units(vector, code) is not None for vector in self.vectors.values())
+
+    def rate(self, from_code: str, to_code: str) -> Optional[Dict[str, Any]]:
+        """Курс from_code→to_code через базу одного из векторов или None"""
+        from_code, to_code = from_code.upper(), to_code.upper()
+        for vector in self.vectors.values():
+            from_price = self._price(vector, from_code)
+            to_price = self._price(vector, to_code)
+            if from_price is not None and to_price:
+                return {
+                    "rate": from_price / to_price,
+                    "updated_at": vector.get("updated_at"),
+                }
+        return None
@@ -1,6 +1,6 @@
 import datetime
 import hashlib
-from typing import Optional
+from typing import Any, Dict, Optional
 
 
 class User:
@@ -12,6 +12,21 @@ class User:
         self._hashed_password = self._hash_password(password, self._salt)
         self._registration_date = registration_date or datetime.datetime.now()
 
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> 'User':
+        """Восстанавливает пользователя из сохранённой записи без хеширования"""
+        user = cls.__new__(cls)
+        user._user_id = record['user_id']
+        user._username = record['username']
+        user._salt = record.get('salt')
+        user._hashed_password = record.get('hashed_password')
+
+        registration_date = record.get('registration_date')
+        if isinstance(registration_date, str):
+            registration_date = datetime.datetime.fromisoformat(registration_date)
+        user._registration_date = registration_date or datetime.datetime.now()
+        return user
+
     def _generate_salt(self) -> str:
         """Соль для пароля"""
         import secrets
@@ -37,6 +52,8 @@ class User:
 
     def verify_password(self, password: str) -> bool:
         """Проверяет введённый пароль"""
+        if self._salt is None or self._hashed_password is None:
+            return False
         return self._hashed_password == self._hash_password(password, self._salt)
 
     @property
@@ -1,20 +1,33 @@
 import datetime
+import os
 import time
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional
 
+from valutatrade_hub.core.currencies import CurrencyNotFoundError as UnknownCurrencyError
 from valutatrade_hub.core.currencies import get_currency
 from valutatrade_hub.core.exceptions import (
     CurrencyNotFoundError,
     InsufficientFundsError,
 )
+from valutatrade_hub.core.matrix import RateMatrix
 from valutatrade_hub.core.models import User
 from valutatrade_hub.decorators import log_action
 from valutatrade_hub.infra.database import DatabaseManager
+from valutatrade_hub.infra.filelock import FileLock
 from valutatrade_hub.infra.settings import SettingsLoader
+from valutatrade_hub.metrics import MetricsRegistry, timed
+
+
+
+def _portfolios_lock() -> FileLock:
+    """Блокировка чтения-изменения-записи portfolios.json (сделки, оценки, прогрев)"""
+    path = os.path.join(SettingsLoader().data_path, 'portfolios.json.lock')
+    return FileLock(path, poll_interval=0.01)
 
 
 class UserUseCase:
     @staticmethod
+    @timed("valutatrade_usecase", usecase="UserUseCase", method="register_user")
     @log_action("REGISTER")
     def register_user(username: str, password: str) -> User:
         """Регистрация нового пользователя"""
@@ -38,34 +51,27 @@ class UserUseCase:
         users.append(user_data)
         db.save_data(users, 'users.json')
 
-        portfolios = db.load_data('portfolios.json')
-        portfolios.append({
-            'user_id': user_id,
-            'wallets': {}
-        })
-        db.save_data(portfolios, 'portfolios.json')
+        with _portfolios_lock():
+            portfolios = db.load_data('portfolios.json')
+            portfolios.append({
+                'user_id': user_id,
+                'wallets': {}
+            })
+            db.save_data(portfolios, 'portfolios.json')
 
         return user
 
     @staticmethod
+    @timed("valutatrade_usecase", usecase="UserUseCase", method="login_user")
     @log_action("LOGIN")
     def login_user(username: str, password: str) -> User:
         """Вход пользователя в систему"""
         db = DatabaseManager()
-        users = db.load_data('users.json')
-
-        user_data = next((user for user in users if user['username'] == username), None)
+        user_data = db.find_one('users.json', lambda user: user['username'] == username)
         if not user_data:
             raise ValueError(f"Пользователь '{username}' не найден")
 
-        user = User(
-            user_data['user_id'],
-            user_data['username'],
-            '', 
-            user_data['registration_date']
-        )
-        user._salt = user_data['salt']
-        user._hashed_password = user_data['hashed_password']
+        user = User.from_record(user_data)
 
         if not user.verify_password(password):
             raise ValueError("Неверный пароль")
@@ -75,31 +81,184 @@ class UserUseCase:
 
 class PortfolioUseCase:
     @staticmethod
+    @timed("valutatrade_usecase", usecase="PortfolioUseCase", method="get_portfolio")
     def get_portfolio(user_id: int) -> Dict[str, Any]:
         """Портфель пользователя"""
         db = DatabaseManager()
-        portfolios = db.load_data('portfolios.json')
-        return next((p for p in portfolios if p['user_id'] == user_id), None)
+        return db.find_one('portfolios.json', lambda p: p['user_id'] == user_id)
 
     @staticmethod
+    @timed("valutatrade_usecase", usecase="PortfolioUseCase", method="update_portfolio")
     def update_portfolio(user_id: int, wallets: Dict[str, float]) -> None:
-        """Обновить портфель пользователя"""
+        """Обновить портфель пользователя.
+
+        Сохранённые в записи оценки пересчитываются в той же записи файла.
+        """
         db = DatabaseManager()
-        portfolios = db.load_data('portfolios.json')
+        with _portfolios_lock():
+            portfolios = db.load_data('portfolios.json')
+
+            portfolio = next((p for p in portfolios if p['user_id'] == user_id), None)
+            if not portfolio:
+                portfolio = {
+                    'user_id': user_id,
+                    'wallets': {}
+                }
+                portfolios.append(portfolio)
+
+            portfolio['wallets'] = wallets
+            # Версия портфеля — ключ материализованной оценки (см. get_valuation)
+            portfolio['version'] = portfolio.get('version', 0) + 1
+            PortfolioUseCase._revalue(portfolio, db.get_rates_timestamp(),
+                                      PortfolioUseCase._matrix_loader(db))
+
+            db.save_data(portfolios, 'portfolios.json')
+
+    @staticmethod
+    def _value_wallets(wallets: Dict[str, float], base: str,
+                       matrix: RateMatrix) -> Dict[str, Any]:
+        rows = {}
+        total = 0.0
+        for code, balance in wallets.items():
+            try:
+                RateUseCase._check_currency(code, matrix)
+                RateUseCase._check_currency(base, matrix)
+                rate = RateUseCase._lookup(matrix, code, base)['rate']
+            except (CurrencyNotFoundError, UnknownCurrencyError):
+                rate = None
+            value = balance * rate if rate is not None else 0.0
+            rows[code] = {'balance': balance, 'rate': rate, 'value': value}
+            total += value
+        return {'base': base, 'wallets': rows, 'total': total}
+
+    @staticmethod
+    def _materialize(portfolio: Dict[str, Any], base: str, record: Dict[str, Any],
+                     rates_stamp: Optional[float],
+                     load_matrix: Callable[[], RateMatrix]) -> Optional[Dict[str, Any]]:
+        """Оценка для сохранения в record или None, если сохранённая не изменилась.
+
+        Пока не менялся отпечаток rates.json, версию курсов не нужно перечитывать;
+        если изменился только отпечаток, а версия та же, возвращается сохранённая
+        оценка с новым отпечатком. Снимок без версии проверяется только по отпечатку.
+        """
+        version = portfolio.get('version', 0)
+        entry = record['bases'].get(base)
+        if entry is not None and entry['portfolio_version'] == version:
+            if entry['rates_stamp'] == rates_stamp:
+                return None
+            matrix = load_matrix()
+            if matrix.version and matrix.version == entry['rates_version']:
+                entry['rates_stamp'] = rates_stamp
+                return entry
+
+        matrix = load_matrix()
+        return {
+            **PortfolioUseCase._value_wallets(portfolio['wallets'], base, matrix),
+            'portfolio_version': version,
+            'rates_version': matrix.version,
+            'rates_stamp': rates_stamp,
+            'computed_at': datetime.datetime.now().isoformat(),
+        }
+
+    @staticmethod
+    def _matrix_loader(db: DatabaseManager) -> Callable[[], RateMatrix]:
+        """Загрузка матрицы курсов не больше одного раза, при первой необходимости"""
+        matrices: List[RateMatrix] = []
+
+        def load_matrix() -> RateMatrix:
+            if not matrices:
+                matrices.append(RateMatrix.from_cache(db.load_data('rates.json')))
+            return matrices[0]
+
+        return load_matrix
+
+    @staticmethod
+    def _revalue(portfolio: Dict[str, Any], rates_stamp: Optional[float],
+                 load_matrix: Callable[[], RateMatrix]) -> int:
+        """Пересчитывает устаревшие оценки, сохранённые в записи портфеля; сколько изменилось"""
+        record = portfolio.get('valuations')
+        if not record:
+            return 0
+        changed = 0
+        for base in list(record['bases']):
+            entry = PortfolioUseCase._materialize(portfolio, base, record,
+                                                  rates_stamp, load_matrix)
+            if entry is not None:
+                record['bases'][base] = entry
+                changed += 1
+        return changed
+
+    @staticmethod
+    def _store_valuation(db: DatabaseManager, user_id: int, base: str,
+                         entry: Dict[str, Any]) -> None:
+        """Записывает оценку в запись портфеля, если портфель с тех пор не менялся"""
+        with _portfolios_lock():
+            portfolios = db.load_data('portfolios.json')
+            portfolio = next((p for p in portfolios if p['user_id'] == user_id), None)
+            if portfolio is None or portfolio.get('version', 0) != entry['portfolio_version']:
+                return
+            record = portfolio.setdefault('valuations', {'bases': {}})
+            record['bases'][base] = entry
+            record['viewed_at'] = time.time()
+            db.save_data(portfolios, 'portfolios.json')
 
-        portfolio = next((p for p in portfolios if p['user_id'] == user_id), None)
+    @staticmethod
+    @timed("valutatrade_usecase", usecase="PortfolioUseCase", method="get_valuation")
+    def get_valuation(user_id: int, base: str) -> Optional[Dict[str, Any]]:
+        """Стоимость кошельков в base и итог; None, если портфеля нет.
+
+        Оценка хранится в самой записи портфеля (поле valuations) с ключом
+        (версия портфеля, версия снимка курсов), поэтому читается вместе с
+        портфелем. Файл перезаписывается, только когда оценку пришлось
+        пересчитать: после сделки в другой базе или после сохранения курсов
+        без прогрева.
+        """
+        portfolio = PortfolioUseCase.get_portfolio(user_id)
         if not portfolio:
-            portfolio = {
-                'user_id': user_id,
-                'wallets': {}
-            }
-            portfolios.append(portfolio)
+            return None
 
-        portfolio['wallets'] = wallets
+        db = DatabaseManager()
+        freshness = RateUseCase.freshness(db)
+        record = portfolio.get('valuations') or {'bases': {}}
+        entry = PortfolioUseCase._materialize(
+            portfolio, base, record, db.get_rates_timestamp(),
+            PortfolioUseCase._matrix_loader(db)
+        )
+        hit = entry is None or entry is record['bases'].get(base)
+        if entry is None:
+            entry = record['bases'][base]
+        elif not hit:
+            PortfolioUseCase._store_valuation(db, user_id, base, entry)
 
-        db.save_data(portfolios, 'portfolios.json')
+        MetricsRegistry().counter('valutatrade_valuation_cache_total',
+                                  result='hit' if hit else 'miss').inc()
+        return {**entry, **freshness, 'cached': hit}
 
     @staticmethod
+    @timed("valutatrade_usecase", usecase="PortfolioUseCase", method="prewarm_valuations")
+    def prewarm_valuations(active_seconds: float) -> int:
+        """Пересчитывает оценки пользователей, запрашивавших их за active_seconds.
+
+        Портфели и курсы читаются один раз, файл портфелей перезаписывается
+        один раз; возвращает число пересчитанных оценок.
+        """
+        db = DatabaseManager()
+        now = time.time()
+        with _portfolios_lock():
+            portfolios = db.load_data('portfolios.json')
+            rates_stamp = db.get_rates_timestamp()
+            load_matrix = PortfolioUseCase._matrix_loader(db)
+            warmed = 0
+            for portfolio in portfolios:
+                record = portfolio.get('valuations')
+                if record and now - record.get('viewed_at', 0) <= active_seconds:
+                    warmed += PortfolioUseCase._revalue(portfolio, rates_stamp, load_matrix)
+            if warmed:
+                db.save_data(portfolios, 'portfolios.json')
+        return warmed
+
+    @staticmethod
+    @timed("valutatrade_usecase", usecase="PortfolioUseCase", method="buy_currency")
     @log_action("BUY")
     def buy_currency(user_id: int, currency_code: str, amount: float) -> None:
         """Купить валюту"""
@@ -122,6 +281,7 @@ class PortfolioUseCase:
         PortfolioUseCase.update_portfolio(user_id, wallets)
 
     @staticmethod
+    @timed("valutatrade_usecase", usecase="PortfolioUseCase", method="sell_currency")
     @log_action("SELL")
     def sell_currency(user_id: int, currency_code: str, amount: float) -> None:
         """Продать валюту"""
@@ -150,52 +310,95 @@ class PortfolioUseCase:
 
 
 class RateUseCase:
+    # Обновление устаревшего кэша (parser_service.revalidate.RatesRevalidator);
+    # подключается CLI, без него устаревшие курсы только помечаются
+    revalidator: Optional[Any] = None
+
     @staticmethod
-    def get_rate(from_code: str, to_code: str) -> Dict[str, Any]:
-        """Получить курс валюты"""
-        try:
-            _ = get_currency(from_code)
-            _ = get_currency(to_code)
-        except CurrencyNotFoundError as e:
-            raise CurrencyNotFoundError(e.code) from e
+    def freshness(db: DatabaseManager) -> Dict[str, Any]:
+        """Возраст кэша курсов и пометка stale; устаревший кэш отправляется на обновление.
 
-        db = DatabaseManager()
+        Кэш старше rates_ttl_seconds отдаётся сразу, а обновление запускается
+        в фоне (stale-while-revalidate).
+        """
         settings = SettingsLoader()
+        age = RateUseCase._rates_age(db)
+        if age is None or age > settings.rates_ttl_seconds:
+            RateUseCase._revalidate(age)
+            age = RateUseCase._rates_age(db)
+        return {
+            'stale': age is None or age > settings.rates_ttl_seconds,
+            'age_seconds': age,
+        }
 
-        rates_timestamp = db.get_rates_timestamp()
-        current_time = time.time()
-
-        if rates_timestamp is None or (
-            current_time - rates_timestamp
-        ) > settings.rates_ttl_seconds:
-
-            pass
-
-        rates = db.load_data('rates.json')
-        
-        if not rates:
-            return {
-                'rate': 1.0,
-                'updated_at': datetime.datetime.now().isoformat()
-            }
-        
-        pairs = (rates[0].get("pairs", {}) if isinstance(rates, list) and len(rates) > 0
-                 else rates.get("pairs", {}))
-
+    @staticmethod
+    def _lookup(matrix: RateMatrix, from_code: str, to_code: str) -> Dict[str, Any]:
         rate_key = f"{from_code}_{to_code}"
 
-        if rate_key in pairs:
+        if rate_key in matrix.pairs:
             return {
-                'rate': pairs[rate_key]["rate"],
-                'updated_at': pairs[rate_key]["updated_at"]
+                'rate': matrix.pairs[rate_key]["rate"],
+                'updated_at': matrix.pairs[rate_key]["updated_at"]
             }
 
+        cross = matrix.rate(from_code, to_code)
+        if cross is not None:
+            return cross
+
         return {
             'rate': 1.0,
             'updated_at': datetime.datetime.now().isoformat()
         }
 
     @staticmethod
+    def _rates_age(db: DatabaseManager) -> Optional[float]:
+        rates_timestamp = db.get_rates_timestamp()
+        return None if rates_timestamp is None else time.time() - rates_timestamp
+
+    @staticmethod
+    def _revalidate(age: Optional[float]) -> None:
+        """Кэш старше max-staleness (или отсутствующий) обновляется с ожиданием,
+        просто устаревший — в фоне"""
+        settings = SettingsLoader()
+        revalidator = RateUseCase.revalidator
+        if revalidator is None or not settings.rates_revalidate:
+            return
+        if age is None or age > settings.rates_max_staleness_seconds:
+            revalidator.refresh_blocking()
+        else:
+            revalidator.refresh_in_background()
+
+    @staticmethod
+    @timed("valutatrade_usecase", usecase="RateUseCase", method="get_rate")
+    def get_rate(from_code: str, to_code: str) -> Dict[str, Any]:
+        """Получить курс валюты.
+
+        Сначала ищется пара из кэша, затем кросс-курс по сохранённой матрице
+        провайдера, поэтому любая валюта из матрицы доступна без запроса к API.
+        Результат содержит пометку stale и возраст кэша (см. freshness).
+        Коды проверяются до обновления кэша: неизвестная валюта не запускает
+        запрос к провайдерам.
+        """
+        db = DatabaseManager()
+        rates_stamp = db.get_rates_timestamp()
+        matrix = RateMatrix.from_cache(db.load_data('rates.json'))
+        RateUseCase._check_currency(from_code, matrix)
+        RateUseCase._check_currency(to_code, matrix)
+
+        freshness = RateUseCase.freshness(db)
+        if db.get_rates_timestamp() != rates_stamp:
+            matrix = RateMatrix.from_cache(db.load_data('rates.json'))
+
+        return {**RateUseCase._lookup(matrix, from_code, to_code), **freshness}
+
+    @staticmethod
+    def _check_currency(code: str, matrix: RateMatrix) -> None:
+        """Валюта должна быть в реестре или в матрице курсов"""
+        if not matrix.knows(code):
+            get_currency(code)
+
+    @staticmethod
+    @timed("valutatrade_usecase", usecase="RateUseCase", method="update_rates")
     def update_rates(rates: Dict[str, Dict[str, Any]]) -> None:
         """Обновить курс валюты"""
         db = DatabaseManager()
@@ -0,0 +1,104 @@
+import bisect
+import datetime
+import math
+import re
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+INTERVAL_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def parse_interval(value: str) -> int:
+    """Интервал вида 15m, 1h, 1d, 1w в секундах"""
+    match = re.fullmatch(r'(\d+)([smhdw])', value.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(
+            f"Некорректный интервал '{value}' (ожидается число и единица: s, m, h, d, w)"
+        )
+    return int(match.group(1)) * INTERVAL_UNITS[match.group(2)]
+
+
+def to_epoch(value: datetime.datetime) -> float:
+    """naive UTC datetime в секунды от эпохи"""
+    return (value - _EPOCH).total_seconds()
+
+
+def rate_series(history: Iterable[Dict[str, Any]],
+                pivot: str) -> Dict[str, Tuple[List[float], List[float]]]:
+    """Ряды (время, курс к pivot) по валютам, упорядоченные по времени"""
+    points: Dict[str, List[Tuple[float, float]]] = {}
+    for record in history:
+        if record['to_currency'] != pivot:
+            continue
+        moment = datetime.datetime.fromisoformat(record['timestamp'].rstrip('Z'))
+        points.setdefault(record['from_currency'], []).append(
+            (to_epoch(moment), record['rate'])
+        )
+
+    series = {}
+    for code, values in points.items():
+        values.sort(key=lambda point: point[0])
+        series[code] = ([t for t, _ in values], [r for _, r in values])
+    return series
+
+
+def _as_of(times: Sequence[float], rates: Sequence[float],
+           grid: Sequence[float]) -> List[float]:
+    """Последний известный курс на каждый момент сетки (NaN до первой точки)"""
+    if np is not None:
+        times_array = np.asarray(times, dtype=float)
+        rates_array = np.asarray(rates, dtype=float)
+        index = np.searchsorted(times_array, grid, side='right') - 1
+        return np.where(index >= 0, rates_array[np.clip(index, 0, None)], np.nan)
+
+    result = []
+    for moment in grid:
+        index = bisect.bisect_right(times, moment) - 1
+        result.append(rates[index] if index >= 0 else math.nan)
+    return result
+
+
+def value_series(wallets: Dict[str, float], history: Iterable[Dict[str, Any]],
+                 base: str, pivot: str, start: datetime.datetime,
+                 end: datetime.datetime, interval_seconds: int) -> List[Tuple[str, float]]:
+    """Стоимость кошельков в валюте base на каждый шаг от start до end.
+
+    Курс на момент шага — последняя запись истории не позже него (as-of join);
+    история хранит курсы к pivot, кросс-курс к base считается через pivot.
+    Если хотя бы для одной валюты курса ещё нет, стоимость в этой точке — NaN.
+    """
+    series = rate_series(history, pivot)
+    start_s, end_s = to_epoch(start), to_epoch(end)
+    steps = int((end_s - start_s) // interval_seconds) + 1
+    grid = [start_s + step * interval_seconds for step in range(max(steps, 0))]
+
+    def pivot_rates(code: str):
+        if code == pivot:
+            return [1.0] * len(grid) if np is None else np.ones(len(grid))
+        times, rates = series.get(code, ([], []))
+        return _as_of(times, rates, grid)
+
+    if np is not None:
+        grid = np.asarray(grid, dtype=float)
+        total = np.zeros(len(grid))
+        for code, balance in wallets.items():
+            total += balance * pivot_rates(code)
+        total /= pivot_rates(base)
+        values = total.tolist()
+    else:
+        totals = [0.0] * len(grid)
+        for code, balance in wallets.items():
+            for index, rate in enumerate(pivot_rates(code)):
+                totals[index] += balance * rate
+        values = [value / rate for value, rate in zip(totals, pivot_rates(base), strict=True)]
+
+    return [
+        ((_EPOCH + datetime.timedelta(seconds=float(moment))).isoformat() + "Z", value)
+        for moment, value in zip(grid, values, strict=True)
+    ]
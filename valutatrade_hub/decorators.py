@@ -1,87 +1,104 @@
 import functools
+import inspect
 import logging
-from typing import Any, Callable
-
-
-def _extract_user_info(args):
-    """Получение информации о пользователе"""
-    if args and hasattr(args[0], '__class__'):
-        if hasattr(args[0], 'user_id'):
-            return args[0].user_id
-        elif hasattr(args[0], 'username'):
-            return args[0].username
-    return None
-
-def _extract_currency_code(args, kwargs):
-    """Получение кода валюты"""
-    if 'currency_code' in kwargs:
-        return kwargs['currency_code']
-    elif 'currency' in kwargs:
-        return kwargs['currency']
-
-    for _, arg in enumerate(args[1:], 1):  
-        if (
-            isinstance(arg, str) and len(arg) <= 10
-        ):  
-            return arg
-    return None
-
-def _extract_amount(args, kwargs):
-    """Получение количества"""
-    if 'amount' in kwargs:
-        return kwargs['amount']
-    elif len(args) > 2 and isinstance(args[2], (int, float)):
-        return args[2]
-    return None
-
-def _extract_additional_params(args, kwargs):
-    """Получение дополнительных параметров"""
+import random
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from valutatrade_hub.infra.settings import SettingsLoader
+from valutatrade_hub.metrics import MetricsRegistry
+
+# Поле лога -> имена параметров функции, из которых оно берётся (по порядку)
+DEFAULT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    'user_id': ('user_id',),
+    'username': ('username',),
+    'currency_code': ('currency_code', 'currency'),
+    'amount': ('amount',),
+    'rate': ('rate',),
+    'base': ('base',),
+}
+
+_POSITIONAL_KINDS = (
+    inspect.Parameter.POSITIONAL_ONLY,
+    inspect.Parameter.POSITIONAL_OR_KEYWORD,
+)
+
+
+def _compile_extractor(
+    func: Callable,
+    fields: Dict[str, Union[str, Tuple[str, ...]]]
+) -> List[Tuple[str, str, Optional[int]]]:
+    """План извлечения: (поле лога, имя параметра, позиция) — один раз при декорировании"""
+    params = inspect.signature(func).parameters
+    positions = {
+        name: index
+        for index, (name, param) in enumerate(params.items())
+        if param.kind in _POSITIONAL_KINDS
+    }
+
+    plan = []
+    for field, candidates in fields.items():
+        if isinstance(candidates, str):
+            candidates = (candidates,)
+        for name in candidates:
+            if name in params:
+                plan.append((field, name, positions.get(name)))
+                break
+    return plan
+
+
+def _extract_params(plan, args, kwargs) -> Dict[str, Any]:
+    """Получение параметров для лога по готовому плану"""
     log_params = {}
+    for field, name, index in plan:
+        if index is not None and index < len(args):
+            log_params[field] = args[index]
+        elif name in kwargs:
+            log_params[field] = kwargs[name]
+    return log_params
 
-    user_info = _extract_user_info(args)
-    if user_info:
-        log_params['username'] = user_info
-
-    currency_code = _extract_currency_code(args, kwargs)
-    if currency_code:
-        log_params['currency_code'] = currency_code
-
-    amount = _extract_amount(args, kwargs)
-    if amount is not None:
-        log_params['amount'] = amount
-
-    if 'rate' in kwargs:
-        log_params['rate'] = kwargs['rate']
-    if 'base' in kwargs:
-        log_params['base'] = kwargs['base']
 
-    return log_params
+def log_action(
+    action_name: str,
+    verbose: bool = False,
+    fields: Optional[Dict[str, Union[str, Tuple[str, ...]]]] = None,
+    sample_rate: Optional[float] = None,
+    enabled: Optional[bool] = None
+) -> Callable:
+    """Логирование операций
+
+    fields — соответствие полей лога именам параметров (по умолчанию DEFAULT_FIELDS),
+    sample_rate — доля логируемых успешных вызовов (ошибки логируются всегда),
+    enabled=False возвращает исходную функцию без обёртки.
+    Значения по умолчанию берутся из настройки log_actions.
+    """
+    settings = SettingsLoader().log_actions
+    if enabled is None:
+        enabled = settings['enabled']
+    if sample_rate is None:
+        sample_rate = settings['sample_rate']
 
-def log_action(action_name: str, verbose: bool = False) -> Callable:
-    """Логирование операций"""
     def decorator(func: Callable) -> Callable:
+        if not enabled:
+            return func
+
+        plan = _compile_extractor(func, fields or DEFAULT_FIELDS)
+        logger = logging.getLogger('valutatrade.actions')
+        registry = MetricsRegistry()
+        ok_counter = registry.counter(
+            'valutatrade_actions_total', action=action_name, result='OK'
+        )
+        error_counter = registry.counter(
+            'valutatrade_actions_total', action=action_name, result='ERROR'
+        )
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs) -> Any:
-            logger = logging.getLogger('valutatrade.actions')
-
-            log_params = {
-                'action': action_name,
-                'result': 'OK'
-            }
-
-            try:
-                additional_params = _extract_additional_params(args, kwargs)
-                log_params.update(additional_params)
-            except Exception:
-                pass
-
             try:
                 result = func(*args, **kwargs)
-
-                logger.info(f"{action_name} operation completed", extra=log_params)
-
-                return result
             except Exception as e:
+                error_counter.inc()
+                log_params = _extract_params(plan, args, kwargs)
+                log_params['action'] = action_name
                 log_params['result'] = 'ERROR'
                 log_params['error_type'] = type(e).__name__
                 log_params['error_message'] = str(e)
@@ -93,5 +110,16 @@ def log_action(action_name: str, verbose: bool = False) -> Callable:
 
                 raise
 
+            ok_counter.inc()
+            sampled = sample_rate >= 1.0 or random.random() < sample_rate
+            if sampled and logger.isEnabledFor(logging.INFO):
+                log_params = _extract_params(plan, args, kwargs)
+                log_params['action'] = action_name
+                log_params['result'] = 'OK'
+
+                logger.info(f"{action_name} operation completed", extra=log_params)
+
+            return result
+
         return wrapper
     return decorator
@@ -1,9 +1,12 @@
-import json
 import os
-from typing import Any, Dict, List, Optional
+import pickle
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 from valutatrade_hub.core.exceptions import ApiRequestError
+from valutatrade_hub.infra.jsonstream import iter_records
+from valutatrade_hub.infra.serializer import SerializationError, get_serializer
 from valutatrade_hub.infra.settings import SettingsLoader
+from valutatrade_hub.metrics import MetricsRegistry
 
 
 class DatabaseManager:
@@ -21,45 +24,122 @@ class DatabaseManager:
         """Инициализация синглтона только при первом вызове"""
         if not self._initialized:
             self._settings = SettingsLoader()
+            self._cache_enabled = False
+            # Путь -> (отпечаток файла, данные в pickle): каждый вызов получает свою
+            # копию, так что изменённые и не сохранённые записи не портят кэш
+            self._cache: Dict[str, Tuple[Tuple[int, int], bytes]] = {}
             self.__class__._initialized = True
 
+    def enable_cache(self) -> None:
+        """Включает кэш прочитанных файлов (для долгоживущих процессов)"""
+        self._cache_enabled = True
+
+    def invalidate_cache(self, filename: Optional[str] = None) -> None:
+        """Сбрасывает кэш одного файла или всех файлов"""
+        if filename is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(self._get_file_path(filename), None)
+
+    @staticmethod
+    def _file_stamp(file_path: str) -> Optional[Tuple[int, int]]:
+        """Отпечаток файла для инвалидации кэша: mtime и размер"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
     def _get_file_path(self, filename: str) -> str:
         """Получает полный путь к файлу данных"""
         data_path = self._settings.data_path
         return os.path.join(data_path, filename)
 
     def load_data(self, filename: str) -> List[Dict[str, Any]]:
-        file_path = self._get_file_path(filename)
+        with MetricsRegistry().timer('valutatrade_storage', op='load', file=filename):
+            file_path = self._get_file_path(filename)
 
-        if not os.path.exists(file_path):
-            return []
+            if not os.path.exists(file_path):
+                return []
 
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
+            if self._cache_enabled:
+                stamp = self._file_stamp(file_path)
+                cached = self._cache.get(file_path)
+                if cached is not None and cached[0] == stamp:
+                    return pickle.loads(cached[1])
+
+            try:
+                if file_path.endswith('.jsonl'):
+                    data = list(iter_records(file_path))
+                else:
+                    data = get_serializer(file_path).load_file(file_path)
                 if isinstance(data, list):
-                    return data
+                    result = data
                 elif isinstance(data, dict):
-                    return [data]
+                    result = [data]
                 else:
-                    return []
-        except json.JSONDecodeError as e:
+                    result = []
+            except SerializationError as e:
+                raise ApiRequestError(f"Ошибка парсинга JSON файла {filename}: "
+                    f"{str(e)}") from e
+            except Exception as e:
+                raise ApiRequestError(f"Ошибка чтения файла {filename}: "
+                    f"{str(e)}") from e
+
+            if self._cache_enabled:
+                self._cache[file_path] = (stamp, self._freeze(result))
+            return result
+
+    def iter_data(self, filename: str) -> Iterator[Dict[str, Any]]:
+        """Отдаёт записи файла по одной (JSON-массив или JSON Lines), не загружая его целиком.
+
+        Кэш не используется: распаковка всего файла ради одной записи дороже
+        потокового чтения до неё.
+        """
+        file_path = self._get_file_path(filename)
+
+        if not os.path.exists(file_path):
+            return
+
+        try:
+            yield from iter_records(file_path)
+        except SerializationError as e:
             raise ApiRequestError(f"Ошибка парсинга JSON файла {filename}: "
                 f"{str(e)}") from e
-        except Exception as e:
+        except OSError as e:
             raise ApiRequestError(f"Ошибка чтения файла {filename}: "
                 f"{str(e)}") from e
 
-    def save_data(self, data: List[Dict[str, Any]], filename: str) -> None:
-        file_path = self._get_file_path(filename)
-
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    def find_one(self, filename: str,
+                 predicate: Callable[[Dict[str, Any]], bool]) -> Optional[Dict[str, Any]]:
+        """Первая запись, для которой predicate истинен; чтение файла прекращается на ней"""
+        with MetricsRegistry().timer('valutatrade_storage', op='find_one', file=filename):
+            records = self.iter_data(filename)
+            try:
+                for record in records:
+                    if predicate(record):
+                        return record
+                return None
+            finally:
+                records.close()
 
-        try:
-            with open(file_path, 'w', encoding='utf-8') as file:
-                json.dump(data, file, ensure_ascii=False, indent=2)
-        except Exception as e:
-            raise ApiRequestError(f"Ошибка записи в файл {filename}: {str(e)}") from e
+    def save_data(self, data: List[Dict[str, Any]], filename: str) -> None:
+        with MetricsRegistry().timer('valutatrade_storage', op='save', file=filename):
+            file_path = self._get_file_path(filename)
+
+            try:
+                get_serializer(file_path).dump_file(data, file_path)
+            except Exception as e:
+                self._cache.pop(file_path, None)
+                raise ApiRequestError(f"Ошибка записи в файл {filename}: {str(e)}") from e
+
+            if self._cache_enabled:
+                cached = data if isinstance(data, list) else [data]
+                self._cache[file_path] = (self._file_stamp(file_path), self._freeze(cached))
+
+    @staticmethod
+    def _freeze(data: List[Dict[str, Any]]) -> bytes:
+        return pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
 
     def get_rates_timestamp(self, filename: str = 'rates.json') -> Optional[float]:
         file_path = self._get_file_path(filename)
@@ -0,0 +1,102 @@
+import os
+import time
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """Межпроцессная блокировка файла: fcntl.flock (POSIX) или msvcrt.locking (Windows).
+
+    Блокировку держит открытый дескриптор, поэтому ОС снимает её, когда
+    владелец завершается или падает: брошенных блокировок не бывает, и у живого,
+    но медленного владельца её никто не отнимет. Файл после освобождения не
+    удаляется — иначе два процесса могли бы заблокировать разные файлы с одним
+    именем. В файл пишутся pid и время захвата. У каждого экземпляра свой
+    дескриптор, так что экземпляры исключают друг друга и внутри процесса.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.05):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def locked(self) -> bool:
+        """Захвачена ли блокировка кем-либо (проверка на мгновение берёт её сама)"""
+        if self.held:
+            return True
+        try:
+            fd = os.open(self.path, os.O_RDWR)
+        except OSError:
+            return False
+        try:
+            if _try_lock(fd):
+                _unlock(fd)
+                return False
+            return True
+        finally:
+            os.close(fd)
+
+    def _try_acquire(self) -> bool:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if not _try_lock(fd):
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()} {time.time():.3f}\n".encode())
+        self._fd = fd
+        return True
+
+    def acquire(self, timeout: Optional[float] = 0) -> bool:
+        """Захватывает блокировку; timeout=0 — без ожидания, None — ждать сколько нужно"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._try_acquire():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        try:
+            _unlock(fd)
+        finally:
+            os.close(fd)
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire(timeout=None)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
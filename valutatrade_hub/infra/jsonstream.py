@@ -0,0 +1,283 @@
+import codecs
+import json
+import os
+import re
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from valutatrade_hub.infra.serializer import SerializationError
+
+CHUNK_SIZE = 1 << 20
+# Сколько границ пакета пробовать, прежде чем разбирать элементы по одному
+BATCH_ATTEMPTS = 2
+_NOT_WHITESPACE = re.compile(r'[^ \t\r\n]')
+_SEPARATOR = re.compile(r'[ \t\r\n]*([,\]])[ \t\r\n]*')
+# Хвост буфера без пробелов и скобок — возможно, начало обрезанного токена
+_TOKEN_TAIL = re.compile(r'[^ \t\r\n,:\[\]{}]*\Z')
+
+RecordFilter = Callable[[Any], bool]
+
+
+class _ArrayReader:
+    """Поэлементное чтение JSON-массива из файла с ограниченным буфером.
+
+    Элементы разбираются json.JSONDecoder.raw_decode прямо из буфера; буфер
+    дочитывается кусками по chunk_size и сдвигается по мере разбора, поэтому
+    в памяти держится не больше куска и одного элемента. Для чтения части
+    файла (шарда) ведётся байтовое смещение начала каждого элемента.
+    """
+
+    def __init__(self, f, offset: int, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.dropped = 0  # сколько символов уже отброшено из начала буфера
+        # Байтовое смещение считается лениво, от последней отметки (символ, байт)
+        self._mark = (0, offset)
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Дочитывает кусок файла; False, если файл закончился"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        self.eof = not chunk
+        if self.pos:
+            offset = self.offset
+            self.buffer = self.buffer[self.pos:]
+            self.dropped += self.pos
+            self.pos = 0
+            self._mark = (0, offset)
+        self.buffer += self.utf8.decode(chunk, final=self.eof)
+        return True
+
+    @property
+    def offset(self) -> int:
+        """Байтовое смещение buffer[pos] в файле"""
+        mark_pos, mark_offset = self._mark
+        segment = self.buffer[mark_pos:self.pos]
+        offset = mark_offset + (len(segment) if segment.isascii()
+                                else len(segment.encode('utf-8')))
+        self._mark = (self.pos, offset)
+        return offset
+
+    def peek(self) -> str:
+        """Первый значимый символ (пробелы пропускаются) или '' в конце файла"""
+        while True:
+            match = _NOT_WHITESPACE.search(self.buffer, self.pos)
+            if match:
+                self.pos = match.start()
+                return match.group()
+            self.pos = len(self.buffer)
+            if not self._fill():
+                return ''
+
+    def separator(self) -> str:
+        """Разделитель элементов ',' или ']' вместе с пробелами вокруг"""
+        while True:
+            match = _SEPARATOR.match(self.buffer, self.pos)
+            if match and match.end() < len(self.buffer):
+                self.pos = match.end()
+                return match.group(1)
+            if not match and _NOT_WHITESPACE.search(self.buffer, self.pos):
+                raise SerializationError("Ошибка разбора JSON: ожидалась ',' или ']'")
+            if not self._fill():
+                if not match:
+                    raise SerializationError("Ошибка разбора JSON: неожиданный конец файла")
+                self.pos = match.end()
+                return match.group(1)
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise SerializationError(f"Ошибка разбора JSON: ожидался '{char}'")
+        self.pos += 1
+
+    def _truncated(self, error: json.JSONDecodeError) -> bool:
+        """Может ли ошибка объясняться токеном, обрезанным концом буфера ("1e-", "fal")"""
+        return (error.msg.startswith('Unterminated string')
+                or _TOKEN_TAIL.match(self.buffer, error.pos) is not None)
+
+    def decode(self, strict: bool = True) -> Tuple[Any, bool]:
+        """Разбирает значение с текущей позиции (без пробелов впереди); (значение, успех).
+
+        При strict=True любая ошибка разбора до конца файла означает, что
+        значение не дочитано: буфер дополняется и разбор повторяется, а
+        исключение бросается только после конца файла. При strict=False
+        (поиск начала записи в шарде) дочитывается лишь обрезанный в конце
+        буфера токен, остальные ошибки возвращают успех False.
+        """
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if (strict or self._truncated(e)) and self._fill():
+                    continue
+                if strict:
+                    raise SerializationError(f"Ошибка разбора JSON: {str(e)}") from e
+                return None, False
+            # Число в самом конце буфера может продолжаться в следующем куске
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value, True
+
+    def seek_record(self, is_record: RecordFilter) -> bool:
+        """Переходит к первому '{', с которого разбирается запись is_record"""
+        while True:
+            start = self.buffer.find('{', self.pos)
+            if start < 0:
+                self.pos = len(self.buffer)
+                if not self._fill():
+                    return False
+                continue
+            self.pos = start
+            mark = self.dropped + start
+            value, ok = self.decode(strict=False)
+            self.pos = mark - self.dropped
+            if ok and is_record(value):
+                return True
+            self.pos += 1
+
+
+def _skip_continuation(f, start: int) -> int:
+    """Сдвигает start за продолжение многобайтового символа UTF-8"""
+    f.seek(start)
+    while start:
+        byte = f.read(1)
+        if not byte or byte[0] & 0xC0 != 0x80:
+            break
+        start += 1
+    f.seek(start)
+    return start
+
+
+def _decode_batch(reader: _ArrayReader) -> Optional[List[Any]]:
+    """Все целые элементы в буфере одним вызовом json.loads или None.
+
+    Граница пакета — последняя запятая после '}' или ']'. Если срез от начала
+    элемента до неё разбирается как массив, он заканчивается на границе
+    элементов верхнего уровня; иначе пробуется предыдущая такая запятая.
+    """
+    buffer, start = reader.buffer, reader.pos
+    comma = len(buffer)
+    for _ in range(BATCH_ATTEMPTS):
+        while True:
+            comma = buffer.rfind(',', start, comma)
+            if comma < 0:
+                return None
+            close = comma - 1
+            while close > start and buffer[close] in ' \t\r\n':
+                close -= 1
+            if buffer[close] in '}]':
+                break
+        try:
+            batch = json.loads('[' + buffer[start:comma] + ']')
+        except ValueError:
+            continue
+        reader.pos = comma + 1
+        reader.peek()
+        return batch
+    return None
+
+
+def _iter_elements(reader: _ArrayReader, end: Optional[int]) -> Iterator[Any]:
+    # Быстрый путь без вызовов методов; конец буфера и ошибки — через decode/separator
+    raw_decode = reader.decoder.raw_decode
+    match_separator = _SEPARATOR.match
+    # Конец буфера при последней неудачной попытке пакета: до дочитывания
+    # файла пакет не повторяется, иначе каждый элемент заново разбирал бы буфер
+    batch_failed = None
+    while end is None or reader.offset < end:
+        if end is None and batch_failed != reader.dropped + len(reader.buffer):
+            batch = _decode_batch(reader)
+            if batch:
+                yield from batch
+                continue
+            batch_failed = reader.dropped + len(reader.buffer)
+
+        buffer = reader.buffer
+        try:
+            value, stop = raw_decode(buffer, reader.pos)
+        except json.JSONDecodeError:
+            stop = len(buffer)
+        if stop < len(buffer):
+            reader.pos = stop
+        else:
+            value = reader.decode()[0]
+
+        match = match_separator(reader.buffer, reader.pos)
+        if match and match.end() < len(reader.buffer):
+            reader.pos = match.end()
+            separator = match.group(1)
+        else:
+            separator = reader.separator()
+
+        yield value
+        if separator == ']':
+            return
+
+
+def _iter_array(path: str, start: int, end: Optional[int],
+                is_record: Optional[RecordFilter], chunk_size: int) -> Iterator[Any]:
+    with open(path, 'rb') as f:
+        start = _skip_continuation(f, start)
+        reader = _ArrayReader(f, start, chunk_size)
+
+        if start:
+            if is_record is None:
+                raise ValueError("Для чтения JSON-массива с середины нужен is_record")
+            if not reader.seek_record(is_record):
+                return
+        else:
+            first = reader.peek()
+            if first != '[':
+                # Одиночный объект вместо массива — одна запись
+                if first:
+                    yield reader.decode()[0]
+                return
+            reader.expect('[')
+            if reader.peek() == ']':
+                return
+
+        yield from _iter_elements(reader, end)
+
+
+def _iter_lines(path: str, start: int, end: Optional[int]) -> Iterator[Any]:
+    with open(path, 'rb') as f:
+        if start:
+            # Строка, начатая до start, принадлежит предыдущему шарду
+            f.seek(start - 1)
+            f.readline()
+        while end is None or f.tell() < end:
+            line = f.readline()
+            if not line:
+                return
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    raise SerializationError(f"Ошибка разбора JSON: {str(e)}") from e
+
+
+def iter_records(path: str, start: int = 0, end: Optional[int] = None,
+                 is_record: Optional[RecordFilter] = None,
+                 chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Потоково отдаёт записи JSON-массива или файла JSON Lines (*.jsonl).
+
+    start/end — байтовый диапазон шарда: отдаются записи, начинающиеся в
+    [start, end). Для JSON-массива начало записи внутри диапазона ищется по
+    '{' и проверке is_record, поэтому шарды можно читать параллельно.
+    """
+    if path.endswith('.jsonl'):
+        return _iter_lines(path, start, end)
+    return _iter_array(path, start, end, is_record, chunk_size)
+
+
+def split_ranges(path: str, shards: int) -> List[Tuple[int, int]]:
+    """Делит файл на shards байтовых диапазонов примерно равного размера"""
+    size = os.path.getsize(path)
+    shards = max(1, min(shards, size // CHUNK_SIZE or 1))
+    bounds = [size * i // shards for i in range(shards + 1)]
+    return list(zip(bounds[:-1], bounds[1:], strict=True))
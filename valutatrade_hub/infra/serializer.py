@@ -0,0 +1,130 @@
+import functools
+import gzip
+import json
+import os
+import tempfile
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from valutatrade_hub.infra.settings import SettingsLoader
+
+BACKENDS = ('orjson', 'msgspec', 'json')
+FORMATS = ('pretty', 'compact')
+GZIP_LEVEL = 6
+
+
+class SerializationError(ValueError):
+    """Ошибка разбора или сериализации данных"""
+    pass
+
+
+@functools.lru_cache(maxsize=None)
+def _available_backend(preferred: str) -> str:
+    """Первый установленный бэкенд: orjson, затем msgspec, иначе stdlib json"""
+    candidates = BACKENDS if preferred == 'auto' else (preferred, 'json')
+    for backend in candidates:
+        if backend == 'json':
+            return backend
+        try:
+            __import__(backend)
+            return backend
+        except ImportError:
+            continue
+    return 'json'
+
+
+class JsonSerializer:
+    """Сериализация JSON через выбранный бэкенд в читаемом (pretty) или компактном виде"""
+
+    def __init__(self, backend: str = 'json', pretty: bool = True):
+        if backend not in BACKENDS:
+            raise ValueError(f"Неизвестный бэкенд сериализации '{backend}'")
+        self.backend = backend
+        self.pretty = pretty
+        self._dumps, self._loads = self._build(backend, pretty)
+
+    @staticmethod
+    def _build(backend: str, pretty: bool) -> Tuple[Callable, Callable]:
+        if backend == 'orjson':
+            import orjson
+
+            option = orjson.OPT_INDENT_2 if pretty else 0
+            return (lambda obj: orjson.dumps(obj, option=option)), orjson.loads
+
+        if backend == 'msgspec':
+            import msgspec
+
+            encoder = msgspec.json.Encoder()
+            decoder = msgspec.json.Decoder()
+            if pretty:
+                return (lambda obj: msgspec.json.format(encoder.encode(obj), indent=2),
+                        decoder.decode)
+            return encoder.encode, decoder.decode
+
+        if pretty:
+            def dumps(obj: Any) -> bytes:
+                return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+        else:
+            def dumps(obj: Any) -> bytes:
+                return json.dumps(
+                    obj, ensure_ascii=False, separators=(',', ':')
+                ).encode('utf-8')
+        return dumps, json.loads
+
+    def dumps(self, obj: Any) -> bytes:
+        try:
+            return self._dumps(obj)
+        except (TypeError, ValueError) as e:
+            raise SerializationError(f"Ошибка сериализации: {str(e)}") from e
+
+    def loads(self, data: bytes) -> Any:
+        try:
+            return self._loads(data)
+        except Exception as e:
+            raise SerializationError(f"Ошибка разбора JSON: {str(e)}") from e
+
+    def dump_file(self, obj: Any, path: str) -> None:
+        """Атомарная запись: временный файл и os.replace; файлы *.gz сжимаются.
+
+        Имя временного файла уникально для каждого вызова, поэтому потоки
+        одного процесса не пишут в один и тот же файл.
+        """
+        payload = self.dumps(obj)
+        if path.endswith('.gz'):
+            payload = gzip.compress(payload, compresslevel=GZIP_LEVEL)
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(
+            prefix=f"{os.path.basename(path)}.", suffix='.tmp', dir=directory
+        )
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def load_file(self, path: str) -> Any:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            return self.loads(f.read())
+
+
+_serializers: Dict[Tuple[str, bool], JsonSerializer] = {}
+
+
+def get_serializer(path: Optional[str] = None) -> JsonSerializer:
+    """Сериализатор для файла по настройке serialization (формат задаётся по имени файла)"""
+    settings = SettingsLoader().serialization
+    backend = _available_backend(settings['backend'])
+
+    fmt = settings['default_format']
+    if path is not None:
+        fmt = settings['formats'].get(os.path.basename(path), fmt)
+    pretty = fmt != 'compact'
+
+    key = (backend, pretty)
+    serializer = _serializers.get(key)
+    if serializer is None:
+        serializer = _serializers[key] = JsonSerializer(backend, pretty)
+    return serializer
@@ -0,0 +1,123 @@
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from typing import Any, Dict, Optional
+
+from valutatrade_hub.core.models import User
+from valutatrade_hub.infra.serializer import SerializationError, get_serializer
+from valutatrade_hub.infra.settings import SettingsLoader
+
+SECRET_ENV_VAR = "VALUTATRADE_SESSION_SECRET"
+SECRET_FILENAME = ".session_secret"
+# Сколько ждать, пока другой процесс допишет только что созданный файл ключа
+SECRET_WAIT_SECONDS = 1.0
+
+
+class SessionStore:
+    """Самодостаточная сессия CLI, подписанная HMAC-SHA256.
+
+    Запись хранит всё, что нужно командам (id, имя, дата регистрации, срок
+    действия), поэтому проверка сессии не требует чтения users.json.
+    """
+
+    def __init__(self, session_file: str, ttl_seconds: Optional[int] = None):
+        settings = SettingsLoader()
+        self.session_file = session_file
+        self.ttl_seconds = (
+            ttl_seconds if ttl_seconds is not None else settings.session_ttl_seconds
+        )
+        self._secret_path = os.path.join(settings.data_path, SECRET_FILENAME)
+        self._secret: Optional[bytes] = None
+
+    def _get_secret(self) -> bytes:
+        """Ключ подписи: из переменной окружения или из файла в data_path"""
+        if self._secret is not None:
+            return self._secret
+
+        env_secret = os.getenv(SECRET_ENV_VAR)
+        if env_secret:
+            self._secret = env_secret.encode()
+            return self._secret
+
+        secret = self._read_secret()
+        if secret is None:
+            secret = self._create_secret()
+        self._secret = secret
+        return self._secret
+
+    def _read_secret(self) -> Optional[bytes]:
+        """Ключ из файла; None, если файла нет.
+
+        Пустой файл означает, что другой процесс только что создал его и ещё
+        пишет ключ: файл перечитывается до SECRET_WAIT_SECONDS.
+        """
+        deadline = time.monotonic() + SECRET_WAIT_SECONDS
+        while True:
+            try:
+                with open(self._secret_path, 'r', encoding='utf-8') as f:
+                    secret = f.read().strip()
+            except FileNotFoundError:
+                return None
+            if secret:
+                return secret.encode()
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"Файл ключа сессии {self._secret_path} пуст")
+            time.sleep(0.01)
+
+    def _create_secret(self) -> bytes:
+        os.makedirs(os.path.dirname(self._secret_path) or '.', exist_ok=True)
+        secret = secrets.token_hex(32)
+        try:
+            fd = os.open(self._secret_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            # Ключ одновременно создал другой процесс: используется его ключ
+            existing = self._read_secret()
+            if existing is not None:
+                return existing
+            return self._create_secret()
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(secret)
+        return secret.encode()
+
+    def _sign(self, payload: Dict[str, Any]) -> str:
+        message = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+        return hmac.new(self._get_secret(), message.encode(), hashlib.sha256).hexdigest()
+
+    def save(self, user: User) -> None:
+        """Сохраняет подписанную сессию пользователя"""
+        payload = user.get_user_info()
+        payload['expires_at'] = int(time.time()) + self.ttl_seconds
+
+        record = dict(payload, signature=self._sign(payload))
+
+        get_serializer(self.session_file).dump_file(record, self.session_file)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Возвращает проверенную запись сессии или None"""
+        if not os.path.exists(self.session_file):
+            return None
+
+        try:
+            record = get_serializer(self.session_file).load_file(self.session_file)
+        except (OSError, SerializationError):
+            return None
+
+        if not isinstance(record, dict):
+            return None
+
+        signature = record.pop('signature', None)
+        if not signature or not hmac.compare_digest(signature, self._sign(record)):
+            return None
+
+        if record.get('expires_at', 0) < time.time():
+            return None
+
+        return record
+
+    def clear(self) -> None:
+        """Удаляет файл сессии"""
+        if os.path.exists(self.session_file):
+            os.remove(self.session_file)
@@ -47,13 +47,48 @@ class SettingsLoader:
         return {
             "data_path": "data",
             "rates_ttl_seconds": 3600,  
+            "rates_max_staleness_seconds": 86400,
+            "rates_refresh_timeout_seconds": 120,
+            "rates_revalidate": True,
             "default_base_currency": "USD",
+            "session_ttl_seconds": 604800,
             "log_path": "logs",
             "log_format": "json",
             "log_level": "INFO",
             "log_rotation": {
                 "max_bytes": 10485760,  
                 "backup_count": 5
+            },
+            "log_queue": {
+                "enabled": True,
+                "max_size": 10000,
+                "batch_size": 256,
+                "policy": "drop"
+            },
+            "log_actions": {
+                "enabled": True,
+                "sample_rate": 1.0
+            },
+            "profile_top_n": 20,
+            "valuation": {
+                "prewarm": False,
+                "active_days": 7
+            },
+            "serialization": {
+                "backend": "auto",
+                "default_format": "pretty",
+                "formats": {
+                    "exchange_rates.json": "compact",
+                    "exchange_rates_hourly.json": "compact",
+                    "exchange_rates_daily.json": "compact",
+                    "metrics.json": "compact"
+                }
+            },
+            "metrics": {
+                "enabled": True,
+                "file": "metrics.json",
+                "prometheus_file": "metrics.prom",
+                "export_interval_seconds": 60
             }
         }
 
@@ -61,6 +96,10 @@ class SettingsLoader:
         """Получает значение конфигурации по ключу"""
         return self._config.get(key, default)
 
+    def set(self, key: str, value: Any) -> None:
+        """Переопределяет значение конфигурации в памяти (без записи в файл)"""
+        self._config[key] = value
+
     def reload(self) -> None:
         """Перезагружает конфигурацию из файла"""
         self._load_config()
@@ -74,10 +113,30 @@ class SettingsLoader:
     def rates_ttl_seconds(self) -> int:
         return self.get('rates_ttl_seconds', 3600)
 
+    @property
+    def rates_max_staleness_seconds(self) -> int:
+        """Старше этого возраста кэш курсов не отдаётся без обновления"""
+        return self.get('rates_max_staleness_seconds', 86400)
+
+    @property
+    def rates_refresh_timeout_seconds(self) -> int:
+        """Сколько ждать чужого обновления курсов (и когда считать его зависшим)"""
+        return self.get('rates_refresh_timeout_seconds', 120)
+
+    @property
+    def rates_revalidate(self) -> bool:
+        """Обновлять устаревший кэш курсов из get-rate (stale-while-revalidate)"""
+        return self.get('rates_revalidate', True)
+
     @property
     def default_base_currency(self) -> str:
         return self.get('default_base_currency', 'USD')
 
+    @property
+    def session_ttl_seconds(self) -> int:
+        """Срок действия сессии CLI в секундах"""
+        return self.get('session_ttl_seconds', 604800)
+
     @property
     def log_path(self) -> str:
         """Путь к логам"""
@@ -99,3 +158,63 @@ class SettingsLoader:
             "max_bytes": 10485760,  
             "backup_count": 5
         })
+
+    @property
+    def log_queue(self) -> Dict[str, Any]:
+        """Асинхронная запись логов: размер очереди, пачка и политика (drop/block)"""
+        defaults = {
+            "enabled": True,
+            "max_size": 10000,
+            "batch_size": 256,
+            "policy": "drop"
+        }
+        return {**defaults, **self.get('log_queue', {})}
+
+    @property
+    def log_actions(self) -> Dict[str, Any]:
+        """Декоратор log_action: включён ли и доля логируемых успешных вызовов"""
+        defaults = {
+            "enabled": True,
+            "sample_rate": 1.0
+        }
+        return {**defaults, **self.get('log_actions', {})}
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Метрики: файл накопленных значений (в data_path) и экспорт Prometheus (в log_path)"""
+        defaults = {
+            "enabled": True,
+            "file": "metrics.json",
+            "prometheus_file": "metrics.prom",
+            "export_interval_seconds": 60
+        }
+        return {**defaults, **self.get('metrics', {})}
+
+    @property
+    def valuation(self) -> Dict[str, Any]:
+        """Оценки портфелей: прогрев после обновления курсов для недавно смотревших"""
+        defaults = {
+            "prewarm": False,
+            "active_days": 7
+        }
+        return {**defaults, **self.get('valuation', {})}
+
+    @property
+    def profile_top_n(self) -> int:
+        """Сколько функций или мест аллокаций показывать в сводке профиля"""
+        return self.get('profile_top_n', 20)
+
+    @property
+    def serialization(self) -> Dict[str, Any]:
+        """Бэкенд JSON (auto, orjson, msgspec, json) и формат (pretty/compact) по файлам"""
+        defaults = {
+            "backend": "auto",
+            "default_format": "pretty",
+            "formats": {
+                "exchange_rates.json": "compact",
+                "exchange_rates_hourly.json": "compact",
+                "exchange_rates_daily.json": "compact",
+                "metrics.json": "compact"
+            }
+        }
+        return {**defaults, **self.get('serialization', {})}
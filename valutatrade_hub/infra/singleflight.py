@@ -0,0 +1,80 @@
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from valutatrade_hub.infra.filelock import FileLock
+from valutatrade_hub.infra.serializer import SerializationError, get_serializer
+from valutatrade_hub.metrics import MetricsRegistry
+
+
+class SingleFlight:
+    """Объединение одновременных вызовов из разных процессов (single-flight).
+
+    Вызов выполняет процесс, захвативший блокировку lock_path; результат
+    сохраняется в result_path вместе с ключом вызова. Остальные дожидаются
+    освобождения блокировки и берут этот результат, если он получен после
+    начала их ожидания и его ключ покрывает их собственный; иначе (например,
+    ведущий вызов упал) выполняют вызов сами.
+    """
+
+    def __init__(self, name: str, lock_path: str, result_path: str, timeout: float):
+        self.name = name
+        self.lock_path = lock_path
+        self.result_path = result_path
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+        self.metrics = MetricsRegistry()
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.result_path):
+            return None
+        try:
+            record = get_serializer(self.result_path).load_file(self.result_path)
+        except (OSError, SerializationError):
+            return None
+        return record if isinstance(record, dict) else None
+
+    def _shared(self, key: Iterable[str], since: float) -> Optional[Dict[str, Any]]:
+        """Результат ведущего вызова, завершившегося после since и покрывающего key"""
+        record = self._load()
+        if record is None or record.get('finished_at', 0) < since:
+            return None
+        if not set(key) <= set(record.get('key', [])):
+            return None
+        return record.get('result')
+
+    def _store(self, key: Iterable[str], result: Dict[str, Any]) -> None:
+        record = {'key': sorted(key), 'finished_at': time.time(), 'result': result}
+        try:
+            get_serializer(self.result_path).dump_file(record, self.result_path)
+        except (OSError, SerializationError) as e:
+            self.logger.warning(f"Не удалось сохранить результат {self.name}: {str(e)}")
+
+    def run(self, key: Iterable[str],
+            call: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+        """Выполняет call или дожидается чужого; (результат, получен ли он от другого процесса)"""
+        key = list(key)
+        since = time.time()
+        lock = FileLock(self.lock_path)
+        if not lock.acquire(timeout=0):
+            self.logger.info(f"{self.name} уже выполняется другим процессом, ожидание результата")
+            if not lock.acquire(timeout=self.timeout):
+                raise TimeoutError(
+                    f"{self.name} в другом процессе не завершено за {self.timeout:.0f} с"
+                )
+            result = self._shared(key, since)
+            if result is not None:
+                lock.release()
+                self.metrics.counter('valutatrade_single_flight_total', operation=self.name,
+                                     role='follower').inc()
+                return result, True
+
+        try:
+            self.metrics.counter('valutatrade_single_flight_total', operation=self.name,
+                                 role='leader').inc()
+            result = call()
+            self._store(key, result)
+            return result, False
+        finally:
+            lock.release()
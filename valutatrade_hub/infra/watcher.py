@@ -0,0 +1,75 @@
+import os
+import time
+from typing import Optional, Tuple
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+Stamp = Optional[Tuple[int, int]]
+
+
+def file_stamp(path: str) -> Stamp:
+    """Отпечаток файла (mtime и размер) или None, если файла нет"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileWatcher:
+    """Ожидание изменений файла: inotify (если установлен inotify_simple) или опрос mtime.
+
+    С inotify процесс спит в read() до события в каталоге файла и не тратит CPU;
+    наблюдается каталог, потому что файлы данных заменяются через os.replace.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 1.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.stamp = file_stamp(path)
+        self._inotify = None
+        if inotify_simple is not None:
+            try:
+                self._inotify = inotify_simple.INotify()
+                flags = inotify_simple.flags
+                self._inotify.add_watch(
+                    os.path.dirname(os.path.abspath(path)),
+                    flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE | flags.DELETE
+                )
+            except OSError:
+                self._inotify = None
+
+    @property
+    def backend(self) -> str:
+        return 'inotify' if self._inotify is not None else 'poll'
+
+    def _sleep(self) -> None:
+        if self._inotify is None:
+            time.sleep(self.poll_interval)
+            return
+        name = os.path.basename(self.path)
+        while not any(event.name == name for event in self._inotify.read()):
+            pass
+
+    def wait(self) -> Stamp:
+        """Блокирует до изменения файла и возвращает его новый отпечаток"""
+        while True:
+            self._sleep()
+            stamp = file_stamp(self.path)
+            if stamp != self.stamp:
+                self.stamp = stamp
+                return stamp
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def __enter__(self) -> 'FileWatcher':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -1,23 +1,34 @@
+import atexit
 import json
 import logging
 import logging.handlers
 import os
+import queue
+from typing import List, Optional
 
 from valutatrade_hub.infra.settings import SettingsLoader
 
+_listener: Optional['BatchingQueueListener'] = None
+_queue_handler: Optional['BoundedQueueHandler'] = None
+_root_handlers: List[logging.Handler] = []
+
 
 def setup_logging() -> None:
     """Настройка логов"""
+    global _listener, _queue_handler
+
+    if _root_handlers:
+        return
+
     settings = SettingsLoader()
 
     log_path = settings.log_path
     os.makedirs(log_path, exist_ok=True)
 
     log_level = getattr(logging, settings.log_level.upper(), logging.INFO)
-    logging.basicConfig(level=log_level)
 
     log_file = os.path.join(log_path, 'actions.log')
-    file_handler = logging.handlers.RotatingFileHandler(
+    file_handler = BatchingFileHandler(
         log_file,
         maxBytes=settings.log_rotation['max_bytes'],
         backupCount=settings.log_rotation['backup_count'],
@@ -35,16 +46,165 @@ def setup_logging() -> None:
     file_handler.setFormatter(formatter)
     file_handler.setLevel(log_level)
 
+    # В консоль — только предупреждения и ошибки, как и без настройки логов
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.WARNING)
+
+    queue_settings = settings.log_queue
+    if queue_settings['enabled']:
+        log_queue: queue.Queue = queue.Queue(maxsize=queue_settings['max_size'])
+        _queue_handler = BoundedQueueHandler(log_queue, queue_settings['policy'])
+        _listener = BatchingQueueListener(
+            log_queue,
+            file_handler,
+            batch_size=queue_settings['batch_size'],
+            respect_handler_level=True
+        )
+        _listener.start()
+        _root_handlers.extend([console_handler, _queue_handler])
+    else:
+        _root_handlers.extend([console_handler, file_handler])
+
     root_logger = logging.getLogger()
-    root_logger.addHandler(file_handler)
+    root_logger.setLevel(log_level)
+    for handler in _root_handlers:
+        root_logger.addHandler(handler)
+    atexit.register(shutdown_logging)
 
     logging.getLogger('urllib3').setLevel(logging.WARNING)
     logging.getLogger('requests').setLevel(logging.WARNING)
 
 
+def shutdown_logging() -> None:
+    """Сбрасывает очередь логов на диск и снимает обработчики setup_logging"""
+    global _listener, _queue_handler
+
+    if not _root_handlers:
+        return
+
+    root_logger = logging.getLogger()
+    for handler in _root_handlers:
+        root_logger.removeHandler(handler)
+
+    dropped = 0
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        dropped = _queue_handler.dropped
+
+    for handler in _root_handlers:
+        if handler is not _queue_handler:
+            handler.close()
+
+    _root_handlers.clear()
+    _listener = None
+    _queue_handler = None
+    atexit.unregister(shutdown_logging)
+
+    if dropped:
+        logging.getLogger(__name__).warning(
+            f"Из-за переполнения очереди потеряно записей лога: {dropped}"
+        )
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler с ограниченной очередью и политикой переполнения.
+
+    policy='drop' — запись отбрасывается и учитывается в счётчике dropped,
+    policy='block' — вызывающий поток ждёт освобождения места.
+    """
+
+    def __init__(self, log_queue: queue.Queue, policy: str = 'drop'):
+        super().__init__(log_queue)
+        if policy not in ('drop', 'block'):
+            raise ValueError(f"Неизвестная политика очереди логов: '{policy}'")
+        self.policy = policy
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.policy == 'block':
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler, сбрасывающий буфер на диск один раз на пачку записей"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._in_batch = False
+
+    def flush(self) -> None:
+        if not self._in_batch:
+            super().flush()
+
+    def handle_batch(self, records: List[logging.LogRecord]) -> None:
+        self._in_batch = True
+        try:
+            for record in records:
+                if record.levelno >= self.level:
+                    self.handle(record)
+        finally:
+            self._in_batch = False
+            self.flush()
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """QueueListener, забирающий из очереди до batch_size записей за раз"""
+
+    def __init__(self, log_queue: queue.Queue, *handlers,
+                 batch_size: int = 256, respect_handler_level: bool = False):
+        super().__init__(log_queue, *handlers,
+                         respect_handler_level=respect_handler_level)
+        self.batch_size = max(1, batch_size)
+
+    def enqueue_sentinel(self) -> None:
+        # Блокирующая вставка: при заполненной очереди put_nowait упал бы
+        self.queue.put(self._sentinel)
+
+    def _drain(self, first: logging.LogRecord) -> List[logging.LogRecord]:
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.dequeue(False))
+            except queue.Empty:
+                break
+        return batch
+
+    def _monitor(self) -> None:
+        stop = False
+        while not stop:
+            batch = self._drain(self.dequeue(True))
+            if self._sentinel in batch:
+                batch = [r for r in batch if r is not self._sentinel]
+                stop = True
+
+            records = [self.prepare(r) for r in batch]
+            for handler in self.handlers:
+                if isinstance(handler, BatchingFileHandler):
+                    handler.handle_batch(records)
+                    continue
+                for record in records:
+                    if not self.respect_handler_level or record.levelno >= handler.level:
+                        handler.handle(record)
+
+            for _ in range(len(batch) + int(stop)):
+                self.queue.task_done()
+
+
 class JsonFormatter(logging.Formatter):
     """Форматирование логов в JSON"""
 
+    EXTRA_FIELDS = (
+        'action', 'user_id', 'username', 'currency_code', 'amount', 'rate',
+        'base', 'result', 'error_type', 'error_message'
+    )
+
     def format(self, record: logging.LogRecord) -> str:
         log_entry = {
             'timestamp': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
@@ -53,23 +213,8 @@ class JsonFormatter(logging.Formatter):
             'message': record.getMessage()
         }
 
-        if hasattr(record, 'action'):
-            log_entry['action'] = record.action
-        if hasattr(record, 'username'):
-            log_entry['username'] = record.username
-        if hasattr(record, 'currency_code'):
-            log_entry['currency_code'] = record.currency_code
-        if hasattr(record, 'amount'):
-            log_entry['amount'] = record.amount
-        if hasattr(record, 'rate'):
-            log_entry['rate'] = record.rate
-        if hasattr(record, 'base'):
-            log_entry['base'] = record.base
-        if hasattr(record, 'result'):
-            log_entry['result'] = record.result
-        if hasattr(record, 'error_type'):
-            log_entry['error_type'] = record.error_type
-        if hasattr(record, 'error_message'):
-            log_entry['error_message'] = record.error_message
+        for field in self.EXTRA_FIELDS:
+            if hasattr(record, field):
+                log_entry[field] = getattr(record, field)
 
         return json.dumps(log_entry, ensure_ascii=False)
@@ -0,0 +1,301 @@
+import atexit
+import bisect
+import contextlib
+import functools
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from valutatrade_hub.infra.filelock import FileLock
+from valutatrade_hub.infra.serializer import SerializationError, get_serializer
+from valutatrade_hub.infra.settings import SettingsLoader
+
+# Границы корзин гистограмм задержек, секунды
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+LabelsKey = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    """Монотонный счётчик"""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def percentile(self, q: float) -> float:
+        """Оценка перцентиля линейной интерполяцией внутри корзины"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else lower
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """Синглтон с метриками процесса: счётчики и гистограммы задержек.
+
+    Метрики процесса периодически (и при выходе) добавляются в общий файл
+    metrics.json, из которого читают команда stats и экспорт для Prometheus.
+    """
+
+    _instance: Optional['MetricsRegistry'] = None
+    _initialized: bool = False
+
+    def __new__(cls) -> 'MetricsRegistry':
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            settings = SettingsLoader()
+            self.enabled = settings.metrics['enabled']
+            self.file_path = os.path.join(settings.data_path, settings.metrics['file'])
+            self._lock = threading.Lock()
+            self._counters: Dict[Tuple[str, LabelsKey], Counter] = {}
+            self._histograms: Dict[Tuple[str, LabelsKey], Histogram] = {}
+            self._persisted: Dict[str, Any] = {'counters': {}, 'histograms': {}}
+            self.__class__._initialized = True
+
+    def counter(self, name: str, **labels: str) -> Counter:
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._counters.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._counters.setdefault(key, Counter())
+        return metric
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._histograms.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._histograms.setdefault(key, Histogram())
+        return metric
+
+    def percentile(self, name: str, q: float, min_count: int = 1,
+                   **labels: str) -> Optional[float]:
+        """Перцентиль гистограммы процесса, а при нехватке наблюдений — накопленной
+        всеми процессами; None, если наблюдений меньше min_count"""
+        histogram = self.histogram(name, **labels)
+        if histogram.count < min_count:
+            key = _encode_key((name, tuple(sorted(labels.items()))))
+            data = self.load_persisted()['histograms'].get(key)
+            if data is None or data['count'] < min_count:
+                return None
+            histogram = histogram_from_dict(data)
+        return histogram.percentile(q)
+
+    @contextlib.contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """Замеряет длительность блока в {name}_duration_seconds.
+
+        При исключении дополнительно увеличивает счётчик {name}_errors_total.
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.counter(f"{name}_errors_total", **labels).inc()
+            raise
+        finally:
+            self.histogram(f"{name}_duration_seconds", **labels).observe(
+                time.perf_counter() - start
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Метрики процесса в сериализуемом виде"""
+        with self._lock:
+            counters = {
+                _encode_key(key): metric.value for key, metric in self._counters.items()
+            }
+            histograms = {
+                _encode_key(key): {
+                    'buckets': list(metric.buckets),
+                    'counts': list(metric.counts),
+                    'sum': metric.sum,
+                    'count': metric.count,
+                }
+                for key, metric in self._histograms.items()
+            }
+        return {'counters': counters, 'histograms': histograms}
+
+    def persist(self) -> Dict[str, Any]:
+        """Добавляет прирост метрик с прошлого сохранения в общий файл.
+
+        Чтение, слияние и запись идут под файловой блокировкой: процессы CLI и
+        планировщик сохраняют метрики одновременно и не должны терять прирост.
+        """
+        current = self.snapshot()
+        delta = _subtract(current, self._persisted)
+
+        with FileLock(f"{self.file_path}.lock"):
+            totals = self.load_persisted()
+            _merge_into(totals, delta)
+            get_serializer(self.file_path).dump_file(totals, self.file_path)
+
+        self._persisted = current
+        return totals
+
+    def persist_on_exit(self) -> None:
+        """Сохраняет метрики процесса при его завершении"""
+        if self.enabled:
+            atexit.register(self._persist_silently)
+
+    def _persist_silently(self) -> None:
+        try:
+            self.persist()
+        except OSError:
+            pass
+
+    def load_persisted(self) -> Dict[str, Any]:
+        """Накопленные метрики всех процессов"""
+        if not os.path.exists(self.file_path):
+            return {'counters': {}, 'histograms': {}}
+        try:
+            return get_serializer(self.file_path).load_file(self.file_path)
+        except (OSError, SerializationError):
+            return {'counters': {}, 'histograms': {}}
+
+    def write_prometheus(self, path: str, data: Optional[Dict[str, Any]] = None) -> None:
+        """Записывает метрики в текстовом формате Prometheus"""
+        text = to_prometheus(data if data is not None else self.load_persisted())
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+
+
+def timed(name: str, **labels: str) -> Callable:
+    """Декоратор: гистограмма длительности вызова и счётчик ошибок"""
+    def decorator(func: Callable) -> Callable:
+        registry = MetricsRegistry()
+        if not registry.enabled:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            with registry.timer(name, **labels):
+                return func(*args, **kwargs)
+
+        return wrapper
+    return decorator
+
+
+def _encode_key(key: Tuple[str, LabelsKey]) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+def split_key(key: str) -> Tuple[str, str]:
+    """Разбивает ключ метрики на имя и строку меток"""
+    if '{' not in key:
+        return key, ''
+    name, labels = key.split('{', 1)
+    return name, labels.rstrip('}')
+
+
+def _subtract(current: Dict[str, Any], previous: Dict[str, Any]) -> Dict[str, Any]:
+    counters = {
+        key: value - previous['counters'].get(key, 0.0)
+        for key, value in current['counters'].items()
+    }
+    histograms = {}
+    for key, hist in current['histograms'].items():
+        prev = previous['histograms'].get(key)
+        if prev is None:
+            histograms[key] = hist
+            continue
+        histograms[key] = {
+            'buckets': hist['buckets'],
+            'counts': [a - b for a, b in zip(hist['counts'], prev['counts'], strict=True)],
+            'sum': hist['sum'] - prev['sum'],
+            'count': hist['count'] - prev['count'],
+        }
+    return {'counters': counters, 'histograms': histograms}
+
+
+def _merge_into(totals: Dict[str, Any], delta: Dict[str, Any]) -> None:
+    for key, value in delta['counters'].items():
+        totals['counters'][key] = totals['counters'].get(key, 0.0) + value
+    for key, hist in delta['histograms'].items():
+        target = totals['histograms'].get(key)
+        if target is None or target['buckets'] != hist['buckets']:
+            totals['histograms'][key] = dict(hist, counts=list(hist['counts']))
+            continue
+        target['counts'] = [a + b for a, b in zip(target['counts'], hist['counts'], strict=True)]
+        target['sum'] += hist['sum']
+        target['count'] += hist['count']
+
+
+def histogram_from_dict(data: Dict[str, Any]) -> Histogram:
+    """Восстанавливает гистограмму из сохранённого вида"""
+    hist = Histogram(tuple(data['buckets']))
+    hist.counts = list(data['counts'])
+    hist.sum = data['sum']
+    hist.count = data['count']
+    return hist
+
+
+def to_prometheus(data: Dict[str, Any]) -> str:
+    """Текстовый формат экспозиции Prometheus"""
+    lines: List[str] = []
+    typed = set()
+
+    for key, value in sorted(data['counters'].items()):
+        name, labels = split_key(key)
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{key} {value:g}")
+
+    for key, hist in sorted(data['histograms'].items()):
+        name, labels = split_key(key)
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        prefix = labels + ',' if labels else ''
+        cumulative = 0
+        for bound, count in zip(hist['buckets'], hist['counts'][:-1], strict=True):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {hist["count"]}')
+        suffix = '{' + labels + '}' if labels else ''
+        lines.append(f"{name}_sum{suffix} {hist['sum']:.6f}")
+        lines.append(f"{name}_count{suffix} {hist['count']}")
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,258 @@
+import bisect
+import os
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from valutatrade_hub.infra.filelock import FileLock
+from valutatrade_hub.infra.serializer import JsonSerializer, get_serializer
+from valutatrade_hub.infra.watcher import file_stamp
+from valutatrade_hub.metrics import MetricsRegistry
+from valutatrade_hub.parser_service.config import ParserConfig
+from valutatrade_hub.parser_service.retention import (
+    format_timestamp,
+    pair_key,
+    parse_timestamp,
+    utc_now,
+)
+from valutatrade_hub.parser_service.storage import RatesStorage
+
+THRESHOLD_TYPES = ('above', 'below', 'cross')
+RULE_TYPES = THRESHOLD_TYPES + ('change',)
+
+SortedRules = Tuple[List[float], List[Dict[str, Any]]]
+
+
+class AlertStore:
+    """Правила оповещений (JSON) и журнал сработавших оповещений (JSON Lines).
+
+    Любое изменение файла правил перечитывает его под межпроцессной
+    блокировкой, поэтому правки CLI и планировщика не затирают друг друга.
+    """
+
+    def __init__(self, config: ParserConfig):
+        self.rules_path = config.ALERTS_FILE_PATH
+        self.log_path = config.ALERTS_LOG_PATH
+
+    def load_rules(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.rules_path):
+            return []
+        return get_serializer(self.rules_path).load_file(self.rules_path)
+
+    def save_rules(self, rules: List[Dict[str, Any]]) -> None:
+        get_serializer(self.rules_path).dump_file(rules, self.rules_path)
+
+    def _lock(self) -> FileLock:
+        return FileLock(f"{self.rules_path}.lock")
+
+    def add_rule(self, pair: str, rule_type: str, value: float,
+                 window_seconds: Optional[int] = None) -> Dict[str, Any]:
+        """Добавляет правило: порог (above/below/cross) или изменение в % за окно"""
+        if rule_type not in RULE_TYPES:
+            raise ValueError(f"Неизвестный тип правила '{rule_type}'")
+        if rule_type == 'change' and (not window_seconds or value <= 0):
+            raise ValueError("Для правила изменения нужны положительные процент и окно")
+
+        with self._lock():
+            rules = self.load_rules()
+            rule = {
+                "id": max((r['id'] for r in rules), default=0) + 1,
+                "pair": pair.upper(),
+                "type": rule_type,
+                "value": value,
+                "created_at": format_timestamp(utc_now()),
+            }
+            if rule_type == 'change':
+                rule["window_seconds"] = window_seconds
+            rules.append(rule)
+            self.save_rules(rules)
+        return rule
+
+    def remove_rule(self, rule_id: int) -> bool:
+        with self._lock():
+            rules = self.load_rules()
+            remaining = [r for r in rules if r['id'] != rule_id]
+            if len(remaining) == len(rules):
+                return False
+            self.save_rules(remaining)
+        return True
+
+    def mark_fired(self, fired_at: Dict[int, str]) -> None:
+        """Сохраняет время последнего срабатывания правил (id -> время), не трогая остальные"""
+        with self._lock():
+            rules = self.load_rules()
+            for rule in rules:
+                if rule['id'] in fired_at:
+                    rule['last_fired_at'] = fired_at[rule['id']]
+            self.save_rules(rules)
+
+    def append_notifications(self, notifications: List[Dict[str, Any]]) -> None:
+        """Дописывает оповещения в журнал, по одной JSON-строке на оповещение"""
+        if not notifications:
+            return
+        serializer = JsonSerializer(get_serializer(self.log_path).backend, pretty=False)
+        os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+        with open(self.log_path, 'ab') as f:
+            f.write(b''.join(serializer.dumps(n) + b'\n' for n in notifications))
+
+    def recent_notifications(self, limit: int = 20) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.log_path):
+            return []
+        serializer = get_serializer(self.log_path)
+        with open(self.log_path, 'rb') as f:
+            lines = deque((line for line in f if line.strip()), maxlen=limit)
+        return [serializer.loads(line) for line in lines]
+
+
+class AlertEngine:
+    """Инкрементальная проверка правил оповещений при каждом обновлении курсов.
+
+    Пороговые правила хранятся по парам в отсортированных списках, поэтому при
+    изменении курса с old на new проверяются только пороги, которых курс
+    достиг: (old, new] при росте и [new, old) при падении — двоичным поиском,
+    без перебора всех правил. Для правил
+    изменения за окно по каждой паре и окну ведётся кольцевой буфер курсов,
+    а проценты правил отсортированы: срабатывают все с порогом не больше
+    фактического изменения. Правило изменения срабатывает не чаще раза за окно.
+    """
+
+    def __init__(self, config: ParserConfig, storage: RatesStorage,
+                 store: Optional[AlertStore] = None):
+        self.storage = storage
+        self.store = store or AlertStore(config)
+        self.buffer_size = config.ALERTS_BUFFER_SIZE
+        self.metrics = MetricsRegistry()
+        self._stamp = None
+        self._rules: List[Dict[str, Any]] = []
+        # pair -> (отсортированные пороги, правила в том же порядке)
+        self._thresholds: Dict[str, SortedRules] = {}
+        # pair -> окно в секундах -> (отсортированные проценты, правила)
+        self._changes: Dict[str, Dict[int, SortedRules]] = {}
+        # pair -> окно в секундах -> кольцевой буфер (время, курс)
+        self._buffers: Dict[str, Dict[int, Deque[Tuple[datetime, float]]]] = {}
+
+    @staticmethod
+    def _sorted(rules: List[Dict[str, Any]]) -> SortedRules:
+        rules = sorted(rules, key=lambda r: r['value'])
+        return [r['value'] for r in rules], rules
+
+    def _refresh(self) -> None:
+        """Перестраивает индексы и буферы, если файл правил изменился"""
+        stamp = file_stamp(self.store.rules_path)
+        if stamp == self._stamp:
+            return
+        self._stamp = stamp
+        self._rules = self.store.load_rules()
+
+        thresholds: Dict[str, List[Dict[str, Any]]] = {}
+        changes: Dict[str, Dict[int, List[Dict[str, Any]]]] = {}
+        for rule in self._rules:
+            if rule['type'] == 'change':
+                windows = changes.setdefault(rule['pair'], {})
+                windows.setdefault(rule['window_seconds'], []).append(rule)
+            else:
+                thresholds.setdefault(rule['pair'], []).append(rule)
+
+        self._thresholds = {pair: self._sorted(rules) for pair, rules in thresholds.items()}
+        self._changes = {
+            pair: {window: self._sorted(rules) for window, rules in windows.items()}
+            for pair, windows in changes.items()
+        }
+        self._seed_buffers()
+
+    def _seed_buffers(self) -> None:
+        """Заполняет кольцевые буферы окон из истории курсов"""
+        self._buffers = {
+            pair: {window: deque(maxlen=self.buffer_size) for window in windows}
+            for pair, windows in self._changes.items()
+        }
+        if not self._changes:
+            return
+
+        longest = max(window for windows in self._changes.values() for window in windows)
+        start = utc_now() - timedelta(seconds=longest)
+        history = self.storage.get_history(start=start, pairs=set(self._changes))
+        for record in sorted(history, key=lambda r: r['timestamp']):
+            self._observe(pair_key(record), parse_timestamp(record['timestamp']),
+                          record['rate'])
+
+    def _observe(self, pair: str, moment: datetime, rate: float) -> None:
+        for window, buffer in self._buffers.get(pair, {}).items():
+            buffer.append((moment, rate))
+            # Самая старая точка — последняя не позже начала окна (база для изменения)
+            horizon = moment - timedelta(seconds=window)
+            while len(buffer) > 1 and buffer[1][0] <= horizon:
+                buffer.popleft()
+
+    def _crossed(self, pair: str, old: float, new: float,
+                 timestamp: str) -> List[Dict[str, Any]]:
+        index = self._thresholds.get(pair)
+        if index is None or old == new:
+            return []
+        values, rules = index
+        if new > old:
+            direction = 'above'
+            first, last = bisect.bisect_right(values, old), bisect.bisect_right(values, new)
+        else:
+            direction = 'below'
+            first, last = bisect.bisect_left(values, new), bisect.bisect_left(values, old)
+
+        fired = []
+        for rule in rules[first:last]:
+            if rule['type'] in ('cross', direction):
+                arrow = "выше" if direction == 'above' else "ниже"
+                fired.append({
+                    "rule_id": rule['id'], "pair": pair, "type": rule['type'],
+                    "message": f"{pair} {arrow} {rule['value']}: {old} → {new}",
+                    "previous": old, "rate": new, "timestamp": timestamp,
+                })
+        return fired
+
+    def _changed(self, pair: str, moment: datetime, new: float,
+                 timestamp: str) -> List[Dict[str, Any]]:
+        fired = []
+        for window, (values, rules) in self._changes.get(pair, {}).items():
+            buffer = self._buffers[pair][window]
+            if len(buffer) < 2 or not buffer[0][1]:
+                continue
+            baseline = buffer[0][1]
+            change = (new - baseline) / baseline * 100
+            for rule in rules[:bisect.bisect_right(values, abs(change))]:
+                last = rule.get('last_fired_at')
+                if last and moment - parse_timestamp(last) < timedelta(seconds=window):
+                    continue
+                rule['last_fired_at'] = timestamp
+                fired.append({
+                    "rule_id": rule['id'], "pair": pair, "type": 'change',
+                    "message": (f"{pair} изменился на {change:+.2f}% "
+                                f"за {window} с: {baseline} → {new}"),
+                    "previous": baseline, "rate": new, "timestamp": timestamp,
+                })
+        return fired
+
+    def evaluate(self, previous: Dict[str, float], current: Dict[str, float],
+                 timestamp: str) -> List[Dict[str, Any]]:
+        """Проверяет правила по новым курсам, пишет сработавшие в журнал и возвращает их"""
+        self._refresh()
+        if not self._rules:
+            return []
+
+        moment = parse_timestamp(timestamp)
+        fired = []
+        for pair, rate in current.items():
+            if pair in previous:
+                fired.extend(self._crossed(pair, previous[pair], rate, timestamp))
+            self._observe(pair, moment, rate)
+            fired.extend(self._changed(pair, moment, rate, timestamp))
+
+        if fired:
+            self.store.append_notifications(fired)
+            fired_at = {n['rule_id']: n['timestamp'] for n in fired if n['type'] == 'change'}
+            if fired_at:
+                # Файл правил мог измениться с момента чтения: меняются только
+                # сработавшие правила, а индексы перестроятся при следующей проверке
+                self.store.mark_fired(fired_at)
+            for notification in fired:
+                self.metrics.counter('valutatrade_alerts_fired_total',
+                                     type=notification['type']).inc()
+        return fired
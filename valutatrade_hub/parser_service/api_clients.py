@@ -1,9 +1,15 @@
+import logging
+import math
 from abc import ABC, abstractmethod
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
 import requests
 
+from valutatrade_hub.core.matrix import encode_vector
+from valutatrade_hub.metrics import timed
 from valutatrade_hub.parser_service.config import ParserConfig
+from valutatrade_hub.parser_service.ratelimit import RateLimiter, RateLimitExceeded
 
 
 class ApiRequestError(Exception):
@@ -16,6 +22,29 @@ class BaseApiClient(ABC):
 
     def __init__(self, config: ParserConfig):
         self.config = config
+        # Полный вектор курсов от базы, если провайдер его вернул (см. core.matrix)
+        self.last_vector: Optional[Dict[str, Any]] = None
+        # Провайдер, ответивший на последний запрос, если клиент объединяет несколько
+        self.last_source: Optional[str] = None
+        self.limiter = RateLimiter(config)
+
+    def _acquire(self, provider: str) -> None:
+        """Разрешение лимита provider на очередной запрос (см. ratelimit.RateLimiter)"""
+        try:
+            self.limiter.acquire(provider)
+        except RateLimitExceeded as e:
+            raise ApiRequestError(str(e)) from e
+
+    def _check_rate_limited(self, provider: str,
+                            response: Optional[requests.Response]) -> None:
+        """После ответа 429 приостанавливает запросы к provider на Retry-After"""
+        if response is None or response.status_code != 429:
+            return
+        try:
+            retry_after = float(response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            retry_after = None
+        self.limiter.block(provider, retry_after)
 
     @abstractmethod
     def fetch_rates(self) -> Dict[str, float]:
@@ -23,59 +52,193 @@ class BaseApiClient(ABC):
         pass
 
 
-class CoinGeckoClient(BaseApiClient):
+def chunk_ids(ids: Sequence[str], max_length: int) -> List[List[str]]:
+    """Делит идентификаторы на группы, у которых ",".join(группа) не длиннее max_length"""
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    length = 0
+    for item in ids:
+        extra = len(item) + (1 if current else 0)
+        if current and length + extra > max_length:
+            chunks.append(current)
+            current, length = [], 0
+            extra = len(item)
+        current.append(item)
+        length += extra
+    if current:
+        chunks.append(current)
+    return chunks
 
-    def fetch_rates(self) -> Dict[str, float]:
-        """Получить курсы криптовалют от CoinGecko"""
-        crypto_ids = [self.config.CRYPTO_ID_MAP[code]
-                     for code in self.config.CRYPTO_CURRENCIES
-                     if code in self.config.CRYPTO_ID_MAP]
 
-        params = {
-            "ids": ",".join(crypto_ids),
-            "vs_currencies": self.config.BASE_CURRENCY.lower()
-        }
+class JsonApiClient(BaseApiClient):
+    """Клиент HTTP API с ответами в JSON; provider — имя провайдера в сообщениях"""
+
+    provider = "API"
 
+    def __init__(self, config: ParserConfig):
+        super().__init__(config)
+        self.logger = logging.getLogger(__name__)
+
+    def _get(self, url: str, params: Dict[str, Any]) -> Any:
+        self._acquire(self.provider)
         try:
-            response = requests.get(
-                self.config.COINGECKO_URL,
-                params=params,
-                timeout=self.config.REQUEST_TIMEOUT
-            )
+            response = requests.get(url, params=params, timeout=self.config.REQUEST_TIMEOUT)
             response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            self._check_rate_limited(self.provider, e.response)
+            raise ApiRequestError(f"Ошибка запроса к {self.provider}: {str(e)}") from e
+        except ValueError as e:
+            raise ApiRequestError(
+                f"Ошибка обработки данных от {self.provider}: {str(e)}"
+            ) from e
 
-            data = response.json()
-            rates = {}
+    def _fetch_all(self, fetch: Callable[[Any], Any], tasks: List[Any],
+                   max_workers: int) -> List[Any]:
+        """Выполняет запросы параллельно; ошибка, только если не удался ни один"""
+        if len(tasks) == 1:
+            return [fetch(tasks[0])]
 
-            for code, gecko_id in self.config.CRYPTO_ID_MAP.items():
-                if gecko_id in data:
-                    rate = data[gecko_id].get(self.config.BASE_CURRENCY.lower())
-                    if rate is not None:
-                        pair = f"{code}_{self.config.BASE_CURRENCY}"
-                        rates[pair] = float(rate)
+        def attempt(task: Any) -> Any:
+            try:
+                return fetch(task)
+            except ApiRequestError as e:
+                return e
 
-            return rates
+        workers = max(1, min(max_workers, len(tasks)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(attempt, tasks))
 
-        except requests.exceptions.RequestException as e:
-            raise ApiRequestError(f"Ошибка запроса к CoinGecko: {str(e)}") from e
-        except (ValueError, KeyError) as e:
+        errors = [r for r in results if isinstance(r, ApiRequestError)]
+        if errors and len(errors) == len(results):
+            raise errors[0]
+        for error in errors:
+            self.logger.warning(f"Часть запросов к {self.provider} не выполнена: {str(error)}")
+        return [r for r in results if not isinstance(r, ApiRequestError)]
+
+
+class CoinGeckoClient(JsonApiClient):
+    """Клиент CoinGecko: идентификаторы делятся на группы и запрашиваются параллельно"""
+
+    provider = "CoinGecko"
+
+    @timed("valutatrade_api_fetch", source="CoinGecko")
+    def fetch_rates(self) -> Dict[str, float]:
+        """Получить курсы криптовалют от CoinGecko"""
+        codes_by_id: Dict[str, List[str]] = {}
+        for code in self.config.CRYPTO_CURRENCIES:
+            if code in self.config.CRYPTO_ID_MAP:
+                codes_by_id.setdefault(self.config.CRYPTO_ID_MAP[code], []).append(code)
+        if not codes_by_id:
+            return {}
+
+        base = self.config.BASE_CURRENCY.lower()
+
+        def fetch_chunk(ids: List[str]) -> Dict[str, Any]:
+            return self._get(self.config.COINGECKO_URL,
+                             {"ids": ",".join(ids), "vs_currencies": base})
+
+        chunks = chunk_ids(sorted(codes_by_id), self.config.COINGECKO_MAX_IDS_LENGTH)
+        rates = {}
+        try:
+            for data in self._fetch_all(fetch_chunk, chunks, self.config.COINGECKO_MAX_WORKERS):
+                for gecko_id, prices in data.items():
+                    rate = prices.get(base)
+                    if rate is None:
+                        continue
+                    for code in codes_by_id.get(gecko_id, []):
+                        rates[f"{code}_{self.config.BASE_CURRENCY}"] = float(rate)
+        except (AttributeError, TypeError, ValueError) as e:
             raise ApiRequestError(
                 f"Ошибка обработки данных от CoinGecko: {str(e)}"
             ) from e
+        return rates
+
+    @timed("valutatrade_api_fetch", source="CoinGecko-markets")
+    def fetch_universe(self, limit: int) -> List[Dict[str, Any]]:
+        """Топ limit монет по капитализации: код, название, id CoinGecko, капитализация"""
+        per_page = min(250, max(1, limit))
+        pages = list(range(1, math.ceil(limit / per_page) + 1))
+
+        def fetch_page(page: int) -> List[Dict[str, Any]]:
+            return self._get(self.config.COINGECKO_MARKETS_URL, {
+                "vs_currency": self.config.BASE_CURRENCY.lower(),
+                "order": "market_cap_desc",
+                "per_page": per_page,
+                "page": page,
+            })
+
+        pages = self._fetch_all(fetch_page, pages, self.config.COINGECKO_MAX_WORKERS)
+        coins = [coin for page in pages for coin in page]
+        coins.sort(key=lambda coin: coin.get('market_cap') or 0, reverse=True)
+        return [
+            {
+                "kind": "crypto",
+                "code": str(coin['symbol']).upper(),
+                "name": coin.get('name') or coin['id'],
+                "coingecko_id": coin['id'],
+                "market_cap": coin.get('market_cap') or 0.0,
+            }
+            for coin in coins[:limit]
+        ]
+
+
+class CryptoCompareClient(JsonApiClient):
+    """Клиент CryptoCompare (pricemulti): резервный источник курсов криптовалют.
+
+    Монеты запрашиваются по тикерам, поэтому идентификаторы CoinGecko не нужны.
+    """
+
+    provider = "CryptoCompare"
+
+    @timed("valutatrade_api_fetch", source="CryptoCompare")
+    def fetch_rates(self) -> Dict[str, float]:
+        """Получить курсы криптовалют от CryptoCompare"""
+        base = self.config.BASE_CURRENCY
+
+        def fetch_chunk(codes: List[str]) -> Dict[str, Any]:
+            data = self._get(self.config.CRYPTOCOMPARE_URL,
+                             {"fsyms": ",".join(codes), "tsyms": base})
+            if isinstance(data, dict) and data.get("Response") == "Error":
+                raise ApiRequestError(f"Ошибка API CryptoCompare: {data.get('Message')}")
+            return data
+
+        chunks = chunk_ids(sorted(self.config.CRYPTO_CURRENCIES),
+                           self.config.CRYPTOCOMPARE_MAX_SYMBOLS_LENGTH)
+        if not chunks:
+            return {}
+        rates = {}
+        try:
+            for data in self._fetch_all(fetch_chunk, chunks, self.config.COINGECKO_MAX_WORKERS):
+                for code, prices in data.items():
+                    rate = prices.get(base)
+                    if rate is not None:
+                        rates[f"{code}_{base}"] = float(rate)
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ApiRequestError(
+                f"Ошибка обработки данных от CryptoCompare: {str(e)}"
+            ) from e
+        return rates
 
 
 class ExchangeRateApiClient(BaseApiClient):
     """Клиент ExchangeRate-API"""
 
+    provider = "ExchangeRate-API"
+
+    @timed("valutatrade_api_fetch", source="ExchangeRate-API")
     def fetch_rates(self) -> Dict[str, float]:
         """Получить курсы фиатных валют от ExchangeRate-API"""
+        self.last_vector = None
         if not self.config.EXCHANGERATE_API_KEY:
             raise ApiRequestError("Не задан API ключ для ExchangeRate-API")
 
-        url = (f"{self.config.EXCHANGERATE_API_URL}/"
-               f"{self.config.EXCHANGERATE_API_KEY}/"
-               f"latest/{self.config.BASE_CURRENCY}")
+        return self._fetch(f"{self.config.EXCHANGERATE_API_URL}/"
+                           f"{self.config.EXCHANGERATE_API_KEY}/"
+                           f"latest/{self.config.BASE_CURRENCY}")
 
+    def _fetch(self, url: str) -> Dict[str, float]:
+        self._acquire(self.provider)
         try:
             response = requests.get(
                 url,
@@ -90,18 +253,45 @@ class ExchangeRateApiClient(BaseApiClient):
                     f"Ошибка API: {data.get('error-type', 'Неизвестная ошибка')}"
                 )
 
+            # Ответ содержит курсы всех валют к базе: сохраняем их целиком,
+            # а парами (для истории и оповещений) — только FIAT_CURRENCIES
+            self.last_vector = encode_vector(self.config.BASE_CURRENCY, data["rates"])
+
             rates = {}
             for code in self.config.FIAT_CURRENCIES:
-                if code in data.get("rates", {}):
-                    rate = data["rates"][code]
+                if data["rates"].get(code):
+                    # API отдаёт единицы code за 1 BASE; пара CODE_BASE — цена code в BASE
                     pair = f"{code}_{self.config.BASE_CURRENCY}"
-                    rates[pair] = float(rate)
+                    rates[pair] = 1.0 / float(data["rates"][code])
 
             return rates
 
         except requests.exceptions.RequestException as e:
+            self._check_rate_limited(self.provider, e.response)
             raise ApiRequestError(f"Ошибка запроса к ExchangeRate-API: {str(e)}") from e
-        except (ValueError, KeyError) as e:
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
             raise ApiRequestError(
                 f"Ошибка обработки данных от ExchangeRate-API: {str(e)}"
             ) from e
+
+
+class OpenExchangeRateClient(ExchangeRateApiClient):
+    """Открытый эндпоинт ExchangeRate-API без ключа: резервный источник фиатных курсов"""
+
+    provider = "ExchangeRate-API-open"
+
+    @timed("valutatrade_api_fetch", source="ExchangeRate-API-open")
+    def fetch_rates(self) -> Dict[str, float]:
+        """Получить курсы фиатных валют от открытого эндпоинта ExchangeRate-API"""
+        self.last_vector = None
+        return self._fetch(f"{self.config.OPEN_EXCHANGERATE_URL}/latest/"
+                           f"{self.config.BASE_CURRENCY}")
+
+
+# Клиенты по имени провайдера (см. ParserConfig.PROVIDER_PRIORITY)
+PROVIDERS: Dict[str, Callable[[ParserConfig], BaseApiClient]] = {
+    "CoinGecko": CoinGeckoClient,
+    "CryptoCompare": CryptoCompareClient,
+    "ExchangeRate-API": ExchangeRateApiClient,
+    "ExchangeRate-API-open": OpenExchangeRateClient,
+}
@@ -1,6 +1,8 @@
 import os
 from dataclasses import dataclass
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
+
+from valutatrade_hub.core.currencies import CURRENCY_REGISTRY, CryptoCurrency
 
 
 @dataclass
@@ -9,26 +11,117 @@ class ParserConfig:
     EXCHANGERATE_API_KEY: str = os.getenv("EXCHANGERATE_API_KEY", "")
 
     COINGECKO_URL: str = "https://api.coingecko.com/api/v3/simple/price"
+    COINGECKO_MARKETS_URL: str = "https://api.coingecko.com/api/v3/coins/markets"
+    # Длина параметра ids в одном запросе (запас под лимит длины URL)
+    COINGECKO_MAX_IDS_LENGTH: int = 1500
+    COINGECKO_MAX_WORKERS: int = 8
+    # Сколько монет по капитализации загружать в файл валют
+    CURRENCY_UNIVERSE_LIMIT: int = 250
     EXCHANGERATE_API_URL: str = "https://v6.exchangerate-api.com/v6"
+    OPEN_EXCHANGERATE_URL: str = "https://open.er-api.com/v6"
+    CRYPTOCOMPARE_URL: str = "https://min-api.cryptocompare.com/data/pricemulti"
+    CRYPTOCOMPARE_MAX_SYMBOLS_LENGTH: int = 300
+
+    # Провайдеры по группам в порядке приоритета (см. api_clients.PROVIDERS):
+    # следующий получает дублирующий запрос, если предыдущий не ответил за
+    # HEDGE_DELAY_SECONDS или, если задержка не задана, за HEDGE_PERCENTILE
+    # его задержек (пока наблюдений меньше HEDGE_MIN_SAMPLES — HEDGE_DEFAULT_DELAY_SECONDS)
+    PROVIDER_PRIORITY: Dict[str, Tuple[str, ...]] = None
+    HEDGE_DELAY_SECONDS: Optional[float] = None
+    HEDGE_PERCENTILE: float = 0.95
+    HEDGE_MIN_SAMPLES: int = 20
+    HEDGE_DEFAULT_DELAY_SECONDS: float = 2.0
+
+    # Лимиты запросов по провайдерам: "per_minute" и "per_month" (календарный
+    # месяц UTC); состояние общее для всех процессов (RATE_LIMIT_FILE_PATH).
+    # Токена минутного лимита ждём не дольше RATE_LIMIT_MAX_WAIT_SECONDS
+    PROVIDER_RATE_LIMITS: Dict[str, Dict[str, int]] = None
+    RATE_LIMIT_MAX_WAIT_SECONDS: float = 5.0
+    RATE_LIMIT_FILE_PATH: Optional[str] = None
+    # Сколько ждать обновления, начатого другим процессом (см. RatesUpdater.run_update)
+    UPDATE_WAIT_TIMEOUT_SECONDS: float = 300.0
 
     BASE_CURRENCY: str = "USD"
 
     FIAT_CURRENCIES: Tuple[str, ...] = ("EUR", "GBP", "RUB")
-    CRYPTO_CURRENCIES: Tuple[str, ...] = ("BTC", "ETH", "SOL")
+    # По умолчанию — все криптовалюты CURRENCY_REGISTRY с идентификатором CoinGecko
+    CRYPTO_CURRENCIES: Optional[Tuple[str, ...]] = None
 
     CRYPTO_ID_MAP: Dict[str, str] = None
 
     RATES_FILE_PATH: str = "data/rates.json"
     HISTORY_FILE_PATH: str = "data/exchange_rates.json"
+    # Сырые тики хранятся посегментно; HISTORY_FILE_PATH однократно переносится
+    # в сегменты при первой записи истории (см. RatesStorage.migrate_legacy_history),
+    # старые фиатные курсы обращаются в цену (см. RatesStorage.migrate_fiat_direction)
+    HISTORY_SEGMENT_DIR: Optional[str] = None
+    HISTORY_SEGMENT_RESOLUTION: str = "1d"
+    # Пул процессов для разбора сжатых сегментов (None — по числу CPU)
+    HISTORY_READ_WORKERS: Optional[int] = None
+    HISTORY_PARALLEL_MIN_SEGMENTS: int = 8
+    # Уровни истории с часовыми и дневными свечами (по умолчанию рядом с HISTORY_FILE_PATH)
+    HISTORY_HOURLY_FILE_PATH: Optional[str] = None
+    HISTORY_DAILY_FILE_PATH: Optional[str] = None
+
+    # Сырые тики старше этого возраста сворачиваются в часовые свечи,
+    # часовые — в дневные, дневные удаляются
+    HISTORY_RAW_RETENTION_HOURS: int = 168
+    HISTORY_HOURLY_RETENTION_DAYS: int = 90
+    HISTORY_DAILY_RETENTION_DAYS: int = 1825
+
+    # Правила оповещений и журнал сработавших (по умолчанию рядом с RATES_FILE_PATH)
+    ALERTS_FILE_PATH: Optional[str] = None
+    ALERTS_LOG_PATH: Optional[str] = None
+    # Размер кольцевого буфера курсов на пару и окно правил изменения
+    ALERTS_BUFFER_SIZE: int = 1024
 
     REQUEST_TIMEOUT: int = 10
 
     def __post_init__(self):
         """Заполняет значения по умолчанию после создания объекта"""
-        if self.CRYPTO_ID_MAP is None:
-            self.CRYPTO_ID_MAP = {
-                "BTC": "bitcoin",
-                "ETH": "ethereum",
-                "SOL": "solana",
+        if self.CRYPTO_ID_MAP is None or self.CRYPTO_CURRENCIES is None:
+            self.reload_universe(
+                ids=self.CRYPTO_ID_MAP is None, codes=self.CRYPTO_CURRENCIES is None
+            )
+
+        if self.PROVIDER_PRIORITY is None:
+            self.PROVIDER_PRIORITY = {
+                "CoinGecko": ("CoinGecko", "CryptoCompare"),
+                "ExchangeRate-API": ("ExchangeRate-API", "ExchangeRate-API-open"),
+            }
+        if self.PROVIDER_RATE_LIMITS is None:
+            # Бесплатные тарифы провайдеров
+            self.PROVIDER_RATE_LIMITS = {
+                "CoinGecko": {"per_minute": 30, "per_month": 10000},
+                "CryptoCompare": {"per_minute": 30, "per_month": 100000},
+                "ExchangeRate-API": {"per_month": 1500},
+                "ExchangeRate-API-open": {"per_minute": 10},
             }
 
+        data_dir = os.path.dirname(self.RATES_FILE_PATH)
+        if self.ALERTS_FILE_PATH is None:
+            self.ALERTS_FILE_PATH = os.path.join(data_dir, "alerts.json")
+        if self.ALERTS_LOG_PATH is None:
+            self.ALERTS_LOG_PATH = os.path.join(data_dir, "alerts_log.jsonl")
+        if self.RATE_LIMIT_FILE_PATH is None:
+            self.RATE_LIMIT_FILE_PATH = os.path.join(data_dir, "rate_limits.json")
+
+        base, ext = os.path.splitext(self.HISTORY_FILE_PATH)
+        if self.HISTORY_SEGMENT_DIR is None:
+            self.HISTORY_SEGMENT_DIR = f"{base}_segments"
+        if self.HISTORY_HOURLY_FILE_PATH is None:
+            self.HISTORY_HOURLY_FILE_PATH = f"{base}_hourly{ext}"
+        if self.HISTORY_DAILY_FILE_PATH is None:
+            self.HISTORY_DAILY_FILE_PATH = f"{base}_daily{ext}"
+
+    def reload_universe(self, ids: bool = True, codes: bool = True) -> None:
+        """Берёт список криптовалют и их идентификаторы CoinGecko из CURRENCY_REGISTRY"""
+        id_map = {
+            code: currency.coingecko_id
+            for code, currency in CURRENCY_REGISTRY.items()
+            if isinstance(currency, CryptoCurrency) and currency.coingecko_id
+        }
+        if ids:
+            self.CRYPTO_ID_MAP = id_map
+        if codes:
+            self.CRYPTO_CURRENCIES = tuple(id_map)
@@ -0,0 +1,114 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from valutatrade_hub.metrics import MetricsRegistry
+from valutatrade_hub.parser_service.api_clients import PROVIDERS, ApiRequestError, BaseApiClient
+from valutatrade_hub.parser_service.config import ParserConfig
+
+Provider = Tuple[str, BaseApiClient]
+
+
+class HedgedClient(BaseApiClient):
+    """Группа провайдеров одних и тех же пар с дублирующими (hedged) запросами.
+
+    Запрос уходит первому провайдеру; если он не ответил за задержку хеджа
+    (p95 его задержек или HEDGE_DELAY_SECONDS) или ответил ошибкой, запрос
+    дублируется следующему. Берётся первый успешный ответ, опоздавший
+    игнорируется. Счётчики valutatrade_hedge_requests_total и
+    valutatrade_hedge_wins_total по провайдерам дают долю выигранных хеджей.
+    """
+
+    def __init__(self, config: ParserConfig, group: str, providers: List[Provider]):
+        super().__init__(config)
+        self.group = group
+        self.providers = providers
+        self.logger = logging.getLogger(__name__)
+        self.metrics = MetricsRegistry()
+
+    def hedge_delay(self, provider: str) -> float:
+        """Сколько ждать ответа provider, прежде чем дублировать запрос"""
+        if self.config.HEDGE_DELAY_SECONDS is not None:
+            return self.config.HEDGE_DELAY_SECONDS
+        delay = self.metrics.percentile(
+            'valutatrade_api_fetch_duration_seconds', self.config.HEDGE_PERCENTILE,
+            self.config.HEDGE_MIN_SAMPLES, source=provider
+        )
+        return self.config.HEDGE_DEFAULT_DELAY_SECONDS if delay is None else delay
+
+    def _first_success(self, pending: Dict[Future, Provider], timeout: Optional[float],
+                       errors: List[str]) -> Optional[Tuple[Provider, Dict[str, float]]]:
+        """Ждёт первый успешный ответ не дольше timeout (None — пока есть запросы)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                return None
+            for future in done:
+                name, client = pending.pop(future)
+                try:
+                    return (name, client), future.result()
+                except Exception as e:
+                    errors.append(f"{name}: {str(e)}")
+        return None
+
+    def fetch_rates(self) -> Dict[str, float]:
+        """Курсы от первого ответившего провайдера группы"""
+        self.last_vector = None
+        self.last_source = None
+        pool = ThreadPoolExecutor(max_workers=len(self.providers))
+        pending: Dict[Future, Provider] = {}
+        errors: List[str] = []
+
+        try:
+            with self.metrics.timer('valutatrade_hedge', group=self.group):
+                for index, (name, client) in enumerate(self.providers):
+                    if index:
+                        self.logger.info(f"Дублирующий запрос к {name} ({self.group})")
+                        self.metrics.counter('valutatrade_hedge_requests_total',
+                                             group=self.group, provider=name).inc()
+                    pending[pool.submit(client.fetch_rates)] = (name, client)
+
+                    last = index + 1 == len(self.providers)
+                    winner = self._first_success(
+                        pending, None if last else self.hedge_delay(name), errors
+                    )
+                    if winner is not None:
+                        return self._accept(winner)
+        finally:
+            # Опоздавшие запросы дорабатывают в фоне, их результат не нужен
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        raise ApiRequestError(
+            f"Нет ответа ни от одного провайдера {self.group}: " + "; ".join(errors)
+        )
+
+    def _accept(self, winner: Tuple[Provider, Dict[str, float]]) -> Dict[str, float]:
+        (name, client), rates = winner
+        self.last_vector = client.last_vector
+        self.last_source = name
+        # Хедж выигран, только если ответил не основной провайдер (в т. ч. после его ошибки)
+        if client is not self.providers[0][1]:
+            self.metrics.counter('valutatrade_hedge_wins_total',
+                                 group=self.group, provider=name).inc()
+        return rates
+
+
+def build_clients(config: ParserConfig,
+                  groups: Optional[Iterable[str]] = None) -> Dict[str, BaseApiClient]:
+    """Клиенты по группам PROVIDER_PRIORITY; группа из нескольких провайдеров — HedgedClient"""
+    clients: Dict[str, BaseApiClient] = {}
+    for group, names in config.PROVIDER_PRIORITY.items():
+        if groups is not None and group not in groups:
+            continue
+        unknown = [name for name in names if name not in PROVIDERS]
+        if unknown:
+            raise ValueError(f"Неизвестные провайдеры в группе {group}: {', '.join(unknown)}")
+        providers = [(name, PROVIDERS[name](config)) for name in names]
+        if len(providers) == 1:
+            clients[group] = providers[0][1]
+        else:
+            clients[group] = HedgedClient(config, group, providers)
+    return clients
@@ -0,0 +1,70 @@
+import heapq
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from valutatrade_hub.core.currencies import CURRENCY_REGISTRY, CryptoCurrency
+
+CRYPTO = 'crypto'
+FIAT = 'fiat'
+
+
+class PairKey(NamedTuple):
+    """Разобранный ключ пары из кэша курсов"""
+    from_code: str
+    to_code: str
+    kind: str
+    source: Optional[str]
+
+
+def currency_kind(code: str, crypto_codes: Iterable[str] = ()) -> str:
+    """crypto или fiat по CURRENCY_REGISTRY; неизвестные коды — по списку crypto_codes"""
+    currency = CURRENCY_REGISTRY.get(code)
+    if currency is not None:
+        return CRYPTO if isinstance(currency, CryptoCurrency) else FIAT
+    return CRYPTO if code in crypto_codes else FIAT
+
+
+def parse_pair(pair: str, data: Optional[Dict[str, Any]] = None,
+               crypto_codes: Iterable[str] = ()) -> PairKey:
+    """Ключ пары из полей записи кэша или, для старых кэшей, из строки FROM_TO"""
+    data = data or {}
+    if 'from_currency' in data and 'kind' in data:
+        return PairKey(data['from_currency'], data['to_currency'], data['kind'],
+                       data.get('source'))
+    from_code, _, to_code = pair.partition('_')
+    return PairKey(from_code, to_code, currency_kind(from_code, crypto_codes),
+                   data.get('source'))
+
+
+class PairIndex:
+    """Индексы кэша курсов по валюте и типу (crypto/fiat) вместо поиска подстрок"""
+
+    def __init__(self, rates: Dict[str, Dict[str, Any]], crypto_codes: Iterable[str] = ()):
+        crypto_codes = frozenset(crypto_codes)
+        self.rates = rates
+        self.keys: Dict[str, PairKey] = {}
+        self.by_currency: Dict[str, List[str]] = {}
+        self.by_kind: Dict[str, List[str]] = {}
+        for pair, data in rates.items():
+            key = parse_pair(pair, data, crypto_codes)
+            self.keys[pair] = key
+            self.by_currency.setdefault(key.from_code, []).append(pair)
+            if key.to_code != key.from_code:
+                self.by_currency.setdefault(key.to_code, []).append(pair)
+            self.by_kind.setdefault(key.kind, []).append(pair)
+
+    def select(self, currency: Optional[str] = None,
+               kind: Optional[str] = None) -> List[str]:
+        """Пары с валютой currency (с любой стороны) и/или базовой валютой типа kind"""
+        if currency is not None:
+            pairs = self.by_currency.get(currency.upper(), [])
+            if kind is not None:
+                pairs = [pair for pair in pairs if self.keys[pair].kind == kind]
+            return pairs
+        if kind is not None:
+            return self.by_kind.get(kind, [])
+        return list(self.rates)
+
+    def top(self, n: int, pairs: Optional[Iterable[str]] = None) -> List[str]:
+        """N пар с наибольшим курсом (куча, без полной сортировки)"""
+        pairs = self.rates if pairs is None else pairs
+        return heapq.nlargest(n, pairs, key=lambda pair: self.rates[pair]['rate'])
@@ -0,0 +1,147 @@
+import logging
+import math
+import os
+import time
+from typing import Any, Dict, Optional
+
+from valutatrade_hub.infra.filelock import FileLock
+from valutatrade_hub.infra.serializer import SerializationError, get_serializer
+from valutatrade_hub.metrics import MetricsRegistry
+from valutatrade_hub.parser_service.config import ParserConfig
+
+# Пауза после ответа 429 без заголовка Retry-After
+DEFAULT_RETRY_AFTER_SECONDS = 60.0
+
+
+class RateLimitExceeded(Exception):
+    """Лимит запросов к провайдеру исчерпан"""
+    pass
+
+
+class RateLimiter:
+    """Лимиты запросов к провайдерам, общие для всех процессов.
+
+    Минутный лимит — ведро токенов ёмкостью per_minute, которое пополняется
+    равномерно; месячный — счётчик запросов за календарный месяц. Состояние
+    хранится в RATE_LIMIT_FILE_PATH и меняется под файловой блокировкой.
+    После ответа 429 провайдер блокируется на Retry-After секунд.
+    """
+
+    def __init__(self, config: ParserConfig):
+        self.config = config
+        self.path = config.RATE_LIMIT_FILE_PATH
+        self.logger = logging.getLogger(__name__)
+        self.metrics = MetricsRegistry()
+
+    def _lock(self) -> FileLock:
+        # Своя блокировка на каждый захват: клиенты вызывают лимитер из нескольких потоков
+        return FileLock(f"{self.path}.lock", poll_interval=0.005)
+
+    def _load(self) -> Dict[str, Any]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            state = get_serializer(self.path).load_file(self.path)
+        except (OSError, SerializationError):
+            return {}
+        return state if isinstance(state, dict) else {}
+
+    def _save(self, state: Dict[str, Any]) -> None:
+        get_serializer(self.path).dump_file(state, self.path)
+
+    @staticmethod
+    def _reserve(bucket: Dict[str, Any], limits: Dict[str, int], now: float) -> float:
+        """Списывает запрос; 0 — можно выполнять, иначе через сколько секунд повторить"""
+        month = time.strftime('%Y-%m', time.gmtime(now))
+        if bucket.get('month') != month:
+            bucket['month'], bucket['month_calls'] = month, 0
+        per_month = limits.get('per_month')
+        if per_month is not None and bucket['month_calls'] >= per_month:
+            return math.inf
+
+        per_minute = limits.get('per_minute')
+        if per_minute:
+            elapsed = max(0.0, now - bucket.get('updated_at', now))
+            tokens = min(per_minute, bucket.get('tokens', per_minute) + elapsed * per_minute / 60)
+            bucket['updated_at'] = now
+            if tokens < 1:
+                bucket['tokens'] = tokens
+                return (1 - tokens) * 60 / per_minute
+            bucket['tokens'] = tokens - 1
+
+        bucket['month_calls'] += 1
+        return 0.0
+
+    def _take(self, provider: str, limits: Dict[str, int]) -> float:
+        with self._lock():
+            state = self._load()
+            bucket = state.setdefault(provider, {})
+            now = time.time()
+            blocked = bucket.get('blocked_until', 0) - now
+            if blocked > 0:
+                raise RateLimitExceeded(
+                    f"{provider} ограничил частоту запросов, повтор через {blocked:.0f} с"
+                )
+            delay = self._reserve(bucket, limits, now)
+            self._save(state)
+        return delay
+
+    def _blocked_for(self, provider: str) -> float:
+        """Сколько ещё длится блокировка после 429 (без захвата блокировки файла)"""
+        bucket = self._load().get(provider) or {}
+        return bucket.get('blocked_until', 0) - time.time()
+
+    def acquire(self, provider: str) -> None:
+        """Берёт разрешение на запрос к provider, при необходимости дожидаясь токена.
+
+        RateLimitExceeded — если исчерпан месячный лимит, провайдер ответил 429
+        и Retry-After ещё не истёк или токена пришлось бы ждать дольше
+        RATE_LIMIT_MAX_WAIT_SECONDS.
+        """
+        limits = self.config.PROVIDER_RATE_LIMITS.get(provider)
+        if not limits:
+            blocked = self._blocked_for(provider)
+            if blocked > 0:
+                raise RateLimitExceeded(
+                    f"{provider} ограничил частоту запросов, повтор через {blocked:.0f} с"
+                )
+            return
+
+        deadline = time.monotonic() + self.config.RATE_LIMIT_MAX_WAIT_SECONDS
+        waited = False
+        while True:
+            try:
+                delay = self._take(provider, limits)
+            except RateLimitExceeded:
+                self._count(provider, 'rejected')
+                raise
+            if not delay:
+                self._count(provider, 'waited' if waited else 'allowed')
+                return
+            if math.isinf(delay):
+                self._count(provider, 'rejected')
+                raise RateLimitExceeded(
+                    f"Исчерпан месячный лимит запросов к {provider} ({limits['per_month']})"
+                )
+            if time.monotonic() + delay > deadline:
+                self._count(provider, 'rejected')
+                raise RateLimitExceeded(
+                    f"Исчерпан минутный лимит запросов к {provider}, "
+                    f"следующий запрос через {delay:.1f} с"
+                )
+            waited = True
+            time.sleep(delay)
+
+    def block(self, provider: str, retry_after: Optional[float] = None) -> None:
+        """Запрещает запросы к provider на retry_after секунд (после ответа 429)"""
+        delay = DEFAULT_RETRY_AFTER_SECONDS if retry_after is None else retry_after
+        with self._lock():
+            state = self._load()
+            bucket = state.setdefault(provider, {})
+            bucket['blocked_until'] = max(bucket.get('blocked_until', 0), time.time() + delay)
+            self._save(state)
+        self.logger.warning(f"{provider} ответил 429: запросы приостановлены на {delay:.0f} с")
+
+    def _count(self, provider: str, result: str) -> None:
+        self.metrics.counter('valutatrade_rate_limit_total', provider=provider,
+                             result=result).inc()
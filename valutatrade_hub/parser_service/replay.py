@@ -0,0 +1,163 @@
+import itertools
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from valutatrade_hub.metrics import MetricsRegistry, timed
+from valutatrade_hub.parser_service.api_clients import BaseApiClient
+from valutatrade_hub.parser_service.config import ParserConfig
+from valutatrade_hub.parser_service.retention import pair_key, parse_timestamp
+from valutatrade_hub.parser_service.storage import RatesStorage
+from valutatrade_hub.parser_service.updater import RatesUpdater
+
+# Этапы run_update, время которых выводится в отчёте
+STAGES: Tuple[Tuple[str, str, Dict[str, str]], ...] = (
+    ('fetch', 'valutatrade_api_fetch_duration_seconds', {'source': 'Replay'}),
+    ('save_rates', 'valutatrade_updater_duration_seconds', {'phase': 'save_rates'}),
+    ('save_history', 'valutatrade_updater_duration_seconds', {'phase': 'save_history'}),
+    ('alerts', 'valutatrade_updater_duration_seconds', {'phase': 'alerts'}),
+    ('total', 'valutatrade_updater_duration_seconds', {'phase': 'run'}),
+)
+
+Tick = Tuple[datetime, Dict[str, Dict[str, float]]]
+
+
+def group_ticks(history: Iterable[Dict[str, Any]]) -> List[Tick]:
+    """Записи истории, сгруппированные по времени: (момент, источник -> пара -> курс)"""
+    records = sorted(history, key=lambda record: record['timestamp'])
+    ticks = []
+    for timestamp, group in itertools.groupby(records, key=lambda record: record['timestamp']):
+        by_source: Dict[str, Dict[str, float]] = {}
+        for record in group:
+            source = record.get('source') or 'Replay'
+            by_source.setdefault(source, {})[pair_key(record)] = record['rate']
+        ticks.append((parse_timestamp(timestamp), by_source))
+    return ticks
+
+
+class ReplayFeed:
+    """Курсор по тикам истории, общий для клиентов воспроизведения"""
+
+    def __init__(self, ticks: List[Tick]):
+        self.ticks = ticks
+        self.position = -1
+
+    @property
+    def sources(self) -> List[str]:
+        return sorted({source for _, by_source in self.ticks for source in by_source})
+
+    @property
+    def moment(self) -> datetime:
+        return self.ticks[self.position][0]
+
+    def advance(self) -> bool:
+        """Переходит к следующему тику; False, если тики закончились"""
+        if self.position + 1 >= len(self.ticks):
+            return False
+        self.position += 1
+        return True
+
+    def rates(self, source: str) -> Dict[str, float]:
+        return dict(self.ticks[self.position][1].get(source, {}))
+
+
+class ReplayClient(BaseApiClient):
+    """Клиент, отдающий курсы одного источника из текущего тика истории"""
+
+    def __init__(self, config: ParserConfig, feed: ReplayFeed, source: str):
+        super().__init__(config)
+        self.feed = feed
+        self.source = source
+
+    @timed("valutatrade_api_fetch", source="Replay")
+    def fetch_rates(self) -> Dict[str, float]:
+        return self.feed.rates(self.source)
+
+
+def replay_config(output_dir: str, live: ParserConfig) -> ParserConfig:
+    """Конфигурация с файлами в output_dir; правила оповещений копируются из live"""
+    os.makedirs(output_dir, exist_ok=True)
+    config = ParserConfig(
+        RATES_FILE_PATH=os.path.join(output_dir, 'rates.json'),
+        HISTORY_FILE_PATH=os.path.join(output_dir, 'exchange_rates.json'),
+        CRYPTO_CURRENCIES=live.CRYPTO_CURRENCIES,
+        CRYPTO_ID_MAP=live.CRYPTO_ID_MAP,
+    )
+    if os.path.exists(live.ALERTS_FILE_PATH):
+        shutil.copyfile(live.ALERTS_FILE_PATH, config.ALERTS_FILE_PATH)
+    return config
+
+
+def _stage_totals(metrics: MetricsRegistry) -> Dict[str, Tuple[float, int]]:
+    totals = {}
+    for stage, name, labels in STAGES:
+        histogram = metrics.histogram(name, **labels)
+        totals[stage] = (histogram.sum, histogram.count)
+    return totals
+
+
+class Replayer:
+    """Прогоняет тики истории через RatesUpdater: кэш, история, оповещения.
+
+    Время тика подставляется как часы обновления, поэтому записи истории и окна
+    оповещений получают исторические отметки. speed — во сколько раз быстрее
+    реального времени воспроизводить; None — без пауз, с максимальной скоростью.
+    """
+
+    def __init__(self, config: ParserConfig, ticks: List[Tick],
+                 speed: Optional[float] = None):
+        self.feed = ReplayFeed(ticks)
+        self.speed = speed
+        clients = {
+            source: ReplayClient(config, self.feed, source) for source in self.feed.sources
+        }
+        self.updater = RatesUpdater(config, clients, RatesStorage(config),
+                                    clock=lambda: self.feed.moment, single_flight=False)
+        self.metrics = MetricsRegistry()
+
+    def _pace(self, started: float) -> None:
+        if not self.speed:
+            return
+        first = self.feed.ticks[0][0]
+        due = (self.feed.moment - first).total_seconds() / self.speed
+        delay = started + due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def run(self) -> Dict[str, Any]:
+        before = _stage_totals(self.metrics)
+        ticks = records = alerts = 0
+        started = time.perf_counter()
+
+        while self.feed.advance():
+            self._pace(started)
+            result = self.updater.run_update()
+            ticks += 1
+            records += result['rates_count']
+            alerts += len(result['alerts'])
+
+        elapsed = time.perf_counter() - started
+        after = _stage_totals(self.metrics)
+        stages = {
+            stage: {
+                "count": after[stage][1] - before[stage][1],
+                "mean_ms": ((after[stage][0] - before[stage][0])
+                            / max(1, after[stage][1] - before[stage][1]) * 1e3),
+            }
+            for stage in after
+        }
+        span = ((self.feed.ticks[-1][0] - self.feed.ticks[0][0]).total_seconds()
+                if self.feed.ticks else 0.0)
+        return {
+            "ticks": ticks,
+            "records": records,
+            "alerts": alerts,
+            "elapsed_seconds": elapsed,
+            "ticks_per_second": ticks / elapsed if elapsed else 0.0,
+            "records_per_second": records / elapsed if elapsed else 0.0,
+            "span_seconds": span,
+            "stages": stages,
+            "metrics_enabled": self.metrics.enabled,
+        }
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def parse_timestamp(value: str) -> datetime:
+    """ISO-время записи истории (с суффиксом Z) в naive UTC datetime"""
+    return datetime.fromisoformat(value.rstrip('Z'))
+
+
+def format_timestamp(value: datetime) -> str:
+    return value.isoformat() + "Z"
+
+
+def utc_now() -> datetime:
+    """Текущее время в naive UTC, как в записях истории"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def in_range(timestamp: str, start: Optional[datetime], end: Optional[datetime]) -> bool:
+    """Попадает ли время записи в [start, end] (границы необязательны)"""
+    moment = parse_timestamp(timestamp)
+    return (start is None or moment >= start) and (end is None or moment <= end)
+
+
+def pair_key(record: Dict[str, Any]) -> str:
+    return f"{record['from_currency']}_{record['to_currency']}"
+
+
+def floor_timestamp(value: datetime, resolution: str) -> datetime:
+    """Начало часового или суточного интервала, в который попадает value"""
+    if resolution == '1h':
+        return value.replace(minute=0, second=0, microsecond=0)
+    if resolution == '1d':
+        return value.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Неизвестное разрешение '{resolution}'")
+
+
+def _as_bar(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Сырая запись как агрегат из одного тика; агрегаты возвращаются как есть"""
+    if 'count' in record:
+        return record
+    rate = record['rate']
+    return {**record, "open": rate, "high": rate, "low": rate, "close": rate, "count": 1}
+
+
+def invert_rate(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Запись с обратным курсом 1/rate; у свечи high и low меняются местами"""
+    inverted = {**record, "rate": 1.0 / record['rate']}
+    if 'count' in record:
+        inverted.update(open=1.0 / record['open'], close=1.0 / record['close'],
+                        high=1.0 / record['low'], low=1.0 / record['high'])
+    return inverted
+
+
+def rollup(records: Iterable[Dict[str, Any]], resolution: str) -> List[Dict[str, Any]]:
+    """Сворачивает тики и агрегаты более мелкого разрешения в свечи OHLC.
+
+    Записи одной пары и интервала объединяются: open берётся у самой ранней,
+    close — у самой поздней, high/low — экстремумы, count — сумма тиков.
+    Поле rate равно close, поэтому агрегат читается как обычная запись истории.
+    """
+    bars = sorted(
+        (_as_bar(record) for record in records),
+        key=lambda bar: (bar['from_currency'], bar['to_currency'],
+                         parse_timestamp(bar['timestamp']))
+    )
+
+    buckets: Dict[Tuple[str, str, datetime], Dict[str, Any]] = {}
+    for bar in bars:
+        start = floor_timestamp(parse_timestamp(bar['timestamp']), resolution)
+        key = (bar['from_currency'], bar['to_currency'], start)
+        bucket = buckets.get(key)
+        if bucket is None:
+            timestamp = format_timestamp(start)
+            buckets[key] = {
+                "id": f"{pair_key(bar)}_{resolution}_{timestamp.replace(':', '-')}",
+                "from_currency": bar['from_currency'],
+                "to_currency": bar['to_currency'],
+                "rate": bar['close'],
+                "timestamp": timestamp,
+                "source": bar.get('source'),
+                "resolution": resolution,
+                "open": bar['open'],
+                "high": bar['high'],
+                "low": bar['low'],
+                "close": bar['close'],
+                "count": bar['count'],
+            }
+            continue
+
+        bucket['high'] = max(bucket['high'], bar['high'])
+        bucket['low'] = min(bucket['low'], bar['low'])
+        bucket['close'] = bucket['rate'] = bar['close']
+        bucket['count'] += bar['count']
+
+    return sorted(buckets.values(), key=lambda bucket: bucket['timestamp'])
+
+
+def split_before(records: List[Dict[str, Any]],
+                 cutoff: datetime) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Делит записи на более старые, чем cutoff, и остальные"""
+    older, newer = [], []
+    for record in records:
+        target = older if parse_timestamp(record['timestamp']) < cutoff else newer
+        target.append(record)
+    return older, newer
+
+
+def retention_cutoffs(now: datetime, raw_hours: int, hourly_days: int,
+                      daily_days: int) -> Dict[str, datetime]:
+    """Границы уровней: сырые тики → часовые → дневные → удаление.
+
+    Границы выровнены по интервалам, чтобы ни один час или день не оказался
+    разделён между двумя уровнями.
+    """
+    return {
+        "raw": floor_timestamp(now - timedelta(hours=raw_hours), '1h'),
+        "hourly": floor_timestamp(now - timedelta(days=hourly_days), '1d'),
+        "daily": floor_timestamp(now - timedelta(days=daily_days), '1d'),
+    }
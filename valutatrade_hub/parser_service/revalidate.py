@@ -0,0 +1,116 @@
+import logging
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, Optional
+
+from valutatrade_hub.infra.filelock import FileLock
+from valutatrade_hub.infra.settings import SettingsLoader
+from valutatrade_hub.logging_config import setup_logging
+from valutatrade_hub.metrics import MetricsRegistry
+from valutatrade_hub.parser_service.config import ParserConfig
+from valutatrade_hub.parser_service.hedging import build_clients
+from valutatrade_hub.parser_service.storage import RatesStorage
+from valutatrade_hub.parser_service.updater import RatesUpdater
+
+# Пауза после попытки обновления, чтобы недоступный API не опрашивался каждой командой
+REFRESH_BACKOFF_SECONDS = 60
+
+
+def rates_age_seconds(config: ParserConfig) -> Optional[float]:
+    """Возраст кэша курсов в секундах или None, если кэша нет"""
+    try:
+        return time.time() - os.path.getmtime(config.RATES_FILE_PATH)
+    except OSError:
+        return None
+
+
+class RatesRevalidator:
+    """Обновление устаревшего кэша курсов для stale-while-revalidate.
+
+    Фоновое обновление идёт в отдельном процессе, чтобы команда CLI не ждала
+    ответа API. Обновляет только процесс, захвативший блокировку рядом с
+    rates.json; перед запросом он перепроверяет возраст кэша, так что
+    одновременные команды не обновляют курсы повторно. Время последней
+    попытки отмечается файлом, и следующая попытка — не раньше чем через
+    REFRESH_BACKOFF_SECONDS.
+    """
+
+    def __init__(self, config: Optional[ParserConfig] = None):
+        self.config = config or ParserConfig()
+        self.settings = SettingsLoader()
+        data_dir = os.path.dirname(self.config.RATES_FILE_PATH)
+        self.lock = FileLock(os.path.join(data_dir, 'rates.refresh.lock'))
+        self.attempt_path = os.path.join(data_dir, 'rates.refresh.attempt')
+        self.logger = logging.getLogger(__name__)
+        self.metrics = MetricsRegistry()
+
+    def backing_off(self) -> bool:
+        """Была ли попытка обновления меньше REFRESH_BACKOFF_SECONDS назад"""
+        try:
+            return time.time() - os.path.getmtime(self.attempt_path) < REFRESH_BACKOFF_SECONDS
+        except OSError:
+            return False
+
+    def refresh(self, wait: Optional[float] = 0) -> Optional[Dict[str, Any]]:
+        """Обновляет кэш под блокировкой, если он всё ещё устарел.
+
+        None — обновление не понадобилось (кэш уже обновлён другим процессом),
+        недавно уже была попытка или блокировку не удалось захватить за wait секунд.
+        """
+        if not self.lock.acquire(timeout=wait):
+            return None
+        try:
+            age = rates_age_seconds(self.config)
+            if age is not None and age <= self.settings.rates_ttl_seconds:
+                return None
+            if self.backing_off():
+                return None
+            with open(self.attempt_path, 'w', encoding='utf-8') as f:
+                f.write(f"{time.time():.3f}\n")
+            updater = RatesUpdater(self.config, build_clients(self.config),
+                                   RatesStorage(self.config))
+            return updater.run_update()
+        finally:
+            self.lock.release()
+
+    def refresh_in_background(self) -> bool:
+        """Запускает фоновый процесс обновления, если обновление ещё не идёт"""
+        if self.lock.locked() or self.backing_off():
+            return False
+        if os.name == 'posix':
+            detach = {'start_new_session': True}
+        else:
+            detach = {'creationflags': getattr(subprocess, 'DETACHED_PROCESS', 0)}
+        subprocess.Popen(
+            [sys.executable, '-m', 'valutatrade_hub.parser_service.revalidate'],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            **detach
+        )
+        self.metrics.counter('valutatrade_rates_revalidate_total', mode='background').inc()
+        return True
+
+    def refresh_blocking(self) -> bool:
+        """Обновляет кэш, дожидаясь чужого обновления; True, если кэш теперь свежий"""
+        self.metrics.counter('valutatrade_rates_revalidate_total', mode='blocking').inc()
+        try:
+            self.refresh(wait=self.settings.rates_refresh_timeout_seconds)
+        except Exception as e:
+            self.logger.error(f"Ошибка при обновлении устаревших курсов: {str(e)}")
+        age = rates_age_seconds(self.config)
+        return age is not None and age <= self.settings.rates_ttl_seconds
+
+
+def main():
+    """Фоновое обновление, запущенное RatesRevalidator.refresh_in_background"""
+    setup_logging()
+    MetricsRegistry().persist_on_exit()
+    try:
+        RatesRevalidator().refresh()
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Ошибка фонового обновления курсов: {str(e)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
 import logging
 import time
-from typing import Callable
+from typing import Callable, Optional
 
 import schedule
 
+from valutatrade_hub.metrics import MetricsRegistry
 from valutatrade_hub.parser_service.config import ParserConfig
+from valutatrade_hub.parser_service.api_clients import ApiRequestError
+from valutatrade_hub.parser_service.storage import RatesStorage, StorageError
+from valutatrade_hub.parser_service.universe import (
+    refresh_currency_universe,
+    universe_age_seconds,
+)
 
 
 class Scheduler:
@@ -18,9 +25,20 @@ class Scheduler:
     def schedule_updates(
         self,
         update_function: Callable,
-        interval_minutes: int = 60
+        interval_minutes: int = 60,
+        after_update: Optional[Callable] = None
     ) -> None:
-        job = schedule.every(interval_minutes).minutes.do(update_function)
+        """Периодическое обновление; after_update выполняется после каждого цикла"""
+        def update() -> None:
+            update_function()
+            if after_update is None:
+                return
+            try:
+                after_update()
+            except Exception as e:
+                self.logger.error(f"Ошибка после обновления курсов: {str(e)}")
+
+        job = schedule.every(interval_minutes).minutes.do(update)
         self.jobs.append(job)
 
         self.logger.info(
@@ -39,6 +57,70 @@ class Scheduler:
             f"Запланировано ежедневное обновление курсов в {time_str}"
         )
 
+    def schedule_metrics_export(
+        self,
+        prometheus_path: str,
+        interval_seconds: int = 60
+    ) -> None:
+        """Периодически сохраняет метрики и переписывает файл для Prometheus"""
+        registry = MetricsRegistry()
+
+        def export() -> None:
+            try:
+                registry.write_prometheus(prometheus_path, registry.persist())
+            except OSError as e:
+                self.logger.error(f"Ошибка экспорта метрик: {str(e)}")
+
+        job = schedule.every(interval_seconds).seconds.do(export)
+        self.jobs.append(job)
+
+        self.logger.info(
+            f"Запланирован экспорт метрик в {prometheus_path} "
+            f"каждые {interval_seconds} секунд"
+        )
+
+    def schedule_history_compaction(
+        self,
+        storage: RatesStorage,
+        interval_minutes: int = 60
+    ) -> None:
+        """Периодически сворачивает старую историю курсов в часовые и дневные свечи"""
+        def compact() -> None:
+            try:
+                result = storage.compact_history()
+                self.logger.info(
+                    f"История сжата: тиков {result['raw_compacted']}, "
+                    f"часовых свечей {result['hourly_compacted']}, "
+                    f"удалено дневных {result['daily_expired']}"
+                )
+            except StorageError as e:
+                self.logger.error(str(e))
+
+        job = schedule.every(interval_minutes).minutes.do(compact)
+        self.jobs.append(job)
+
+        self.logger.info(
+            f"Запланировано сжатие истории курсов каждые {interval_minutes} минут"
+        )
+
+    def schedule_universe_refresh(self, interval_hours: int = 24) -> None:
+        """Периодически обновляет файл валют, если он уже создан командой update-currencies"""
+        def refresh() -> None:
+            if universe_age_seconds() is None:
+                return
+            try:
+                count = refresh_currency_universe(self.config)
+                self.logger.info(f"Список валют обновлён: {count} монет")
+            except (ApiRequestError, OSError) as e:
+                self.logger.error(f"Ошибка обновления списка валют: {str(e)}")
+
+        job = schedule.every(interval_hours).hours.do(refresh)
+        self.jobs.append(job)
+
+        self.logger.info(
+            f"Запланировано обновление списка валют каждые {interval_hours} ч"
+        )
+
     def run_scheduler(self) -> None:
         self.logger.info("Планировщик запущен")
 
@@ -0,0 +1,275 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from valutatrade_hub.infra.filelock import FileLock
+from valutatrade_hub.infra.serializer import JsonSerializer
+from valutatrade_hub.parser_service.retention import (
+    floor_timestamp,
+    in_range,
+    pair_key,
+    parse_timestamp,
+    split_before,
+)
+
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+SEGMENT_KEY_FORMATS = {
+    '1h': '%Y-%m-%dT%H',
+    '1d': '%Y-%m-%d',
+}
+
+
+def _read_segment(path: str, backend: str, pretty: bool) -> List[Dict[str, Any]]:
+    """Чтение одного сегмента (верхний уровень модуля — для пула процессов)"""
+    return JsonSerializer(backend, pretty).load_file(path)
+
+
+class SegmentStore:
+    """История курсов, разбитая на сегменты по времени (по умолчанию по суткам).
+
+    Текущий сегмент хранится как обычный JSON и дописывается, закрытые сегменты
+    сжимаются gzip. Манифест хранит для каждого сегмента файл, диапазон времени,
+    пары и количество записей, поэтому запрос за период открывает только
+    пересекающиеся с ним сегменты. Много закрытых сегментов разбираются
+    параллельно в пуле процессов. Все изменения сегментов и манифеста идут
+    под блокировкой каталога (см. lock).
+    """
+
+    def __init__(self, directory: str, serializer: JsonSerializer,
+                 resolution: str = '1d', workers: Optional[int] = None,
+                 parallel_min_segments: int = 8):
+        if resolution not in SEGMENT_KEY_FORMATS:
+            raise ValueError(
+                f"Неизвестное разрешение сегментов '{resolution}' "
+                f"(доступны: {', '.join(SEGMENT_KEY_FORMATS)})"
+            )
+        self.directory = directory
+        self.serializer = serializer
+        self.resolution = resolution
+        self.workers = workers
+        self.parallel_min_segments = parallel_min_segments
+        self.manifest_path = os.path.join(directory, MANIFEST_FILE)
+        self._file_lock = FileLock(os.path.join(directory, LOCK_FILE))
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Блокировка каталога сегментов между процессами; повторный вход допускается.
+
+        Чтение-изменение-запись сегментов и манифеста идёт целиком под ней,
+        поэтому одновременные процессы не затирают записи манифеста друг друга.
+        """
+        with self._thread_lock:
+            if not self._lock_depth:
+                self._file_lock.acquire(timeout=None)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if not self._lock_depth:
+                    self._file_lock.release()
+
+    def _key(self, timestamp: str) -> str:
+        start = floor_timestamp(parse_timestamp(timestamp), self.resolution)
+        return start.strftime(SEGMENT_KEY_FORMATS[self.resolution])
+
+    def _path(self, entry: Dict[str, Any]) -> str:
+        return os.path.join(self.directory, entry['file'])
+
+    def load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        return self.serializer.load_file(self.manifest_path).get("segments", {})
+
+    def _save_manifest(self, manifest: Dict[str, Dict[str, Any]]) -> None:
+        self.serializer.dump_file(
+            {"resolution": self.resolution, "segments": dict(sorted(manifest.items()))},
+            self.manifest_path
+        )
+
+    def _load_segment(self, entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+        path = self._path(entry)
+        if not os.path.exists(path):
+            return []
+        return self.serializer.load_file(path)
+
+    def _remove_file(self, entry: Dict[str, Any]) -> None:
+        path = self._path(entry)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _write_segment(self, manifest: Dict[str, Dict[str, Any]], key: str,
+                       records: List[Dict[str, Any]], closed: bool) -> None:
+        """Записывает сегмент целиком и обновляет его запись в манифесте"""
+        previous = manifest.get(key)
+        if not records:
+            if previous is not None:
+                self._remove_file(previous)
+                del manifest[key]
+            return
+
+        entry = {
+            "file": f"{key}.json.gz" if closed else f"{key}.json",
+            "start": min(r['timestamp'] for r in records),
+            "end": max(r['timestamp'] for r in records),
+            "pairs": sorted({pair_key(r) for r in records}),
+            "count": len(records),
+            "closed": closed,
+        }
+        self.serializer.dump_file(records, self._path(entry))
+        if previous is not None and previous['file'] != entry['file']:
+            self._remove_file(previous)
+        manifest[key] = entry
+
+    def _close_before(self, manifest: Dict[str, Dict[str, Any]], key: str) -> bool:
+        """Сжимает все открытые сегменты старше key"""
+        changed = False
+        for other_key, entry in list(manifest.items()):
+            if other_key < key and not entry['closed']:
+                self._write_segment(manifest, other_key, self._load_segment(entry), True)
+                changed = True
+        return changed
+
+    def append(self, record: Dict[str, Any]) -> None:
+        self.extend([record])
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Дописывает записи в их сегменты и закрывает сегменты старше последнего"""
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            grouped.setdefault(self._key(record['timestamp']), []).append(record)
+        if not grouped:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        with self.lock():
+            manifest = self.load_manifest()
+            latest = max([*grouped, *manifest])
+            for key, new_records in sorted(grouped.items()):
+                entry = manifest.get(key)
+                existing = self._load_segment(entry) if entry is not None else []
+                self._write_segment(manifest, key, existing + new_records, key < latest)
+            self._close_before(manifest, latest)
+            self._save_manifest(manifest)
+
+    def close_stale(self, now: datetime) -> None:
+        """Сжимает открытые сегменты, период которых уже закончился"""
+        current = floor_timestamp(now, self.resolution).strftime(
+            SEGMENT_KEY_FORMATS[self.resolution]
+        )
+        with self.lock():
+            manifest = self.load_manifest()
+            if self._close_before(manifest, current):
+                self._save_manifest(manifest)
+
+    def segments(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                 pairs: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """Записи манифеста сегментов, пересекающихся с периодом и набором пар"""
+        selected = []
+        for _, entry in sorted(self.load_manifest().items()):
+            if start is not None and parse_timestamp(entry['end']) < start:
+                continue
+            if end is not None and parse_timestamp(entry['start']) > end:
+                continue
+            if pairs is not None and pairs.isdisjoint(entry['pairs']):
+                continue
+            selected.append(entry)
+        return selected
+
+    def read(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             pairs: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """Записи за период [start, end] по парам pairs в хронологическом порядке сегментов"""
+        entries = self.segments(start, end, pairs)
+        paths = [self._path(entry) for entry in entries]
+
+        closed = sum(1 for entry in entries if entry['closed'])
+        if closed >= self.parallel_min_segments and self.workers != 1:
+            backend, pretty = self.serializer.backend, self.serializer.pretty
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                chunks = list(pool.map(
+                    _read_segment, paths, [backend] * len(paths), [pretty] * len(paths)
+                ))
+        else:
+            chunks = [self.serializer.load_file(path) for path in paths]
+
+        records = []
+        for entry, chunk in zip(entries, chunks, strict=True):
+            # Сегмент целиком внутри запроса — построчная фильтрация не нужна
+            if (in_range(entry['start'], start, end) and in_range(entry['end'], start, end)
+                    and (pairs is None or pairs.issuperset(entry['pairs']))):
+                records.extend(chunk)
+                continue
+            records.extend(
+                r for r in chunk
+                if in_range(r['timestamp'], start, end) and (pairs is None or pair_key(r) in pairs)
+            )
+        return records
+
+    def latest_before(self, moment: datetime, pairs: Set[str]) -> Dict[str, Dict[str, Any]]:
+        """Последняя запись каждой пары строго раньше moment.
+
+        Сегменты читаются от новых к старым, пока не найдены все пары, поэтому
+        обычно открывается один-два сегмента, а не вся история.
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        for _, entry in sorted(self.load_manifest().items(), reverse=True):
+            missing = pairs - found.keys()
+            if not missing:
+                break
+            if parse_timestamp(entry['start']) >= moment or missing.isdisjoint(entry['pairs']):
+                continue
+            latest: Dict[str, Dict[str, Any]] = {}
+            for record in self._load_segment(entry):
+                key = pair_key(record)
+                moment_of = parse_timestamp(record['timestamp'])
+                if key in missing and moment_of < moment and (
+                        key not in latest
+                        or moment_of >= parse_timestamp(latest[key]['timestamp'])):
+                    latest[key] = record
+            found.update(latest)
+        return found
+
+    def drop_before(self, cutoff: datetime) -> int:
+        """Удаляет записи старше cutoff, возвращает их количество"""
+        dropped = 0
+        with self.lock():
+            manifest = self.load_manifest()
+            for key, entry in list(manifest.items()):
+                if parse_timestamp(entry['start']) >= cutoff:
+                    continue
+                older, newer = split_before(self._load_segment(entry), cutoff)
+                dropped += len(older)
+                self._write_segment(manifest, key, newer, entry['closed'])
+            if dropped:
+                self._save_manifest(manifest)
+        return dropped
+
+    def rewrite(self, transform: Callable[[Dict[str, Any]], Dict[str, Any]]) -> int:
+        """Пропускает каждую запись через transform, возвращает число изменённых.
+
+        transform возвращает ту же запись, если менять её не нужно, — сегменты
+        без изменений не перезаписываются.
+        """
+        changed = 0
+        with self.lock():
+            manifest = self.load_manifest()
+            for key, entry in list(manifest.items()):
+                records = self._load_segment(entry)
+                updated = [transform(record) for record in records]
+                count = sum(new is not old for old, new in zip(records, updated, strict=True))
+                if count:
+                    self._write_segment(manifest, key, updated, entry['closed'])
+                    changed += count
+            if changed:
+                self._save_manifest(manifest)
+        return changed
+
+    def count(self) -> int:
+        return sum(entry['count'] for entry in self.load_manifest().values())
+
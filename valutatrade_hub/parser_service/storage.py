@@ -1,9 +1,22 @@
-import json
 import os
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from valutatrade_hub.infra.filelock import FileLock
+from valutatrade_hub.infra.serializer import get_serializer
+from valutatrade_hub.metrics import timed
 from valutatrade_hub.parser_service.config import ParserConfig
+from valutatrade_hub.parser_service.pairs import PairIndex
+from valutatrade_hub.parser_service.retention import (
+    in_range,
+    invert_rate,
+    pair_key,
+    parse_timestamp,
+    retention_cutoffs,
+    rollup,
+    split_before,
+)
+from valutatrade_hub.parser_service.segments import SegmentStore
 
 
 class StorageError(Exception):
@@ -16,67 +29,335 @@ class RatesStorage:
 
     def __init__(self, config: ParserConfig):
         self.config = config
+        # (отпечаток файла, пары, версия снимка)
+        self._rates_cache: Optional[Tuple[Tuple[int, int], Dict[str, Any], int]] = None
+        self._index_cache: Optional[Tuple[Tuple[int, int], PairIndex]] = None
+        self.segments = SegmentStore(
+            config.HISTORY_SEGMENT_DIR,
+            get_serializer(config.HISTORY_FILE_PATH),
+            resolution=config.HISTORY_SEGMENT_RESOLUTION,
+            workers=config.HISTORY_READ_WORKERS,
+            parallel_min_segments=config.HISTORY_PARALLEL_MIN_SEGMENTS,
+        )
 
-    def save_rates(self, rates: Dict[str, Dict[str, Any]]) -> None:
-        try:
-            data = {
-                "pairs": rates,
-                "last_refresh": datetime.utcnow().isoformat() + "Z"
-            }
-
-            os.makedirs(os.path.dirname(self.config.RATES_FILE_PATH), exist_ok=True)
+    @timed("valutatrade_storage", op="save_rates")
+    def save_rates(self, rates: Dict[str, Dict[str, Any]],
+                   vectors: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """Сохранить пары и векторы курсов провайдеров (база -> вектор).
 
-            temp_path = self.config.RATES_FILE_PATH + ".tmp"
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+        Каждое сохранение увеличивает версию снимка: по ней сбрасываются
+        материализованные оценки портфелей. Векторы провайдеров, которых в этот
+        раз не опрашивали, переносятся из прошлого снимка. Чтение прошлого
+        снимка и запись нового идут под одной блокировкой, поэтому версии
+        одновременных сохранений не совпадают.
+        """
+        try:
+            self.migrate_fiat_direction()
+        except Exception as e:
+            raise StorageError(f"Ошибка переноса фиатных курсов: {str(e)}") from e
+        try:
+            with self._rates_lock():
+                previous = self._previous_snapshot()
+                matrices = {**previous.get("matrices", {}), **(vectors or {})}
+                data = {
+                    "pairs": rates,
+                    "last_refresh": datetime.utcnow().isoformat() + "Z",
+                    "version": previous.get("version", 0) + 1
+                }
+                if matrices:
+                    data["matrices"] = matrices
 
-            os.replace(temp_path, self.config.RATES_FILE_PATH)
+                path = self.config.RATES_FILE_PATH
+                get_serializer(path).dump_file(data, path)
 
         except Exception as e:
             raise StorageError(f"Ошибка сохранения курсов: {str(e)}") from e
 
+    @timed("valutatrade_storage", op="load_rates")
     def load_rates(self) -> Dict[str, Dict[str, Any]]:
         """Загрузить актуальные курсы из кэша"""
         try:
             if not os.path.exists(self.config.RATES_FILE_PATH):
                 return {}
 
-            with open(self.config.RATES_FILE_PATH, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get("pairs", {})
+            stat = os.stat(self.config.RATES_FILE_PATH)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if self._rates_cache is not None and self._rates_cache[0] == stamp:
+                return self._rates_cache[1]
+
+            path = self.config.RATES_FILE_PATH
+            data = get_serializer(path).load_file(path)
+            self._rates_cache = (stamp, data.get("pairs", {}), data.get("version", 0))
+            return self._rates_cache[1]
 
         except Exception as e:
             raise StorageError(f"Ошибка загрузки курсов: {str(e)}") from e
 
-    def save_history_record(self, record: Dict[str, Any]) -> None:
-        """Сохранить запись в историю"""
+    def _rates_lock(self) -> FileLock:
+        """Межпроцессная блокировка чтения-изменения-записи rates.json"""
+        return FileLock(f"{self.config.RATES_FILE_PATH}.lock")
+
+    def _previous_snapshot(self) -> Dict[str, Any]:
+        """Сохранённый rates.json целиком ({} — если его нет или он не читается)"""
+        path = self.config.RATES_FILE_PATH
+        if not os.path.exists(path):
+            return {}
         try:
-            os.makedirs(os.path.dirname(self.config.HISTORY_FILE_PATH), exist_ok=True)
+            return get_serializer(path).load_file(path)
+        except (OSError, ValueError):
+            return {}
+
+    def rates_version(self) -> int:
+        """Версия сохранённого снимка курсов (0, если кэша нет)"""
+        self.load_rates()
+        return self._rates_cache[2] if self._rates_cache is not None else 0
+
+    @property
+    def _migrated_marker(self) -> str:
+        return os.path.join(self.config.HISTORY_SEGMENT_DIR, '.legacy_migrated')
+
+    def _legacy_pending(self) -> bool:
+        """Есть ли единый файл истории, ещё не перенесённый в пустое хранилище сегментов"""
+        return (not os.path.exists(self._migrated_marker)
+                and os.path.exists(self.config.HISTORY_FILE_PATH)
+                and not self.segments.load_manifest())
+
+    def migrate_legacy_history(self) -> bool:
+        """Однократно переносит историю из единого файла HISTORY_FILE_PATH в сегменты.
+
+        Перенос идёт под блокировкой каталога сегментов и отмечается файлом в нём,
+        поэтому одновременные процессы не продублируют историю. Исходный файл
+        не удаляется. Вызывается только с путей записи; True — записи перенесены.
+        """
+        if os.path.exists(self._migrated_marker):
+            return False
+        with self.segments.lock():
+            if os.path.exists(self._migrated_marker):
+                return False
+            migrate = self._legacy_pending()
+            if migrate:
+                path = self.config.HISTORY_FILE_PATH
+                self.segments.extend(get_serializer(path).load_file(path))
+            os.makedirs(self.config.HISTORY_SEGMENT_DIR, exist_ok=True)
+            with open(self._migrated_marker, 'w', encoding='utf-8') as f:
+                f.write(f"{datetime.utcnow().isoformat()}Z\n")
+        return migrate
+
+    @property
+    def _fiat_marker(self) -> str:
+        return os.path.join(self.config.HISTORY_SEGMENT_DIR, '.fiat_price_direction')
+
+    def _legacy_fiat_quote(self, pair: str, source: Optional[str]) -> bool:
+        """Фиатная пара ExchangeRate-API к базе, записанная как «единиц CODE за 1 BASE»"""
+        return (pair.partition('_')[2] == self.config.BASE_CURRENCY
+                and (source or '').startswith('ExchangeRate-API'))
+
+    def _to_price(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        if self._legacy_fiat_quote(pair_key(record), record.get('source')):
+            return invert_rate(record)
+        return record
+
+    def migrate_fiat_direction(self) -> bool:
+        """Однократно переводит сохранённые фиатные пары CODE_BASE в цену CODE в BASE.
+
+        Раньше курс ExchangeRate-API сохранялся как есть (единиц CODE за 1 BASE),
+        теперь пара, как и криптовалютная, хранит цену. Курсы сырых тиков, свечей
+        и rates.json обращаются под блокировкой каталога сегментов, перенос
+        отмечается файлом в нём. Вызывается до первой записи в новом направлении;
+        True — какие-то записи обращены.
+        """
+        if os.path.exists(self._fiat_marker):
+            return False
+        with self.segments.lock():
+            if os.path.exists(self._fiat_marker):
+                return False
+            self.migrate_legacy_history()
+            changed = self.segments.rewrite(self._to_price)
+            for path in (self.config.HISTORY_HOURLY_FILE_PATH,
+                         self.config.HISTORY_DAILY_FILE_PATH):
+                tier = self._load_tier(path)
+                updated = [self._to_price(record) for record in tier]
+                if any(new is not old for old, new in zip(tier, updated, strict=True)):
+                    get_serializer(path).dump_file(updated, path)
+                    changed += 1
+            changed += self._migrate_cached_fiat()
+            with open(self._fiat_marker, 'w', encoding='utf-8') as f:
+                f.write(f"{datetime.utcnow().isoformat()}Z\n")
+        return bool(changed)
+
+    def _migrate_cached_fiat(self) -> int:
+        """Обращает фиатные пары в rates.json; векторы matrices уже в направлении API"""
+        path = self.config.RATES_FILE_PATH
+        if not os.path.exists(path):
+            return 0
+        with self._rates_lock():
+            data = get_serializer(path).load_file(path)
+            pairs = data.get("pairs", {})
+            stale = [pair for pair, entry in pairs.items()
+                     if self._legacy_fiat_quote(pair, entry.get('source'))]
+            if not stale:
+                return 0
+            for pair in stale:
+                pairs[pair] = invert_rate(pairs[pair])
+            # Новая версия снимка сбрасывает оценки портфелей по старым курсам
+            data["version"] = data.get("version", 0) + 1
+            get_serializer(path).dump_file(data, path)
+        return len(stale)
+
+    def _legacy_history(self, start: Optional[datetime], end: Optional[datetime],
+                        pairs: Optional[set]) -> List[Dict[str, Any]]:
+        """Записи единого файла истории, пока он не перенесён (чтение без переноса)"""
+        if not self._legacy_pending():
+            return []
+        path = self.config.HISTORY_FILE_PATH
+        return [
+            record for record in get_serializer(path).load_file(path)
+            if in_range(record['timestamp'], start, end)
+            and (pairs is None or pair_key(record) in pairs)
+        ]
+
+    def load_index(self) -> PairIndex:
+        """Актуальные курсы с индексами по валюте и типу (перестраиваются при изменении кэша)"""
+        rates = self.load_rates()
+        stamp = self._rates_cache[0] if self._rates_cache is not None else None
+        if self._index_cache is not None and self._index_cache[0] == stamp:
+            return self._index_cache[1]
 
-            records = []
-            if os.path.exists(self.config.HISTORY_FILE_PATH):
-                with open(self.config.HISTORY_FILE_PATH, 'r', encoding='utf-8') as f:
-                    records = json.load(f)
+        index = PairIndex(rates, self.config.CRYPTO_CURRENCIES)
+        self._index_cache = (stamp, index)
+        return index
 
-            records.append(record)
+    @timed("valutatrade_storage", op="save_history_record")
+    def save_history_record(self, record: Dict[str, Any]) -> None:
+        """Сохранить запись в историю"""
+        try:
+            self.migrate_fiat_direction()
+            self.segments.append(record)
 
-            temp_path = self.config.HISTORY_FILE_PATH + ".tmp"
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(records, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            raise StorageError(f"Ошибка сохранения истории: {str(e)}") from e
 
-            os.replace(temp_path, self.config.HISTORY_FILE_PATH)
+    @timed("valutatrade_storage", op="save_history_records")
+    def save_history_records(self, records: List[Dict[str, Any]]) -> None:
+        """Сохранить пачку записей в историю одной записью сегмента"""
+        try:
+            self.migrate_fiat_direction()
+            self.segments.extend(records)
 
         except Exception as e:
             raise StorageError(f"Ошибка сохранения истории: {str(e)}") from e
 
-    def get_history(self) -> List[Dict[str, Any]]:
-        """Получить историю"""
+    def _load_tier(self, path: str) -> List[Dict[str, Any]]:
+        if not os.path.exists(path):
+            return []
+        return get_serializer(path).load_file(path)
+
+    @timed("valutatrade_storage", op="get_history")
+    def get_history(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    pairs: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Получить историю по всем уровням: дневные и часовые свечи, затем сырые тики.
+
+        start/end (naive UTC, включительно) и pairs ('BTC_USD', ...) ограничивают
+        выборку; из сырых тиков читаются только пересекающиеся сегменты.
+        """
+        pairs = set(pairs) if pairs is not None else None
         try:
-            if not os.path.exists(self.config.HISTORY_FILE_PATH):
-                return []
+            candles = [
+                record
+                for path in (self.config.HISTORY_DAILY_FILE_PATH,
+                             self.config.HISTORY_HOURLY_FILE_PATH)
+                for record in self._load_tier(path)
+                if in_range(record['timestamp'], start, end)
+                and (pairs is None or pair_key(record) in pairs)
+            ]
+            legacy = self._legacy_history(start, end, pairs)
+            return candles + legacy + self.segments.read(start, end, pairs)
+
+        except Exception as e:
+            raise StorageError(f"Ошибка загрузки истории: {str(e)}") from e
 
-            with open(self.config.HISTORY_FILE_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
+    @timed("valutatrade_storage", op="latest_before")
+    def latest_before(self, moment: datetime, pairs: Iterable[str]) -> List[Dict[str, Any]]:
+        """Последняя запись истории каждой пары строго раньше moment (по всем уровням).
 
+        Нужна как начальное значение as-of join для выборки с start = moment:
+        сырые тики просматриваются от новых сегментов к старым, а не целиком.
+        """
+        pairs = set(pairs)
+        try:
+            candidates = [
+                record
+                for path in (self.config.HISTORY_DAILY_FILE_PATH,
+                             self.config.HISTORY_HOURLY_FILE_PATH)
+                for record in self._load_tier(path)
+                if pair_key(record) in pairs and parse_timestamp(record['timestamp']) < moment
+            ]
+            candidates += [
+                record for record in self._legacy_history(None, moment, pairs)
+                if parse_timestamp(record['timestamp']) < moment
+            ]
+            candidates += self.segments.latest_before(moment, pairs).values()
         except Exception as e:
             raise StorageError(f"Ошибка загрузки истории: {str(e)}") from e
+
+        latest: Dict[str, Dict[str, Any]] = {}
+        for record in candidates:
+            key = pair_key(record)
+            if key not in latest or (parse_timestamp(record['timestamp'])
+                                     >= parse_timestamp(latest[key]['timestamp'])):
+                latest[key] = record
+        return list(latest.values())
+
+    @timed("valutatrade_storage", op="compact_history")
+    def compact_history(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Свернуть старую историю: сырые тики → часовые свечи → дневные → удаление"""
+        now = now or datetime.utcnow()
+        cutoffs = retention_cutoffs(
+            now,
+            self.config.HISTORY_RAW_RETENTION_HOURS,
+            self.config.HISTORY_HOURLY_RETENTION_DAYS,
+            self.config.HISTORY_DAILY_RETENTION_DAYS,
+        )
+        paths = {
+            "hourly": self.config.HISTORY_HOURLY_FILE_PATH,
+            "daily": self.config.HISTORY_DAILY_FILE_PATH,
+        }
+        try:
+            # Свечи и сегменты меняются вместе: под той же блокировкой, что и дописывание
+            with self.segments.lock():
+                self.migrate_fiat_direction()
+                self.segments.close_stale(now)
+                tiers = {name: self._load_tier(path) for name, path in paths.items()}
+
+                stale_raw, _ = split_before(self.segments.read(end=cutoffs['raw']), cutoffs['raw'])
+                if stale_raw:
+                    tiers['hourly'] = rollup(tiers['hourly'] + stale_raw, '1h')
+
+                stale_hourly, tiers['hourly'] = split_before(tiers['hourly'], cutoffs['hourly'])
+                if stale_hourly:
+                    tiers['daily'] = rollup(tiers['daily'] + stale_hourly, '1d')
+
+                expired, tiers['daily'] = split_before(tiers['daily'], cutoffs['daily'])
+
+                changed = {
+                    "hourly": bool(stale_raw or stale_hourly),
+                    "daily": bool(stale_hourly or expired),
+                }
+                for name, path in paths.items():
+                    if changed[name]:
+                        get_serializer(path).dump_file(tiers[name], path)
+                # Сырые тики удаляются только после того, как свечи записаны
+                if stale_raw:
+                    self.segments.drop_before(cutoffs['raw'])
+
+        except Exception as e:
+            raise StorageError(f"Ошибка сжатия истории: {str(e)}") from e
+
+        return {
+            "raw_compacted": len(stale_raw),
+            "hourly_compacted": len(stale_hourly),
+            "daily_expired": len(expired),
+            "raw": self.segments.count(),
+            "hourly": len(tiers['hourly']),
+            "daily": len(tiers['daily']),
+        }
@@ -0,0 +1,40 @@
+import os
+import time
+from datetime import datetime
+from typing import Optional
+
+from valutatrade_hub.core.currencies import currencies_file_path, reload_currencies
+from valutatrade_hub.infra.serializer import get_serializer
+from valutatrade_hub.parser_service.api_clients import CoinGeckoClient
+from valutatrade_hub.parser_service.config import ParserConfig
+
+
+def universe_age_seconds(path: Optional[str] = None) -> Optional[float]:
+    """Возраст файла валют в секундах или None, если файла нет"""
+    path = path or currencies_file_path()
+    if not os.path.exists(path):
+        return None
+    return time.time() - os.path.getmtime(path)
+
+
+def refresh_currency_universe(config: ParserConfig, limit: Optional[int] = None,
+                              path: Optional[str] = None) -> int:
+    """Загружает топ монет CoinGecko в файл валют и перестраивает реестр.
+
+    После перезагрузки CURRENCY_REGISTRY список криптовалют и их идентификаторы
+    в config обновляются на месте, так что работающий планировщик начинает
+    запрашивать новый состав со следующего цикла. Возвращает число монет в файле.
+    """
+    path = path or currencies_file_path()
+    limit = limit or config.CURRENCY_UNIVERSE_LIMIT
+    coins = CoinGeckoClient(config).fetch_universe(limit)
+
+    get_serializer(path).dump_file({
+        "updated_at": datetime.utcnow().isoformat() + "Z",
+        "source": "CoinGecko",
+        "currencies": coins,
+    }, path)
+
+    reload_currencies(path)
+    config.reload_universe()
+    return len(coins)
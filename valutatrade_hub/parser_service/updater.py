@@ -1,10 +1,15 @@
 import logging
+import os
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional
 
+from valutatrade_hub.infra.singleflight import SingleFlight
+from valutatrade_hub.metrics import MetricsRegistry, timed
+from valutatrade_hub.parser_service.alerts import AlertEngine
 from valutatrade_hub.parser_service.api_clients import ApiRequestError, BaseApiClient
 from valutatrade_hub.parser_service.config import ParserConfig
-from valutatrade_hub.parser_service.storage import RatesStorage
+from valutatrade_hub.parser_service.pairs import parse_pair
+from valutatrade_hub.parser_service.storage import RatesStorage, StorageError
 
 
 class RatesUpdater:
@@ -14,29 +19,119 @@ class RatesUpdater:
         self,
         config: ParserConfig,
         clients: Dict[str, BaseApiClient],
-        storage: RatesStorage
+        storage: RatesStorage,
+        alerts: Optional[AlertEngine] = None,
+        clock: Optional[Callable[[], datetime]] = None,
+        single_flight: bool = True
     ):
         self.config = config
         self.clients = clients
         self.storage = storage
+        # Источник текущего времени (naive UTC); при воспроизведении истории — время тика
+        self.clock = clock or datetime.utcnow
+        self.alerts = alerts or AlertEngine(config, storage)
         self.logger = logging.getLogger(__name__)
+        self.metrics = MetricsRegistry()
+        # Одновременные обновления из разных процессов объединяются (см. run_update)
+        self.single_flight = None
+        if single_flight:
+            data_dir = os.path.dirname(config.RATES_FILE_PATH)
+            self.single_flight = SingleFlight(
+                "rates_update",
+                os.path.join(data_dir, 'rates.update.lock'),
+                os.path.join(data_dir, 'rates.update.json'),
+                config.UPDATE_WAIT_TIMEOUT_SECONDS
+            )
+
+    def _previous_rates(self) -> Dict[str, float]:
+        """Курсы из кэша до обновления — для проверки пересечения порогов"""
+        try:
+            # Старые фиатные курсы переводятся в цену до сравнения с новыми
+            self.storage.migrate_fiat_direction()
+            return {pair: data['rate'] for pair, data in self.storage.load_rates().items()}
+        except StorageError:
+            return {}
+
+    def _check_alerts(self, previous: Dict[str, float], current: Dict[str, float],
+                      timestamp: str) -> List[Dict[str, Any]]:
+        try:
+            alerts = self.alerts.evaluate(previous, current, timestamp)
+        except Exception as e:
+            self.logger.error(f"Ошибка при проверке оповещений: {str(e)}")
+            return []
+        for alert in alerts:
+            self.logger.warning(f"Оповещение #{alert['rule_id']}: {alert['message']}")
+        return alerts
+
+    def _save_cache(self, all_rates: Dict[str, float], sources: Dict[str, str],
+                    vectors: Dict[str, Dict[str, Any]]) -> None:
+        """Сохраняет пары с разобранными кодами и полные векторы провайдеров"""
+        try:
+            cache_data = {}
+            timestamp = self.clock().isoformat() + "Z"
+
+            for pair, rate in all_rates.items():
+                key = parse_pair(pair, crypto_codes=self.config.CRYPTO_CURRENCIES)
+                cache_data[pair] = {
+                    "rate": rate,
+                    "updated_at": timestamp,
+                    "source": sources[pair],
+                    "from_currency": key.from_code,
+                    "to_currency": key.to_code,
+                    "kind": key.kind
+                }
+
+            for vector in vectors.values():
+                vector["updated_at"] = timestamp
+            self.storage.save_rates(cache_data, vectors)
+            self.logger.info(
+                f"Успешно сохранено {len(cache_data)} курсов в кэш"
+            )
+
+        except Exception as e:
+            self.logger.error(f"Ошибка при сохранении курсов в кэш: {str(e)}")
+            raise
 
     def run_update(self) -> Dict[str, Any]:
-        """Выполнить обновление курсов"""
+        """Выполнить обновление курсов.
+
+        Если другой процесс (оператор или планировщик) уже обновляет курсы,
+        вызов дожидается его и возвращает тот же результат с "shared": True,
+        а не запрашивает провайдеров повторно.
+        """
+        if self.single_flight is None:
+            return dict(self._run_update(), shared=False)
+        try:
+            result, shared = self.single_flight.run(self.clients, self._run_update)
+        except TimeoutError as e:
+            raise ApiRequestError(str(e)) from e
+        return dict(result, shared=shared)
+
+    @timed("valutatrade_updater", phase="run")
+    def _run_update(self) -> Dict[str, Any]:
         self.logger.info("Начало обновления курсов")
 
         all_rates = {}
+        sources = {}
+        vectors = {}
         update_results = {}
 
         for source_name, client in self.clients.items():
             try:
                 self.logger.info(f"Получение курсов от {source_name}")
                 rates = client.fetch_rates()
+                provider = client.last_source or source_name
                 all_rates.update(rates)
+                sources.update(dict.fromkeys(rates, provider))
+                if client.last_vector:
+                    vectors[client.last_vector["base"]] = dict(
+                        client.last_vector, source=provider
+                    )
                 update_results[source_name] = {
                     "success": True,
                     "count": len(rates),
-                    "rates": rates
+                    "rates": rates,
+                    "provider": provider
                 }
                 self.logger.info(
                     f"Успешно получено {len(rates)} курсов от {source_name}"
@@ -63,59 +158,39 @@ class RatesUpdater:
                 }
                 continue
 
-        if all_rates:
-            try:
-                cache_data = {}
-                timestamp = datetime.utcnow().isoformat() + "Z"
+        previous_rates = self._previous_rates()
+
+        with self.metrics.timer('valutatrade_updater', phase='save_rates'):
+            if all_rates:
+                self._save_cache(all_rates, sources, vectors)
 
+        with self.metrics.timer('valutatrade_updater', phase='save_history'):
+            try:
+                timestamp = self.clock().isoformat() + "Z"
+                records = []
                 for pair, rate in all_rates.items():
-                    source = (
-                        "CoinGecko" if any(
-                            crypto in pair for crypto in self.config.CRYPTO_CURRENCIES
-                        )
-                        else "ExchangeRate-API"
-                    )
+                    from_code, _, to_code = pair.partition("_")
+                    record_id = f"{pair}_{timestamp.replace(':', '-')}"
 
-                    cache_data[pair] = {
+                    records.append({
+                        "id": record_id,
+                        "from_currency": from_code,
+                        "to_currency": to_code,
                         "rate": rate,
-                        "updated_at": timestamp,
-                        "source": source
-                    }
+                        "timestamp": timestamp,
+                        "source": sources[pair]
+                    })
 
-                self.storage.save_rates(cache_data)
-                self.logger.info(
-                    f"Успешно сохранено {len(cache_data)} курсов в кэш"
-                )
+                # Все пары тика пишутся в сегмент одной перезаписью
+                self.storage.save_history_records(records)
 
             except Exception as e:
-                self.logger.error(f"Ошибка при сохранении курсов в кэш: {str(e)}")
-                raise
-
-        try:
-            timestamp = datetime.utcnow().isoformat() + "Z"
-            for pair, rate in all_rates.items():
-                source = (
-                    "CoinGecko" if any(
-                        crypto in pair for crypto in self.config.CRYPTO_CURRENCIES
-                    )
-                    else "ExchangeRate-API"
-                )
-
-                record_id = f"{pair}_{timestamp.replace(':', '-')}"
+                self.logger.error(f"Ошибка при сохранении истории курсов: {str(e)}")
 
-                record = {
-                    "id": record_id,
-                    "from_currency": pair.split("_")[0],
-                    "to_currency": pair.split("_")[1],
-                    "rate": rate,
-                    "timestamp": timestamp,
-                    "source": source
-                }
-
-                self.storage.save_history_record(record)
-
-        except Exception as e:
-            self.logger.error(f"Ошибка при сохранении истории курсов: {str(e)}")
+        alerts = []
+        if all_rates:
+            with self.metrics.timer('valutatrade_updater', phase='alerts'):
+                alerts = self._check_alerts(previous_rates, all_rates, timestamp)
 
         self.logger.info("Обновление курсов завершено")
 
@@ -123,8 +198,9 @@ class RatesUpdater:
             "success": len(all_rates) > 0,
             "rates_count": len(all_rates),
             "sources": update_results,
+            "alerts": alerts,
             "timestamp": (
                 timestamp if 'timestamp' in locals()
-                else datetime.utcnow().isoformat() + "Z"
+                else self.clock().isoformat() + "Z"
             )
         }
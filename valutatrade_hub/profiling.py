@@ -0,0 +1,110 @@
+import contextlib
+import cProfile
+import functools
+import io
+import os
+import pstats
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Iterator, List, Optional
+
+from valutatrade_hub.infra.settings import SettingsLoader
+
+PROFILE_MODES = ('cpu', 'mem')
+PROFILE_ENV_VAR = "VALUTATRADE_PROFILE"
+
+
+class Profiler:
+    """Профилирование команд и циклов обновления: cProfile (cpu) или tracemalloc (mem).
+
+    Каждый профилируемый блок сохраняет отчёт с меткой времени в log_path:
+    .prof для cpu и текстовый топ аллокаций для mem.
+    """
+
+    def __init__(self, mode: str, label: str, top_n: Optional[int] = None):
+        if mode not in PROFILE_MODES:
+            raise ValueError(
+                f"Неизвестный режим профилирования '{mode}' "
+                f"(доступны: {', '.join(PROFILE_MODES)})"
+            )
+        settings = SettingsLoader()
+        self.mode = mode
+        self.label = label
+        self.top_n = top_n if top_n is not None else settings.profile_top_n
+        self.log_path = settings.log_path
+        self.reports: List[str] = []
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def _report_path(self, suffix: str) -> str:
+        os.makedirs(self.log_path, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%dT%H%M%S_%f')
+        return os.path.join(self.log_path, f"profile-{self.label}-{stamp}{suffix}")
+
+    @contextlib.contextmanager
+    def session(self) -> Iterator[None]:
+        """Профилирует один блок и сохраняет отчёт"""
+        if self.mode == 'cpu':
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                path = self._report_path('.prof')
+                profiler.dump_stats(path)
+                self.reports.append(path)
+            return
+
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self._last_snapshot = snapshot
+            path = self._report_path('-mem.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self._format_allocations(snapshot))
+            self.reports.append(path)
+
+    def wrap(self, func: Callable) -> Callable:
+        """Оборачивает функцию так, что каждый её вызов профилируется"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            with self.session():
+                return func(*args, **kwargs)
+        return wrapper
+
+    def _format_allocations(self, snapshot: tracemalloc.Snapshot) -> str:
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        stats = snapshot.statistics('lineno')
+        total = sum(stat.size for stat in stats)
+        lines = [f"Всего выделено: {total / 1024:.1f} KiB в {len(stats)} местах"]
+        for index, stat in enumerate(stats[:self.top_n], 1):
+            frame = stat.traceback[0]
+            lines.append(
+                f"{index:>3}. {frame.filename}:{frame.lineno}: "
+                f"{stat.size / 1024:.1f} KiB ({stat.count} блоков)"
+            )
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> str:
+        """Сводка по самым тяжёлым функциям или местам аллокаций"""
+        if not self.reports:
+            return "Профиль пуст: не было ни одного профилируемого запуска"
+
+        header = f"Профиль '{self.label}' ({self.mode}), отчётов: {len(self.reports)}"
+        if self.mode == 'mem':
+            return (f"{header}, последний: {self.reports[-1]}\n"
+                    f"{self._format_allocations(self._last_snapshot)}")
+
+        stream = io.StringIO()
+        stats = pstats.Stats(*self.reports, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        return f"{header}, последний: {self.reports[-1]}\n{stream.getvalue()}"
+
+    def print_summary(self) -> None:
+        print(self.summary())